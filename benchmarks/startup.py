@@ -0,0 +1,298 @@
+"""Startup-time benchmark for the jterm entry points.
+
+Runs each command's import path in a fresh interpreter with
+`python -X importtime` and reports the median cumulative import time, plus
+the slowest modules of the last run. Each command is also timed end to end
+from launch until it is ready:
+
+- `jterm run`: until the app has encoded its first frame (headless, 80x24)
+- `jterm console` and `jterm serve`: until their socket accepts connections
+- `jterm attach`: until the served session's first frame reaches its
+  terminal (a pty answering the capability probe)
+
+    python benchmarks/startup.py [--runs N] [--top N] [--json]
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import pty
+import select
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import termios
+import time
+from pathlib import Path
+from typing import Callable
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Modules each `jterm <command>` imports before its first frame / listening socket
+ENTRY_POINTS = {
+    "run": "import jterm.cli, jterm.terminal",
+    "console": "import jterm.cli, jterm.logging.console",
+    "replay": "import jterm.cli, jterm.recording, jterm.terminal",
+    "serve": "import jterm.cli, jterm.session, jterm.terminal",
+    "attach": "import jterm.cli, jterm.session",
+}
+
+# The console's logging port (see jterm.logging.console)
+CONSOLE_PORT = 8765
+# Give up on a command that isn't ready after this many seconds
+READY_TIMEOUT = 30.0
+
+# Prints the monotonic clock once the first frame has been encoded
+FIRST_FRAME = """
+import asyncio, os, sys, time
+sys.stdin = open(os.devnull)
+from jterm.terminal import JTERM
+
+async def main():
+    loop = asyncio.get_running_loop()
+    app = JTERM(size=(80, 24))
+
+    def output(data):
+        print(time.monotonic(), flush=True)
+        loop.call_soon_threadsafe(app.exit)
+
+    await app.run_headless(output)
+
+asyncio.run(main())
+"""
+
+
+def parse_importtime(stderr: str) -> tuple[int, dict[str, int]]:
+    """Return the total import time and a map of module name -> cumulative
+    import time, both in microseconds."""
+    total = 0
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        times[name.strip()] = int(cumulative)
+        # Top-level imports are indented by a single space
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total, times
+
+
+def measure(statement: str) -> tuple[int, dict[str, int]]:
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def first_frame() -> int:
+    """Microseconds from launching an interpreter to its first frame."""
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    # CLOCK_MONOTONIC is system-wide, so the child's reading compares to ours
+    start = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_FRAME],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return int((float(result.stdout.split()[0]) - start) * 1_000_000)
+
+
+def _environment(state: str) -> dict[str, str]:
+    """Child environment with the cache and state dirs (capabilities cache,
+    history) kept out of the user's."""
+    return dict(
+        os.environ,
+        PYTHONPATH=str(SRC),
+        XDG_CACHE_HOME=os.path.join(state, "cache"),
+        XDG_STATE_HOME=os.path.join(state, "state"),
+    )
+
+
+def _can_connect(family: int, address) -> bool:
+    with socket.socket(family, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(address)
+        except OSError:
+            return False
+    return True
+
+
+def _wait_until(ready: Callable[[], bool], process: subprocess.Popen):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while not ready():
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args} exited with {process.returncode}")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{process.args} not ready")
+        time.sleep(0.001)
+
+
+def listening(command: list[str], family: int, address, state: str) -> int:
+    """Microseconds from launching `jterm <command>` until its socket accepts
+    connections."""
+    start = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "jterm.cli", *command],
+        env=_environment(state),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until(lambda: _can_connect(family, address), process)
+        return int((time.monotonic() - start) * 1_000_000)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def attach_first_frame(path: str, state: str) -> int:
+    """Microseconds from launching `jterm attach` in a pty until the session's
+    first frame has been written to it."""
+    env = _environment(state)
+    start = time.monotonic()
+    pid, fd = pty.fork()
+    if pid == 0:
+        fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack("HHHH", 24, 80, 0, 0))
+        args = [sys.executable, "-m", "jterm.cli", "attach", "--socket", path]
+        os.execve(sys.executable, args, env)
+
+    output = b""
+    try:
+        deadline = start + READY_TIMEOUT
+        while b"Welcome to JTerm" not in output:
+            if time.monotonic() > deadline:
+                raise TimeoutError("jterm attach showed no frame")
+            readable, _, _ = select.select([fd], [], [], 0.1)
+            if not readable:
+                continue
+            data = os.read(fd, 65536)
+            if b"\x1b[c" in data:
+                # Answer DA1 like a terminal would, ending the capability probe
+                os.write(fd, b"\x1b[?62;22c")
+            output += data
+        return int((time.monotonic() - start) * 1_000_000)
+    finally:
+        # ctrl+\ detaches
+        os.write(fd, b"\x1c")
+        try:
+            while os.read(fd, 65536):
+                pass
+        except OSError:
+            # The pty closes once the client has exited
+            pass
+        os.close(fd)
+        os.waitpid(pid, 0)
+
+
+def ready_times(runs: int) -> dict[str, dict[str, list[int]]]:
+    """End-to-end times of each command, by kind ("first_frame" or
+    "listening")."""
+    times: dict[str, dict[str, list[int]]] = {}
+    with tempfile.TemporaryDirectory() as state:
+        times["run"] = {"first_frame": [first_frame() for _ in range(runs)]}
+
+        if _can_connect(socket.AF_INET, ("localhost", CONSOLE_PORT)):
+            print(
+                f"A console is already listening on port {CONSOLE_PORT}, "
+                "not timing `jterm console`",
+                file=sys.stderr,
+            )
+        else:
+            address = ("localhost", CONSOLE_PORT)
+            times["console"] = {
+                "listening": [
+                    listening(["console"], socket.AF_INET, address, state)
+                    for _ in range(runs)
+                ]
+            }
+
+        path = os.path.join(state, "session.sock")
+        command = ["serve", "--foreground", "--socket", path]
+        times["serve"] = {
+            "listening": [
+                listening(command, socket.AF_UNIX, path, state) for _ in range(runs)
+            ]
+        }
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "jterm.cli", *command],
+            env=_environment(state),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until(lambda: _can_connect(socket.AF_UNIX, path), server)
+            times["attach"] = {
+                "first_frame": [attach_first_frame(path, state) for _ in range(runs)]
+            }
+        finally:
+            server.terminate()
+            server.wait()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print JSON results")
+    args = parser.parse_args()
+
+    results = {}
+    for command, statement in ENTRY_POINTS.items():
+        totals = []
+        jterm_modules: dict[str, int] = {}
+        for _ in range(args.runs):
+            total, times = measure(statement)
+            jterm_modules = {k: v for k, v in times.items() if k.startswith("jterm")}
+            totals.append(total)
+        results[command] = {
+            "median_us": int(statistics.median(totals)),
+            "min_us": min(totals),
+            "jterm_modules": dict(
+                sorted(jterm_modules.items(), key=lambda item: -item[1])[: args.top]
+            ),
+        }
+    for command, kinds in ready_times(args.runs).items():
+        for kind, times in kinds.items():
+            results[command][f"{kind}_median_us"] = int(statistics.median(times))
+            results[command][f"{kind}_min_us"] = min(times)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for command, result in results.items():
+        print(
+            f"jterm {command}: median {result['median_us'] / 1000:.1f} ms, "
+            f"min {result['min_us'] / 1000:.1f} ms"
+        )
+        for kind, label in (("first_frame", "first frame"), ("listening", "listening")):
+            if f"{kind}_median_us" in result:
+                print(
+                    f"    {label}: median "
+                    f"{result[f'{kind}_median_us'] / 1000:.1f} ms, "
+                    f"min {result[f'{kind}_min_us'] / 1000:.1f} ms"
+                )
+        for module, us in result["jterm_modules"].items():
+            print(f"    {us / 1000:8.2f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,39 @@
+import importlib
 
+# Submodules are imported on first attribute access so that `import jterm`
+# (and entry points such as `jterm console`) stay cheap.
+_SUBMODULES = {
+    "app",
+    "ascii",
+    "capabilities",
+    "cli",
+    "color",
+    "commands",
+    "core",
+    "events",
+    "focus",
+    "formatting",
+    "highlight",
+    "history",
+    "keymap",
+    "layout",
+    "logging",
+    "messages",
+    "recording",
+    "scheduler",
+    "search",
+    "session",
+    "stylesheet",
+    "terminal",
+    "widgets",
+}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
@@ -1,48 +1,299 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 import os
+import signal
+import time
 import sys
-import termios
-import tty
 import asyncio
-import fcntl
-from . import widgets, commands, core, logging, layout, ascii
+import contextvars
+from . import widgets, commands, core, focus, formatting, logging, layout, ascii, keymap
+from . import capabilities, stylesheet
+from .events import EventQueue, Priority
+from .scheduler import Scheduler, Timer
+
+if TYPE_CHECKING:
+    from . import recording
 
 
 class App:
-    def __init__(self, root: widgets.Widget, dev: bool = False):
+    BINDINGS = [
+        keymap.Binding("ctrl+c", "quit", "Quit"),
+        keymap.Binding("tab", "focus_next", "Focus the next widget"),
+        keymap.Binding("shift+tab", "focus_previous", "Focus the previous widget"),
+    ]
+    # Rules styling the widget tree (see stylesheet)
+    STYLESHEET = ""
+
+    def __init__(
+        self,
+        root: widgets.Widget,
+        dev: bool = False,
+        size: Optional[Tuple[int, int]] = None,
+        record: Optional[str] = None,
+    ):
+        """`size` overrides the terminal size (e.g. for headless replay) and
+        `record` is a path to record the session to."""
         self.root = root
         self._dev = dev
 
-        self.width, self.height = commands.terminal_size()
+        self.width, self.height = size or commands.terminal_size()
         self._fd = sys.stdin.fileno()
         self._old_settings = None
-        self._old_flags = None
+        # Probed when the terminal starts; headless apps keep the defaults
+        self.capabilities = capabilities.Capabilities()
 
         self._running = False
-        self._key_queue: asyncio.Queue[ascii.Key] = asyncio.Queue()
-        self._mouse_queue: asyncio.Queue[ascii.Mouse] = asyncio.Queue()
+        # Input, due timers and background callbacks, in priority order
+        self._events = EventQueue()
+        self._input_parser = ascii.InputParser()
+        # Set when there is something to paint, wakes an idle render loop
+        self._wake = asyncio.Event()
 
         self._handlers = {}
         self._register_handlers()
+        self._keys = keymap.KeyDispatcher()
+        self.focus = focus.FocusManager(root)
+        self.stylesheet = stylesheet.Stylesheet(self.STYLESHEET)
 
         self.last_mouse_position = ascii.Mouse(x=0, y=0)
 
         self._target_fps: int = 10
+        self.scheduler = Scheduler(dispatch=self._post_timer)
         self._dirty: bool = True
+        self._damage = layout.Region()
+
+        # FIXED-position widgets, composited over the tree in z-order
+        self._overlays: list[widgets.Widget] = []
+
+        # Widgets draw into the screen on the event loop; the renderer thread
+        # diffs, encodes and writes the resulting frame snapshots.
+        self.screen = core.Screen(self.width, self.height)
+        self.screen.color_depth = self.capabilities.color_depth
+        self._renderer = core.Renderer(write=self._write_output)
+        # Where encoded frames go: the terminal, or a session client
+        self._output: Callable[[bytes], None] = self._write_terminal
+
+        self._recorder: Optional["recording.Recorder"] = None
+        if record is not None:
+            from . import recording
+
+            self._recorder = recording.Recorder(record, self.width, self.height)
+
+        # Heavy content formatting runs in a process pool
+        self.formatter = formatting.Formatter(dispatch=self.post_background)
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    # Timers
+    def set_timeout(self, delay: float, callback: Callable[[], None]) -> Timer:
+        return self.scheduler.set_timeout(delay, callback)
+
+    def set_interval(self, interval: float, callback: Callable[[], None]) -> Timer:
+        return self.scheduler.set_interval(interval, callback)
+
+    def request_frame_callback(self, callback: Callable[[], None]):
+        """Run callback once before the next frame is painted."""
+        self.scheduler.request_frame_callback(callback)
+        self._wake.set()
+
+    def _post_timer(self, callback: Callable[[], None]):
+        self._events.put(callback, Priority.TIMER)
+
+    def post_background(self, callback: Callable[[], None]):
+        """Run callback from the event pipeline, after pending input and timers."""
+        self._events.put(callback, Priority.BACKGROUND)
 
     def mark_dirty(self):
-        """Mark the app as needing a redraw on the next frame."""
+        """Mark the app as needing a layout and full redraw on the next frame."""
         self._dirty = True
+        self._wake.set()
+
+    def add_damage(self, rect: layout.Rect):
+        """Mark a screen area as needing a repaint on the next frame."""
+        self._damage.add(rect)
+        self._wake.set()
 
     # Mount widget so they have "_app" parameter
     def _mount_widget(self, widget: widgets.Widget):
         widget._app = self
+        # Before the children, which inherit from it
+        self._style(widget)
+        if widget.is_overlay:
+            self._add_overlay(widget)
         for child in widget.children:
+            child._parent = widget
             self._mount_widget(child)
+        self.focus.mounted(widget)
+        widget.on_mount()
 
-    def mount(self, parent: widgets.Widget, child: widgets.Widget):
+    def _unmount_widget(self, widget: widgets.Widget):
+        for child in widget.children:
+            self._unmount_widget(child)
+        widget.on_unmount()
+        self.focus.unmounted(widget)
+        widget._app = None
+        # Widgets are dataclasses, so compare by identity rather than ==
+        self._overlays = [o for o in self._overlays if o is not widget]
+
+    # Styles
+    def _style(self, widget: widgets.Widget):
+        parent = widget._parent
+        inherited = parent.computed_style if parent is not None else stylesheet.EMPTY
+        widget.apply_style(self.stylesheet.compute(widget, inherited))
+
+    def _restyle_tree(self, widget: widgets.Widget):
+        self._style(widget)
+        for child in widget.children:
+            self._restyle_tree(child)
+
+    def restyle(self, widget: Optional[widgets.Widget] = None):
+        """Recompute the styles of widget and its descendants (the whole tree
+        by default), e.g. after classes or the stylesheet changed."""
+        self._restyle_tree(widget or self.root)
+        self.mark_dirty()
+
+    # Tree mutations. Inside `with app.batch():` they are queued and applied
+    # together when the outermost batch exits.
+    def mount(
+        self,
+        parent: widgets.Widget,
+        child: widgets.Widget,
+        index: Optional[int] = None,
+    ):
+        """Attach child to parent, at `index` or after the last child."""
+        self._mutate(self._attach, parent, child, index)
+
+    def unmount(self, child: widgets.Widget):
+        self._mutate(self._detach, child)
+
+    def move(
+        self,
+        child: widgets.Widget,
+        parent: widgets.Widget,
+        index: Optional[int] = None,
+    ):
+        """Reparent a mounted widget without unmounting it."""
+        self._mutate(self._move, child, parent, index)
+
+    def replace(self, old: widgets.Widget, new: widgets.Widget):
+        """Unmount old and mount new in its place."""
+        self._mutate(self._replace, old, new)
+
+    def batch(self) -> "Batch":
+        """Group tree mutations so they apply at once with a single relayout.
+
+        Usable as `with app.batch():` or `async with app.batch():`. Nothing
+        changes until the outermost batch exits, so a frame rendered while a
+        batch is open (e.g. during an await) never sees half of it. If the
+        block raises, the mutations queued in it are dropped.
+
+        A batch only collects the mutations of its own task: other tasks
+        keep mutating the tree directly while it is open across an await.
+        """
+        return Batch(self)
+
+    def _mutate(self, operation: Callable[..., bool], *args):
+        batch = _current_batch.get()
+        # A task started inside a batch may outlive it
+        while batch is not None and not batch.open:
+            batch = batch.parent
+        if batch is not None and batch.app is self:
+            batch.operations.append((operation, args))
+        elif operation(*args):
+            self.mark_dirty()
+
+    def _apply_batch(self, operations: List[Tuple[Callable[..., bool], tuple]]):
+        relayout = False
+        for operation, args in operations:
+            relayout |= operation(*args)
+        if relayout:
+            self.mark_dirty()
+
+    # Each operation returns True when the flow layout needs to be redone
+    def _attach(
+        self, parent: widgets.Widget, child: widgets.Widget, index: Optional[int]
+    ) -> bool:
+        child._parent = parent
+        if index is None:
+            parent.children.append(child)
+        else:
+            parent.children.insert(index, child)
         self._mount_widget(child)
-        parent.children.append(child)
+
+        if child.is_overlay:
+            # Overlays don't affect the flow layout: place it and paint its area
+            self._layout_overlay(child)
+            self.add_damage(child.rect)
+            return False
+        return True
+
+    @staticmethod
+    def _index_in_parent(child: widgets.Widget) -> Optional[int]:
+        if child._parent is None:
+            return None
+        # Widgets are dataclasses, so compare by identity rather than ==
+        return next(
+            (i for i, c in enumerate(child._parent.children) if c is child), None
+        )
+
+    def _remove_child(self, child: widgets.Widget):
+        """Take child out of its parent's children."""
+        index = self._index_in_parent(child)
+        if index is not None:
+            del child._parent.children[index]
+        child._parent = None
+
+    def _detach(self, child: widgets.Widget) -> bool:
+        self._remove_child(child)
+        self._unmount_widget(child)
+
+        if child.is_overlay:
+            # Repaint only the cells the overlay uncovers
+            self.add_damage(child._render_region)
+            return False
+        return True
+
+    def _move(
+        self, child: widgets.Widget, parent: widgets.Widget, index: Optional[int]
+    ) -> bool:
+        self._remove_child(child)
+        child._parent = parent
+        if index is None:
+            parent.children.append(child)
+        else:
+            parent.children.insert(index, child)
+        # Selectors may match it differently under its new ancestors
+        self._restyle_tree(child)
+        self.focus.tree_changed()
+        return True
+
+    def _replace(self, old: widgets.Widget, new: widgets.Widget) -> bool:
+        parent = old._parent
+        index = self._index_in_parent(old)
+        relayout = self._detach(old)
+        if parent is not None:
+            relayout |= self._attach(parent, new, index)
+        return relayout
+
+    # Overlays
+    def _add_overlay(self, widget: widgets.Widget):
+        if not any(o is widget for o in self._overlays):
+            self._overlays.append(widget)
+            # Stable sort keeps mount order within the same z_index
+            self._overlays.sort(key=lambda overlay: overlay.position.z_index)
+
+    def _layout_overlay(self, widget: widgets.Widget):
+        size = widget.measure(available_width=self.width, available_height=self.height)
+        screen_rect = layout.Rect(x=0, y=0, width=self.width, height=self.height)
+        widget.layout(widget.position.resolve(size, screen_rect))
+
+    def _render_overlays(self):
+        for overlay in self._overlays:
+            if self.screen.needs_paint(overlay.rect):
+                # Overlays are opaque: blank what is underneath first
+                self.screen.clear_rect(overlay.rect)
+                overlay.render(self.screen)
 
     # Handle inter widget messages
     def post_message(self, message) -> None:
@@ -52,7 +303,11 @@ class App:
             handler(message)
         else:
             logging.log(f"Failed to find handler in post_message for: {message}")
-        self.mark_dirty()
+
+    def search_highlight(self, widget: widgets.Widget) -> Optional[Tuple[str, bool]]:
+        """The search query to highlight in a widget being drawn and whether it
+        is the current match, or None if it isn't one."""
+        return None
 
     def _register_handlers(self):
         for name in dir(self):
@@ -79,82 +334,124 @@ class App:
 
     # Terminal util functions
     def _start_terminal(self):
-        self._old_settings = termios.tcgetattr(self._fd)
-
-        self._old_flags = fcntl.fcntl(self._fd, fcntl.F_GETFL)
-        # fcntl.fcntl(self._fd, fcntl.F_SETFL, self._old_flags | os.O_NONBLOCK)
-
-        tty.setraw(self._fd)
-        sys.stdout.write("\x1b[?1049h")  # Alternate screen
-        sys.stdout.write("\x1b[?25l")  # Hide cursor
-        sys.stdout.write(
-            "\x1b[>1u"
-        )  # https://sw.kovidgoyal.net/kitty/keyboard-protocol/
-        sys.stdout.write("\033[?1000h")  # Enable mouse click tracking
-        sys.stdout.write("\033[?1003h")  # Enable all mouse movement tracking
-        sys.stdout.write("\033[?1006h")  # Enable SGR extended mouse mode
-
-        sys.stdout.flush()
+        self.set_capabilities(capabilities.detect(self._fd))
+        self._old_settings = commands.start_terminal(self._fd, self.capabilities)
+
+    def set_capabilities(self, terminal: capabilities.Capabilities):
+        """Adopt the capabilities of the terminal the app is shown on."""
+        depth_changed = terminal.color_depth != self.screen.color_depth
+        self.capabilities = terminal
+        self.screen.color_depth = terminal.color_depth
+        if depth_changed:
+            # Colors are resolved to escape sequences as cells are written
+            self.mark_dirty()
 
     def _stop_terminal(self):
-        sys.stdout.write("\x1b[>0u")
-        sys.stdout.write("\x1b[?25h")
-        sys.stdout.write("\x1b[?1049l")
-
-        sys.stdout.write("\033[?1006l")  # Disable SGR extended mouse mode
-        sys.stdout.write("\033[?1003l")  # Disable all mouse movement tracking
-        sys.stdout.write("\033[?1000l")
+        commands.stop_terminal(self._fd, self._old_settings, self.capabilities)
+
+    def resize(self, width: int, height: int):
+        """Adopt a new terminal size; the next frame is a full repaint."""
+        if self._recorder is not None:
+            self._recorder.resize(width, height)
+        self.width, self.height = width, height
+        self.screen.resize(width, height)
+        self.mark_dirty()
 
-        sys.stdout.flush()
+    def _on_terminal_resize(self):
+        # Handled in order with the input around it
+        self.post_input(self._check_terminal_size)
 
-        # fcntl.fcntl(self._fd, fcntl.F_SETFL, self._old_flags)
-        termios.tcsetattr(self._fd, termios.TCSADRAIN, self._old_settings)
+    def _check_terminal_size(self):
+        width, height = commands.terminal_size()
+        if (width, height) != (self.width, self.height):
+            self.resize(width, height)
 
-    # Read keys
-    def _add_key_to_queue(self):
-        key = ascii.read_key()
-        if isinstance(key, ascii.Key):
-            self._key_queue.put_nowait(key)
-        elif isinstance(key, ascii.Mouse):
-            self._mouse_queue.put_nowait(key)
+    def _write_terminal(self, data: bytes):
+        # Recordings and session clients get the bare frame: the client
+        # wraps it for its own terminal
+        if self.capabilities.synchronized_output:
+            data = core.SYNC_BEGIN + data + core.SYNC_END
+        core.write_stdout(data)
 
-    async def read_key(self) -> ascii.Key:
-        return await self._key_queue.get()
+    def _write_output(self, data: bytes):
+        """Called on the renderer thread with each encoded frame."""
+        self._output(data)
 
-    async def read_mouse(self) -> ascii.Mouse:
-        return await self._mouse_queue.get()
+    # Read input
+    def _read_input(self):
+        try:
+            data = os.read(self._fd, 65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        for event in self._input_parser.feed(data):
+            self.post_input(event)
+
+    def post_input(
+        self, event: "ascii.Key | ascii.Mouse | ascii.Paste | Callable[[], None]"
+    ):
+        """Queue a key, a mouse event, a paste or an input callback (e.g. a
+        resize). Input is handled in arrival order, before timers and
+        background work."""
+        self._events.put(event, Priority.INPUT)
 
     # Rendering loop
+    def _render_frame(self):
+        """Repaint the dirty parts of the tree and submit the frame."""
+        self._paint()
+        # Hand the cell buffer snapshot to the renderer thread
+        frame = self.screen.snapshot()
+        if self._recorder is not None:
+            self._recorder.frame(frame)
+        self._renderer.submit(frame)
+
+    def _paint(self):
+        """Lay out and draw what changed since the last frame into the screen.
+
+        A widget that asks for a refresh while it is drawn (e.g. a table whose
+        columns widened) gets it on the next frame.
+        """
+        dirty, self._dirty = self._dirty, False
+        damage, self._damage = self._damage, layout.Region()
+        if dirty:
+            self.screen.clear()
+
+            # Define the size each component wants to be
+            self.root.measure(available_width=self.width, available_height=self.height)
+
+            # Compute the layout
+            screen_rect = layout.Rect(x=0, y=0, width=self.width, height=self.height)
+            self.root.layout(screen_rect)
+            for overlay in self._overlays:
+                self._layout_overlay(overlay)
+
+            # Render the whole tree, then the overlays on top
+            self.root.render(self.screen)
+            self._render_overlays()
+        else:
+            # Only repaint widgets that intersect the damage, in one pass
+            # clipped to it so that nothing outside it is overwritten
+            self.screen.set_damage(damage)
+            self.screen.clear_rect(damage.bounds)
+            self.root.render(self.screen)
+            self._render_overlays()
+            self.screen.set_damage()
+
     async def _render_loop(self):
         while self._running:
-            start_time = asyncio.get_event_loop().time()
-
-            self.root.on_frame()
-
-            if not self._dirty:
-                sleep_time = 1 / self._target_fps
-                await asyncio.sleep(sleep_time)
-            else:
-                commands.clear_screen()
+            start_time = time.monotonic()
 
-                # Define the size each component wants to be
-                self.root.measure(
-                    available_width=self.width, available_height=self.height
-                )
+            # Due timers are queued on the event pipeline; frame callbacks
+            # run here. Idle widgets cost nothing per tick
+            self.scheduler.advance(start_time)
+            self.scheduler.run_frame_callbacks()
 
-                # Compute the layout
-                screen_rect = layout.Rect(
-                    x=0, y=0, width=self.width, height=self.height
-                )
-                self.root.layout(screen_rect)
-
-                # Render the components
-                self.root.render()
-                self._dirty = False
+            if self._dirty or self._damage:
+                self._render_frame()
 
                 logging.log("Rendering")
 
-                elapsed = asyncio.get_event_loop().time() - start_time
+                # Cap the frame rate
+                elapsed = time.monotonic() - start_time
                 sleep_time = (1 / self._target_fps) - elapsed
                 if sleep_time < 0:
                     logging.log(
@@ -162,37 +459,113 @@ class App:
                     )
                 else:
                     await asyncio.sleep(sleep_time)
-
-    async def _input_key_loop(self):
-        """Handles keyboard input from dedicated key queue."""
-        while self._running:
-            key = await self.read_key()
-            if isinstance(key, ascii.Key):
-                logging.log(f"received key", key)
-                if key.modifiers == {"ctrl"} and key.key == "c":
-                    self.mark_dirty()
-                    self._running = False
-                    break
-
-                self.root.handle_key(key)
-                self.mark_dirty()
-
-    async def _input_mouse_loop(self):
-        """Handles mouse input from dedicated mouse queue.
-
-        Following Textual's approach: dispatch each mouse event individually
-        and let widgets handle scroll accumulation if needed.
-        """
-        while self._running:
+            else:
+                await self._wait_for_work()
+
+    async def _wait_for_work(self):
+        """Sleep until something needs painting or the next timer is due."""
+        self._wake.clear()
+        if self._dirty or self._damage or self.scheduler.has_frame_callbacks:
+            return
+        if not self._running:
+            return
+
+        deadline = self.scheduler.next_deadline()
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _event_loop(self):
+        """Consume the event pipeline: a batch of everything queued so far per
+        iteration, input first."""
+        while True:
+            batch = await self._events.get_batch()
+            if batch is None:
+                return
+            for _, event in batch:
+                if self._events.closed:
+                    return
+                self._dispatch_event(event)
+
+    def _dispatch_event(self, event):
+        recorder = self._recorder
+        if isinstance(event, ascii.Key):
+            logging.log("received key", event)
+            if recorder is not None:
+                recorder.key(event)
+            self.dispatch_key(event)
+        elif isinstance(event, ascii.Mouse):
+            if recorder is not None:
+                recorder.mouse(event)
+            self.dispatch_mouse(event)
+        elif isinstance(event, ascii.Paste):
+            if recorder is not None:
+                recorder.paste(event)
+            self.dispatch_paste(event)
+        else:
             try:
-                mouse = await asyncio.wait_for(self._mouse_queue.get(), timeout=0.1)
-            except asyncio.TimeoutError:
-                continue  # Check _running again
+                event()
+            except Exception as e:
+                logging.log(f"Callback {event!r} failed: {e!r}")
+
+    def dispatch_key(self, key: ascii.Key) -> bool:
+        """Run the binding for key along the focus path, innermost first, then
+        fall back to the focused widgets' handle_key (e.g. typing text)."""
+        path = self.focus.path
+        if self._keys.dispatch(key, [*reversed(path), self]):
+            return True
+        # Widgets report their own damage when a key changes them
+        return any(widget.handle_key(key) for widget in reversed(path))
+
+    def dispatch_paste(self, paste: ascii.Paste) -> bool:
+        """Offer pasted text to the focused widget, then its ancestors."""
+        return any(w.handle_paste(paste.text) for w in reversed(self.focus.path))
+
+    def action_quit(self):
+        self.exit()
+
+    def exit(self):
+        """Stop the app: the event pipeline drops what is pending and the
+        render loop finishes its frame and returns."""
+        self._running = False
+        self._events.close()
+        self._wake.set()
+
+    def action_focus_next(self):
+        self.focus.focus_next()
 
-            # Dispatch each mouse event individually to the widget tree
-            self.root.handle_mouse(mouse)
+    def action_focus_previous(self):
+        self.focus.focus_previous()
+
+    def dispatch_mouse(self, mouse: ascii.Mouse) -> bool:
+        """Offer a mouse event to the topmost overlay under it first."""
+        for overlay in reversed(self._overlays):
+            if overlay.handle_mouse(mouse):
+                return True
+        return self.root.handle_mouse(mouse)
 
     async def run(self):
+        loop = asyncio.get_running_loop()
+        self._start_terminal()
+        loop.add_reader(self._fd, self._read_input)
+        loop.add_signal_handler(signal.SIGWINCH, self._on_terminal_resize)
+
+        try:
+            await self._run_loops()
+        finally:
+            loop.remove_reader(self._fd)
+            loop.remove_signal_handler(signal.SIGWINCH)
+            self._stop_terminal()
+
+    async def run_headless(self, output: Callable[[bytes], None]):
+        """Run without a terminal. Encoded frames are passed to `output` on
+        the renderer thread and input comes in through post_input()."""
+        self._output = output
+        await self._run_loops()
+
+    async def _run_loops(self):
         self._running = True
         self._mount_widget(self.root)
 
@@ -202,16 +575,59 @@ class App:
             else:
                 pass
 
-        loop = asyncio.get_running_loop()
-        self._start_terminal()
-        loop.add_reader(self._fd, self._add_key_to_queue)
-
+        self._renderer.start()
         try:
-            await asyncio.gather(
-                self._render_loop(), self._input_key_loop(), self._input_mouse_loop()
-            )
+            await asyncio.gather(self._render_loop(), self._event_loop())
         finally:
-            self._stop_terminal()
+            self.exit()
+            self._renderer.stop()
+            if self._recorder is not None:
+                self._recorder.close()
+            self.formatter.shutdown()
             if self._dev:
                 logging.log("=== jTerm Dev Session Ended ===")
                 logging.ConsoleClient.get().disconnect()
+
+
+# The innermost open batch of the running task
+_current_batch: contextvars.ContextVar[Optional["Batch"]] = contextvars.ContextVar(
+    "jterm_batch", default=None
+)
+
+
+class Batch:
+    """Context manager returned by App.batch()."""
+
+    def __init__(self, app: App):
+        self.app = app
+        self.operations: List[Tuple[Callable[..., bool], tuple]] = []
+        self.parent: Optional[Batch] = None
+        self.open = False
+        self._token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> "Batch":
+        self.parent = _current_batch.get()
+        self._token = _current_batch.set(self)
+        self.open = True
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.open = False
+        _current_batch.reset(self._token)
+        operations, self.operations = self.operations, []
+        if exc_type is not None:
+            return
+        parent = self.parent
+        while parent is not None and not parent.open:
+            parent = parent.parent
+        if parent is not None and parent.app is self.app:
+            # Applied when the outermost batch exits
+            parent.operations.extend(operations)
+        else:
+            self.app._apply_batch(operations)
+
+    async def __aenter__(self) -> "Batch":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.__exit__(exc_type, exc, traceback)
@@ -1,25 +1,44 @@
-from dataclasses import dataclass, field
-from typing import Literal, Optional
-import select
+from dataclasses import dataclass
+from typing import List, Optional
 from . import logging
-import sys
+import codecs
 import re
-import os
-import fcntl
 
 CSI_U_RE = re.compile(r"^\[(\d+);(\d+)u$")  # after ESC is consumed
 
+# Final characters of the escape sequences we parse
+_TERMINATORS = frozenset("~uABCDHFPQRSZ")
 
-@dataclass
+# Bracketed paste markers
+PASTE_START = "\x1b[200~"
+PASTE_END = "\x1b[201~"
+
+
+@dataclass(frozen=True, slots=True)
 class Mouse:
     x: int
     y: int
 
     scroll_up: bool = False
     scroll_down: bool = False
+    scroll_left: bool = False
+    scroll_right: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class Paste:
+    """Text pasted into a terminal with bracketed paste enabled."""
+
+    text: str
+
 
+# Modifier bits, combined into Key.mask
+SHIFT = 1
+ALT = 2
+CTRL = 4
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Key:
     key: str
 
@@ -29,6 +48,11 @@ class Key:
     alt: bool = False
     ctrl: bool = False
 
+    @property
+    def mask(self) -> int:
+        """Modifiers as a bitmask of SHIFT, ALT and CTRL."""
+        return self.shift * SHIFT | self.alt * ALT | self.ctrl * CTRL
+
     @property
     def modifiers(self) -> set[str]:
         modifiers: set[str] = set()
@@ -41,64 +65,122 @@ class Key:
         return modifiers
 
 
-def read_key() -> Optional[Key | Mouse]:
-    ch = sys.stdin.read(1)
-
-    # /x1b is ESC, need to check for escape sequence
-    if ch == "\x1b":
-        return _read_escape_sequence()
-
+class InputParser:
+    """Splits raw terminal input into keys and mouse events.
+
+    Everything available is read at once, so a burst of input (a paste, a
+    fast scroll) becomes one batch of events. An escape sequence cut off at
+    the end of a read is kept until the rest arrives.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+        # Text of a bracketed paste in progress
+        self._paste: Optional[str] = None
+
+    def feed(self, data: bytes) -> List[Key | Mouse | Paste]:
+        text = self._pending + self._decoder.decode(data)
+        self._pending = ""
+
+        events: List[Key | Mouse | Paste] = []
+        i = 0
+        while i < len(text):
+            if self._paste is not None:
+                # Pasted text is taken as is, up to the end marker
+                end = text.find(PASTE_END, i)
+                if end == -1:
+                    # Hold back what could be the start of the end marker
+                    keep = _partial_suffix(text, PASTE_END)
+                    self._paste += text[i : len(text) - keep]
+                    self._pending = text[len(text) - keep :]
+                    break
+                pasted = self._paste + text[i:end]
+                events.append(Paste(pasted.replace("\r\n", "\n").replace("\r", "\n")))
+                self._paste = None
+                i = end + len(PASTE_END)
+                continue
+
+            ch = text[i]
+            if ch != "\x1b":
+                events.append(_key_for_char(ch))
+                i += 1
+                continue
+
+            end = _sequence_end(text, i + 1)
+            if end is None:
+                self._pending = text[i:]
+                break
+            if text.startswith(PASTE_START, i):
+                self._paste = ""
+            else:
+                event = _parse_sequence(text[i + 1 : end])
+                if event is not None:
+                    events.append(event)
+            i = end
+        return events
+
+
+def _partial_suffix(text: str, marker: str) -> int:
+    """Length of the longest end of text that starts marker."""
+    for length in range(min(len(marker) - 1, len(text)), 0, -1):
+        if marker.startswith(text[-length:]):
+            return length
+    return 0
+
+
+def _sequence_end(text: str, start: int) -> Optional[int]:
+    """Index just past the escape sequence whose body starts at `start` (the
+    ESC itself is consumed), or None if it is incomplete."""
+    if start >= len(text):
+        # A lone ESC is the escape key
+        return start
+    if text[start] not in "[O":
+        # ESC and a character (alt+key); ESC before a control character is
+        # the escape key on its own
+        return start + 1 if text[start].isprintable() else start
+
+    mouse = text.startswith("[<", start)
+    i = start + 1
+    while i < len(text):
+        ch = text[i]
+        i += 1
+        if mouse:
+            if ch in "Mm":
+                return i
+        elif ch in _TERMINATORS:
+            return i
+        if i - start > 20:
+            logging.log("Safety limit reached")
+            return i
+    return None
+
+
+def _key_for_char(ch: str) -> Key:
     # \x7f is backspace
     if ch == "\x7f":
-        return Key(key="backspace")
+        return Key(key="backspace", is_printable=False)
 
     # Handle other control characters
     if ord(ch) < 32:
         if ch == "\n" or ch == "\r":
-            return Key(key="enter")
+            return Key(key="enter", is_printable=False)
         elif ch == "\t":
-            return Key(key="tab")
+            return Key(key="tab", is_printable=False)
         elif ch == "\x7f":  # DEL/Backspace
-            return Key(key="backspace")
+            return Key(key="backspace", is_printable=False)
         else:
             # Other control chars like Ctrl+C, Ctrl+D, etc.
             ctrl_char = chr(ord(ch) + 64).lower() if ord(ch) < 27 else ch
-            return Key(key=ctrl_char, modifier="ctrl")
+            return Key(key=ctrl_char, is_printable=False, ctrl=True)
 
     # Regular printable character
     return Key(key=ch)
 
 
-def _read_escape_sequence() -> Optional[Key | Mouse]:
-    sequence = ""
-
-    while True:
-        try:
-            key = sys.stdin.read(1)
-            if not key:
-                break
-            sequence += key
-
-            # Handle mouse sequences
-            if sequence.startswith("[<") and key in ("M", "m"):
-                break
-
-            # Handle modifier sequences
-            if key in ("~", "u", "A", "B", "C", "D", "H", "F", "P", "Q", "R", "S"):
-                break
-
-            if len(sequence) > 20:
-                logging.log("Safety limit reached")
-                break
-        except (IOError, BlockingIOError):
-            break
-
-    return _parse_sequence(sequence)
-
-
 def _parse_sequence(sequence: str) -> Optional[Key | Mouse]:
     if not sequence:
-        return Key(key="escape")
+        return Key(key="escape", is_printable=False)
 
     if sequence.startswith("[<"):
         return _parse_mouse_sgr(sequence)
@@ -133,7 +215,10 @@ def _parse_sequence(sequence: str) -> Optional[Key | Mouse]:
         "[D": "left",
         "[H": "home",
         "[F": "end",
+        "[Z": "tab",
         "[3~": "backspace",
+        "[5~": "pageup",
+        "[6~": "pagedown",
         "OP": "f1",
         "OQ": "f2",
         "OR": "f3",
@@ -149,7 +234,9 @@ def _parse_sequence(sequence: str) -> Optional[Key | Mouse]:
     }
 
     if sequence in simple_keys:
-        return Key(key=simple_keys[sequence], is_printable=False)
+        # Back-tab (CSI Z) is how terminals send shift+tab
+        shift = sequence == "[Z"
+        return Key(key=simple_keys[sequence], is_printable=False, shift=shift)
 
     if len(sequence) == 1:
         return Key(key=sequence)
@@ -177,18 +264,33 @@ def _parse_mouse_sgr(sequence: str):
         cb = int(parts[0])
         x = int(parts[1])
         y = int(parts[2])
-    except ValueError as e:
+    except ValueError:
         return None
 
     scroll = bool(cb & 64)
+    shift = bool(cb & 4)
     scroll_up = False
     scroll_down = False
+    scroll_left = False
+    scroll_right = False
     if scroll:
-        # SGR scroll encoding: cb=64 (up), cb=65 (down)
+        # SGR scroll encoding: cb=64 (up), cb=65 (down), cb=66 (left), cb=67 (right)
+        # Shift turns the vertical wheel into horizontal scrolling
         scroll_direction = cb & 3
         if scroll_direction == 0:
-            scroll_up = True
+            scroll_left, scroll_up = shift, not shift
         elif scroll_direction == 1:
-            scroll_down = True
-
-    return Mouse(x=x, y=y, scroll_up=scroll_up, scroll_down=scroll_down)
+            scroll_right, scroll_down = shift, not shift
+        elif scroll_direction == 2:
+            scroll_left = True
+        elif scroll_direction == 3:
+            scroll_right = True
+
+    return Mouse(
+        x=x,
+        y=y,
+        scroll_up=scroll_up,
+        scroll_down=scroll_down,
+        scroll_left=scroll_left,
+        scroll_right=scroll_right,
+    )
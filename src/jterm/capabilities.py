@@ -0,0 +1,221 @@
+"""What the terminal supports, probed once and cached on disk.
+
+On the first launch in a terminal the app sends a batch of queries
+
+    XTVERSION      CSI > 0 q       terminal name and version
+    DECRQM         CSI ? Pm $ p    synchronized output (2026), bracketed
+                                   paste (2004), SGR mouse (1006)
+    kitty          CSI ? u         progressive keyboard enhancement flags
+    DECRQSS        DCS $ q m ST    whether a truecolor SGR survived
+    DA1            CSI c           answered by every terminal, so its reply
+                                   marks the end of the others
+
+and reads the replies for at most PROBE_TIMEOUT seconds. The result is
+cached in the user cache dir, keyed by the environment that identifies the
+terminal ($TERM, $TERM_PROGRAM and its version, ...), so later launches
+don't pay for the round trip. A probe that timed out before the DA1 reply
+is not cached: the terminal may just have been slow, and the next launch
+probes again.
+"""
+
+import dataclasses
+import json
+import os
+import re
+import select
+import termios
+import time
+import tty
+from dataclasses import dataclass
+from typing import Dict, Optional
+from . import logging
+from .color import ColorDepth
+
+PROBE_TIMEOUT = 0.2
+
+# DECRQM mode numbers
+SYNCHRONIZED_OUTPUT = 2026
+BRACKETED_PASTE = 2004
+SGR_MOUSE = 1006
+
+_QUERIES = (
+    "\x1b[>0q"
+    f"\x1b[?{SYNCHRONIZED_OUTPUT}$p"
+    f"\x1b[?{BRACKETED_PASTE}$p"
+    f"\x1b[?{SGR_MOUSE}$p"
+    "\x1b[?u"
+    # Set an unusual truecolor, ask for the current SGR, then reset
+    "\x1b[38;2;1;2;3m\x1bP$qm\x1b\\\x1b[0m"
+    "\x1b[c"
+)
+
+_XTVERSION = re.compile(r"\x1bP>\|([^\x1b]*)\x1b\\")
+_DECRPM = re.compile(r"\x1b\[\?(\d+);(\d)\$y")
+_KITTY_FLAGS = re.compile(r"\x1b\[\?(\d+)u")
+_DECRQSS = re.compile(r"\x1bP1\$r([^\x1b]*)\x1b\\")
+_DA1 = re.compile(r"\x1b\[\?[\d;]*c")
+
+# Environment variables that tell terminals (and their versions) apart
+_IDENTITY = (
+    "TERM",
+    "TERM_PROGRAM",
+    "TERM_PROGRAM_VERSION",
+    "COLORTERM",
+    "VTE_VERSION",
+    "TMUX",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Capabilities:
+    """Features the terminal supports.
+
+    Mouse reporting and bracketed paste are assumed unless the terminal says
+    otherwise: not every terminal answers DECRQM, and turning them on is
+    harmless where unsupported. The others are only used when confirmed.
+    """
+
+    name: str = ""
+    synchronized_output: bool = False
+    truecolor: bool = False
+    # The xterm 256-color palette, otherwise the 16 ANSI colors only
+    ansi256: bool = True
+    kitty_keyboard: bool = False
+    bracketed_paste: bool = True
+    mouse: bool = True
+
+    @property
+    def color_depth(self) -> ColorDepth:
+        if self.truecolor:
+            return ColorDepth.TRUECOLOR
+        if self.ansi256:
+            return ColorDepth.EIGHT_BIT
+        return ColorDepth.FOUR_BIT
+
+
+def parse_replies(
+    replies: str, environ: Optional[Dict[str, str]] = None
+) -> Capabilities:
+    """Build capabilities from the terminal's replies to the probe."""
+    if environ is None:
+        environ = dict(os.environ)
+
+    # DECRPM: 0 not recognized, 1/2 set/reset, 3 permanently set,
+    # 4 permanently reset
+    modes = {int(mode): int(value) for mode, value in _DECRPM.findall(replies)}
+
+    def mode_supported(mode: int, default: bool) -> bool:
+        value = modes.get(mode)
+        if value is None:
+            return default
+        return value in (1, 2, 3)
+
+    name = _XTVERSION.search(replies)
+    sgr = _DECRQSS.search(replies)
+    truecolor = environ.get("COLORTERM") in ("truecolor", "24bit") or (
+        sgr is not None and ("1;2;3" in sgr.group(1) or ":1:2:3" in sgr.group(1))
+    )
+    # No query for the palette size, terminfo names are the convention
+    term = environ.get("TERM", "")
+    ansi256 = truecolor or "256" in term or "direct" in term or "kitty" in term
+    return Capabilities(
+        name=name.group(1) if name else "",
+        synchronized_output=mode_supported(SYNCHRONIZED_OUTPUT, False),
+        truecolor=truecolor,
+        ansi256=ansi256,
+        kitty_keyboard=_KITTY_FLAGS.search(replies) is not None,
+        bracketed_paste=mode_supported(BRACKETED_PASTE, True),
+        mouse=mode_supported(SGR_MOUSE, True),
+    )
+
+
+def probe(fd: int, timeout: float = PROBE_TIMEOUT) -> Capabilities:
+    """Query the terminal on fd (which must be in raw mode)."""
+    return parse_replies(_read_replies(fd, timeout))
+
+
+def _read_replies(fd: int, timeout: float) -> str:
+    """Send the queries and read the replies up to the DA1 one, or until the
+    timeout."""
+    os.write(fd, _QUERIES.encode("ascii"))
+
+    replies = ""
+    deadline = time.monotonic() + timeout
+    while not _DA1.search(replies):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logging.log("Terminal probe timed out")
+            break
+        readable, _, _ = select.select([fd], [], [], remaining)
+        if not readable:
+            continue
+        data = os.read(fd, 4096)
+        if not data:
+            break
+        replies += data.decode("utf-8", errors="replace")
+    return replies
+
+
+# Cache
+def cache_path() -> str:
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache, "jterm", "capabilities.json")
+
+
+def terminal_identity() -> str:
+    return "|".join(os.environ.get(name, "") for name in _IDENTITY)
+
+
+def _load_cache() -> Dict[str, dict]:
+    try:
+        with open(cache_path()) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store(identity: str, capabilities: Capabilities):
+    cache = _load_cache()
+    cache[identity] = dataclasses.asdict(capabilities)
+    path = cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}"
+        with open(temporary, "w") as file:
+            json.dump(cache, file, indent=1)
+        os.replace(temporary, path)
+    except OSError as e:
+        logging.log(f"Failed to cache terminal capabilities: {e!r}")
+
+
+def detect(fd: int, refresh: bool = False) -> Capabilities:
+    """Capabilities of the terminal on fd: from the cache, or probed (and
+    cached, if the terminal answered) if this terminal wasn't seen before or
+    `refresh` is set."""
+    if not os.isatty(fd):
+        return Capabilities()
+
+    identity = terminal_identity()
+    if not refresh:
+        cached = _load_cache().get(identity)
+        if cached is not None:
+            try:
+                return Capabilities(**cached)
+            except TypeError:
+                # Written by another version
+                pass
+
+    settings = termios.tcgetattr(fd)
+    try:
+        tty.setraw(fd)
+        replies = _read_replies(fd, PROBE_TIMEOUT)
+    finally:
+        # Drop replies that came in after the timeout, so they aren't read
+        # as keys
+        termios.tcflush(fd, termios.TCIFLUSH)
+        termios.tcsetattr(fd, termios.TCSADRAIN, settings)
+    capabilities = parse_replies(replies)
+    logging.log(f"Probed terminal capabilities: {capabilities}")
+    if _DA1.search(replies):
+        _store(identity, capabilities)
+    return capabilities
@@ -1,67 +1,157 @@
 import argparse
-import asyncio
-from . import app, layout, logging
-from .widgets import Container, Text, Input
-from .messages import on
-
-
-class JTERM(app.App):
-    def __init__(self, dev: bool = False):
-        root = Container(
-            id="root",
-            height=layout.Sizing.fill(),
-            children=[
-                Container(
-                    id="messages",
-                    height=layout.Sizing.fill(),
-                    overflow_y=layout.Overflow.AUTO,
-                    children=[
-                        Text(
-                            id="welcome_header",
-                            content="Welcome to JTerm",
-                        ),
-                    ],
-                ),
-                Input(
-                    id="input",
-                    focused=True,
-                    height=layout.Sizing.auto(),
-                    border=layout.Border.all(style=layout.BorderStyle.ROUNDED),
-                ),
-            ],
-        )
-        super().__init__(root, dev)
-
-    @on(Input.Submitted)
-    def on_input_submitted(self, message: Input.Submitted):
-        messages_container = self.query_one("#messages")
-
-        if messages_container is None:
-            logging.log("Failed to find messages container")
-        else:
-            message_count = len(messages_container.children)
-            self.mount(
-                parent=messages_container,
-                child=Text(
-                    id=f"msg-{message_count + 1}",
-                    content=f"{message.value}",
-                    height=layout.Sizing.auto(),
-                ),
-            )
-            logging.log("added new child: ", messages_container.children)
-            self.mark_dirty()
 
+# Only argparse is imported up front: each command imports what it needs so
+# `jterm console` never pays for the widget tree and `jterm` for the socket
+# server.
 
-def main():
-    parser = argparse.ArgumentParser(description="jTerm - Terminal Application")
-    parser.add_argument("command", nargs="?", default="run", help="Command to run")
+
+def _shared_options() -> argparse.ArgumentParser:
+    """Options accepted both before the command and after `run`/`serve`."""
+    parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument("--dev", action="store_true", help="Enable dev mode logging")
+    parser.add_argument("--record", metavar="PATH", help="Record the session to PATH")
+    return parser
+
+
+def _run(args: argparse.Namespace):
+    parser = argparse.ArgumentParser(
+        prog="jterm run", description="Run jTerm", parents=[_shared_options()]
+    )
+    # Parsed into args, so options given before the command are kept
+    parser.parse_args(args.args, namespace=args)
+
+    import asyncio
+    from .history import default_path
+    from .terminal import JTERM
+
+    app = JTERM(dev=args.dev, record=args.record, history=default_path())
+    asyncio.run(app.run())
+
+
+def _console(args: argparse.Namespace):
+    from .logging.console import run_console
+
+    run_console()
+
+
+def _replay(args: argparse.Namespace):
+    parser = argparse.ArgumentParser(
+        prog="jterm replay",
+        description="Replay a recorded session headlessly and report frame timings",
+    )
+    parser.add_argument("log", help="Recording made with `jterm run --record`")
+    parser.add_argument(
+        "--baseline",
+        help="Recording to compare the output with (defaults to the log itself)",
+    )
+    options = parser.parse_args(args.args)
+
+    from . import recording
+    from .terminal import JTERM
+
+    size, records = recording.read_log(options.log)
+    baseline = None
+    if options.baseline:
+        baseline = recording.frames(recording.read_log(options.baseline)[1])
+
+    report = recording.replay(JTERM(size=size), records, baseline)
+    print(report.summary())
+    if report.mismatches or len(report.render_times) != report.baseline_frames:
+        raise SystemExit(1)
+
+
+def _serve(args: argparse.Namespace):
+    parser = argparse.ArgumentParser(
+        prog="jterm serve",
+        description="Run a session in the background; connect with `jterm attach`",
+        parents=[_shared_options()],
+    )
+    parser.add_argument("--socket", help="Socket path (default: per-user runtime dir)")
+    parser.add_argument(
+        "--foreground", action="store_true", help="Don't detach from the terminal"
+    )
+    options = parser.parse_args(args.args, namespace=args)
+
+    import asyncio
+    import os
+    from . import session
+    from .history import default_path
+    from .terminal import JTERM
+
+    path = options.socket or session.default_socket_path()
+    try:
+        # Checked here: a daemonized server could only log the error
+        session.secure_directory(os.path.dirname(path) or ".")
+    except PermissionError as e:
+        raise SystemExit(str(e)) from None
+    if session.is_running(path):
+        raise SystemExit(f"A session is already running on {path}")
+    print(f"Serving on {path}")
+    if not options.foreground:
+        session.daemonize()
+
+    # Headless until a client attaches and brings its terminal size
+    app = JTERM(dev=args.dev, size=(80, 24), record=args.record, history=default_path())
+    asyncio.run(session.serve(app, path))
+
+
+def _attach(args: argparse.Namespace):
+    parser = argparse.ArgumentParser(
+        prog="jterm attach",
+        description="Attach to a session started with `jterm serve`; ctrl+\\ detaches",
+    )
+    parser.add_argument("--socket", help="Socket path (default: per-user runtime dir)")
+    parser.add_argument(
+        "--compress", action="store_true", help="zlib-compress the frame stream"
+    )
+    options = parser.parse_args(args.args)
+
+    import asyncio
+    from . import session
+
+    path = options.socket or session.default_socket_path()
+    try:
+        reason = asyncio.run(session.attach(path, compress=options.compress))
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise SystemExit(f"No session running on {path}") from None
+    except PermissionError as e:
+        raise SystemExit(str(e)) from None
+    print(f"[{reason}]")
+
+
+COMMANDS = {
+    "run": _run,
+    "console": _console,
+    "replay": _replay,
+    "serve": _serve,
+    "attach": _attach,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="jTerm - Terminal Application", parents=[_shared_options()]
+    )
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="run",
+        choices=COMMANDS,
+        help="Command to run (default: run)",
+    )
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
 
     args = parser.parse_args()
-    if args.command == "console":
-        logging.run_console()
-    else:
-        asyncio.run(JTERM(dev=args.dev).run())
+    COMMANDS[args.command](args)
+
+
+def __getattr__(name: str):
+    # Backwards compatibility: JTERM used to live in this module
+    if name == "JTERM":
+        from .terminal import JTERM
+
+        return JTERM
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
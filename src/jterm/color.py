@@ -0,0 +1,205 @@
+"""Colors, and their escape sequences at each terminal color depth.
+
+Widgets specify colors as RGB or as entries of the terminal palette (named
+ANSI colors or 256-color indices). Palette colors follow the user's theme;
+RGB colors are exact where the terminal supports truecolor and are mapped
+to the nearest palette entry where it doesn't:
+
+- 256 colors: the nearest entry of the 6x6x6 cube or the gray ramp, found
+  with per-channel lookup tables in constant time.
+- 16 colors: a nearest-color search over the 16 ANSI colors, memoized.
+
+sgr() returns the shortest SGR sequence for a color at a depth and is
+memoized too, so a themed UI resolves each of its colors once.
+"""
+
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import lru_cache
+from typing import Optional, Tuple
+
+RGB = Tuple[int, int, int]
+
+
+class ColorDepth(IntEnum):
+    FOUR_BIT = 4  # The 16 ANSI colors
+    EIGHT_BIT = 8  # The xterm 256-color palette
+    TRUECOLOR = 24
+
+
+ANSI_NAMES = (
+    "black",
+    "red",
+    "green",
+    "yellow",
+    "blue",
+    "magenta",
+    "cyan",
+    "white",
+    "bright_black",
+    "bright_red",
+    "bright_green",
+    "bright_yellow",
+    "bright_blue",
+    "bright_magenta",
+    "bright_cyan",
+    "bright_white",
+)
+_ALIASES = {"gray": "bright_black", "grey": "bright_black"}
+
+
+@dataclass(frozen=True, slots=True)
+class Color:
+    """A 24-bit RGB color, or the palette entry `index` (0-255), whose actual
+    RGB is up to the terminal theme."""
+
+    r: int = 0
+    g: int = 0
+    b: int = 0
+    index: Optional[int] = None
+
+    @classmethod
+    def ansi(cls, index: int) -> "Color":
+        if not 0 <= index <= 255:
+            raise ValueError(f"Palette index out of range: {index}")
+        r, g, b = PALETTE[index]
+        return cls(r, g, b, index)
+
+    @classmethod
+    def parse(cls, spec: str) -> "Color":
+        """A color from a name ("red", "bright_blue", "gray"), a hex code
+        ("#f80", "#ff8800") or a palette index ("208")."""
+        return _parse(spec)
+
+    @property
+    def rgb(self) -> RGB:
+        return self.r, self.g, self.b
+
+
+@lru_cache(maxsize=None)
+def _parse(spec: str) -> Color:
+    name = spec.strip().lower().replace("-", "_").replace(" ", "_")
+    name = _ALIASES.get(name, name)
+    if name in ANSI_NAMES:
+        return Color.ansi(ANSI_NAMES.index(name))
+    if name.isdigit():
+        return Color.ansi(int(name))
+    if name.startswith("#"):
+        digits = name[1:]
+        if len(digits) == 3:
+            digits = "".join(d * 2 for d in digits)
+        if len(digits) == 6:
+            try:
+                value = int(digits, 16)
+            except ValueError:
+                pass
+            else:
+                return Color(value >> 16, value >> 8 & 0xFF, value & 0xFF)
+    raise ValueError(f"Unknown color {spec!r}")
+
+
+# The xterm palette: 16 ANSI colors (xterm's defaults; themes change them),
+# a 6x6x6 color cube and a 24-step gray ramp
+_CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+PALETTE: Tuple[RGB, ...] = (
+    (0, 0, 0),
+    (205, 0, 0),
+    (0, 205, 0),
+    (205, 205, 0),
+    (0, 0, 238),
+    (205, 0, 205),
+    (0, 205, 205),
+    (229, 229, 229),
+    (127, 127, 127),
+    (255, 0, 0),
+    (0, 255, 0),
+    (255, 255, 0),
+    (92, 92, 255),
+    (255, 0, 255),
+    (0, 255, 255),
+    (255, 255, 255),
+    *(
+        (_CUBE_LEVELS[r], _CUBE_LEVELS[g], _CUBE_LEVELS[b])
+        for r in range(6)
+        for g in range(6)
+        for b in range(6)
+    ),
+    *((8 + 10 * step,) * 3 for step in range(24)),
+)
+
+
+def _nearest_level(value: int, levels: Tuple[int, ...]) -> int:
+    return min(range(len(levels)), key=lambda i: abs(levels[i] - value))
+
+
+# Channel value -> index of the nearest cube level, and -> nearest gray step
+_CUBE_INDEX = tuple(_nearest_level(v, _CUBE_LEVELS) for v in range(256))
+_GRAY_LEVELS = tuple(8 + 10 * step for step in range(24))
+_GRAY_INDEX = tuple(_nearest_level(v, _GRAY_LEVELS) for v in range(256))
+
+
+def _distance(a: RGB, b: RGB) -> int:
+    # "Redmean" weighting: cheap and closer to perception than plain RGB
+    mean = (a[0] + b[0]) // 2
+    dr, dg, db = a[0] - b[0], a[1] - b[1], a[2] - b[2]
+    return ((512 + mean) * dr * dr >> 8) + 4 * dg * dg + ((767 - mean) * db * db >> 8)
+
+
+def to_256(r: int, g: int, b: int) -> int:
+    """Index of the nearest cube or gray ramp entry (16-255). The 16 ANSI
+    colors are skipped: themes redefine them."""
+    cube = 16 + 36 * _CUBE_INDEX[r] + 6 * _CUBE_INDEX[g] + _CUBE_INDEX[b]
+    gray = 232 + _GRAY_INDEX[(r + g + b) // 3]
+    rgb = (r, g, b)
+    if _distance(PALETTE[gray], rgb) < _distance(PALETTE[cube], rgb):
+        return gray
+    return cube
+
+
+@lru_cache(maxsize=4096)
+def to_16(r: int, g: int, b: int) -> int:
+    """Index of the nearest of the 16 ANSI colors."""
+    rgb = (r, g, b)
+    return min(range(16), key=lambda i: _distance(PALETTE[i], rgb))
+
+
+@lru_cache(maxsize=4096)
+def sgr(color: Color, depth: ColorDepth, background: bool = False) -> str:
+    """The shortest SGR sequence setting color as foreground (or background)
+    at depth."""
+    index = color.index
+    if index is None:
+        if depth == ColorDepth.TRUECOLOR:
+            index = to_256(color.r, color.g, color.b)
+            if PALETTE[index] != color.rgb:
+                layer = 48 if background else 38
+                return f"\033[{layer};2;{color.r};{color.g};{color.b}m"
+            # Exactly a palette entry: 38;5;n is shorter
+        elif depth == ColorDepth.EIGHT_BIT:
+            index = to_256(color.r, color.g, color.b)
+        else:
+            index = to_16(color.r, color.g, color.b)
+    elif index >= 16 and depth == ColorDepth.FOUR_BIT:
+        index = to_16(*PALETTE[index])
+
+    if index < 8:
+        return f"\033[{(40 if background else 30) + index}m"
+    if index < 16:
+        return f"\033[{(100 if background else 90) + index - 8}m"
+    return f"\033[{48 if background else 38};5;{index}m"
+
+
+def depth_codes(codes: Tuple[int, ...], depth: ColorDepth) -> Tuple[int, ...]:
+    """Downsample the extended color codes of an SGR sequence (38;5;n,
+    38;2;r;g;b and the 48 equivalents), as written by child processes."""
+    if depth == ColorDepth.TRUECOLOR or len(codes) < 3:
+        return codes
+    layer, mode, *values = codes
+    if mode == 2 and len(values) == 3:
+        color = Color(*(min(max(v, 0), 255) for v in values))
+    elif mode == 5 and len(values) == 1 and 0 <= values[0] <= 255:
+        color = Color.ansi(values[0])
+    else:
+        return codes
+    sequence = sgr(color, depth, background=layer == 48)
+    return tuple(int(code) for code in sequence[2:-1].split(";"))
@@ -2,6 +2,8 @@ import fcntl
 import sys
 import termios
 import struct
+import tty
+from .capabilities import Capabilities
 
 
 def clear_screen():
@@ -12,3 +14,42 @@ def terminal_size():
     result = fcntl.ioctl(sys.stdout.fileno(), termios.TIOCGWINSZ, b"\x00" * 8)
     rows, cols = struct.unpack("HHHH", result)[:2]
     return cols, rows
+
+
+def start_terminal(fd: int, capabilities: Capabilities) -> list:
+    """Put the terminal in raw mode on the alternate screen, with the input
+    reporting it supports. Returns the settings to restore."""
+    settings = termios.tcgetattr(fd)
+    tty.setraw(fd)
+    sys.stdout.write("\x1b[?1049h")  # Alternate screen
+    sys.stdout.write("\x1b[?25l")  # Hide cursor
+    if capabilities.kitty_keyboard:
+        # https://sw.kovidgoyal.net/kitty/keyboard-protocol/
+        sys.stdout.write("\x1b[>1u")
+    if capabilities.mouse:
+        sys.stdout.write("\033[?1000h")  # Enable mouse click tracking
+        sys.stdout.write("\033[?1003h")  # Enable all mouse movement tracking
+        sys.stdout.write("\033[?1006h")  # Enable SGR extended mouse mode
+    if capabilities.bracketed_paste:
+        sys.stdout.write("\033[?2004h")
+
+    sys.stdout.flush()
+    return settings
+
+
+def stop_terminal(fd: int, settings: list, capabilities: Capabilities):
+    if capabilities.kitty_keyboard:
+        sys.stdout.write("\x1b[>0u")
+    sys.stdout.write("\x1b[?25h")
+    sys.stdout.write("\x1b[?1049l")
+
+    if capabilities.mouse:
+        sys.stdout.write("\033[?1006l")  # Disable SGR extended mouse mode
+        sys.stdout.write("\033[?1003l")  # Disable all mouse movement tracking
+        sys.stdout.write("\033[?1000l")
+    if capabilities.bracketed_paste:
+        sys.stdout.write("\033[?2004l")
+
+    sys.stdout.flush()
+
+    termios.tcsetattr(fd, termios.TCSADRAIN, settings)
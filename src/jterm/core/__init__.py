@@ -1,4 +1,17 @@
 from .cell import Cell
-from .screen import Screen
+from .screen import Screen, Frame
+from .renderer import Renderer, encode_frame, write_stdout, SYNC_BEGIN, SYNC_END
+from .vt import VirtualTerminal, cells_at_depth
 
-__all__ = ["Cell", "Screen"]
+__all__ = [
+    "Cell",
+    "Screen",
+    "Frame",
+    "Renderer",
+    "encode_frame",
+    "write_stdout",
+    "SYNC_BEGIN",
+    "SYNC_END",
+    "VirtualTerminal",
+    "cells_at_depth",
+]
@@ -1,11 +1,12 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Cell:
     char: str = ""
     fg: str = ""
     bg: str = ""
 
-    def __eq__(self, other):
-        return self.char == other.char and self.fg == other.fg and self.bg == other.bg
+
+# Cells are immutable, so every empty cell can be the same instance
+BLANK = Cell()
@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+from typing import Callable, Optional
+from .screen import Frame
+from .. import logging
+
+
+def encode_frame(frame: Frame, previous: Optional[Frame] = None) -> str:
+    """Encode the escape sequences that turn `previous` into `frame`.
+
+    Without a previous frame (or after a resize) the whole screen is repainted.
+    """
+    full = (
+        previous is None
+        or previous.width != frame.width
+        or previous.height != frame.height
+    )
+
+    output = []
+    if full:
+        output.append("\033[0m\033[2J")
+
+    style = ("", "")
+    cursor = (-1, -1)
+    for y, row in enumerate(frame.rows):
+        prev_row = None if full else previous.rows[y]
+        if prev_row is row:
+            continue
+
+        for x, cell in enumerate(row):
+            if prev_row is not None:
+                if prev_row[x] == cell:
+                    continue
+            elif not cell.char and not cell.bg:
+                # Screen was just cleared, blank cells are already blank
+                continue
+
+            if cursor != (y, x):
+                output.append(f"\033[{y + 1};{x + 1}H")
+
+            cell_style = (cell.fg, cell.bg)
+            if cell_style != style:
+                output.append(f"\033[0m{cell.fg}{cell.bg}")
+                style = cell_style
+
+            output.append(cell.char or " ")
+            cursor = (y, x + 1)
+
+    if style != ("", ""):
+        output.append("\033[0m")
+
+    return "".join(output)
+
+
+# Terminals that support synchronized output (mode 2026) show everything
+# between these at once, so a large frame never appears half drawn
+SYNC_BEGIN = b"\x1b[?2026h"
+SYNC_END = b"\x1b[?2026l"
+
+
+def write_stdout(data: bytes):
+    fd = sys.stdout.fileno()
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+class Renderer:
+    """Encodes frames and writes them to the terminal on a dedicated thread.
+
+    The event loop only hands over immutable snapshots. If the worker is still
+    busy when a new frame arrives, the pending frame is replaced by the newest
+    one so a slow terminal never builds up a backlog.
+    """
+
+    def __init__(self, write: Optional[Callable[[bytes], None]] = None):
+        self._write = write or write_stdout
+        self._condition = threading.Condition()
+        self._pending: Optional[Frame] = None
+        self._previous: Optional[Frame] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="jterm-renderer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Flush the pending frame and stop the worker thread."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, frame: Frame):
+        with self._condition:
+            if self._pending is not None:
+                logging.log("Renderer busy, dropping stale frame")
+            self._pending = frame
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and self._running:
+                    self._condition.wait()
+                frame = self._pending
+                self._pending = None
+                if frame is None:
+                    return
+
+            data = encode_frame(frame, self._previous)
+            self._previous = frame
+            if data:
+                self._write(data.encode("utf-8"))
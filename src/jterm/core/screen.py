@@ -1,5 +1,21 @@
-from typing import List
-from . import Cell
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+from .cell import Cell, BLANK
+from ..color import Color, ColorDepth, sgr
+from ..layout import Rect, Region
+
+# A Color, or an SGR sequence used as is (e.g. from a child process)
+Style = Union[Color, str, None]
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    """Immutable snapshot of a Screen, safe to hand to another thread."""
+
+    width: int
+    height: int
+    rows: Tuple[Tuple[Cell, ...], ...]
 
 
 class Screen:
@@ -8,25 +24,200 @@ class Screen:
         self.height = height
         self.buffer: List[List[Cell]] = self._create_buffer()
 
+        # Row tuples from the last snapshot, None when the row was written since.
+        # Unchanged rows are shared between frames so the renderer can skip them
+        # with an identity check.
+        self._snapshot_rows: List[Tuple[Cell, ...] | None] = [None] * self.height
+
+        # Areas being repainted this frame, None repaints everything. Writes
+        # are clipped to their bounds, and to the rects themselves when there
+        # are several (the mask)
+        self.damage: Optional[Region] = None
+        self._mask: Optional[List[Rect]] = None
+
+        # Drawing state. Widgets draw in layout coordinates, translated by the
+        # current origin (scrolling). Clips are kept in screen coordinates, each
+        # inside the previous one; the base clip restricts a whole render pass.
+        bounds = Rect(0, 0, width, height)
+        self._base_clip = bounds
+        self._clips: List[Rect] = [bounds]
+        self._origins: List[Tuple[int, int]] = [(0, 0)]
+        self._dx = 0
+        self._dy = 0
+        # Writes outside this rect (screen coordinates) are dropped
+        self.clip = bounds
+
         self.cursor_row = 0
         self.cursor_col = 0
         self.cursor_visible = False
 
+        # Colors are written into cells as SGR sequences for this depth
+        self.color_depth = ColorDepth.TRUECOLOR
+
     def _create_buffer(self) -> List[List[Cell]]:
-        return [[Cell() for _ in range(self.width)] for _ in range(self.height)]
+        return [[BLANK] * self.width for _ in range(self.height)]
 
     def clear(self):
         self.buffer = self._create_buffer()
+        self._snapshot_rows = [None] * self.height
+
+    def set_damage(self, damage: Optional[Region] = None):
+        """Restrict the render pass to the damaged rects (screen coordinates),
+        or lift the restriction. Resets the clip and origin stacks."""
+        bounds = Rect(0, 0, self.width, self.height)
+        self.damage = damage
+        self._mask = None
+        self._base_clip = bounds
+        if damage is not None:
+            self._base_clip = damage.bounds.intersection(bounds)
+            if len(damage.rects) > 1:
+                self._mask = damage.rects
+        self._clips = [bounds]
+        self._origins = [(0, 0)]
+        self._dx = self._dy = 0
+        self.clip = self._base_clip
+
+    def push_clip(self, rect: Rect):
+        """Clip further drawing to rect (layout coordinates) within the current clip."""
+        clip = rect.translate(self._dx, self._dy).intersection(self._clips[-1])
+        self._clips.append(clip)
+        self.clip = clip.intersection(self._base_clip)
+
+    def pop_clip(self):
+        self._clips.pop()
+        self.clip = self._clips[-1].intersection(self._base_clip)
+
+    @contextmanager
+    def clipped(self, rect: Rect) -> Iterator[None]:
+        self.push_clip(rect)
+        try:
+            yield
+        finally:
+            self.pop_clip()
+
+    @contextmanager
+    def translated(self, dx: int, dy: int) -> Iterator[None]:
+        """Shift everything drawn inside the block by (dx, dy)."""
+        self._origins.append((self._dx + dx, self._dy + dy))
+        self._dx, self._dy = self._origins[-1]
+        try:
+            yield
+        finally:
+            self._origins.pop()
+            self._dx, self._dy = self._origins[-1]
+
+    def visible_region(self, rect: Rect) -> Rect:
+        """Screen area of a layout rect left visible by the clip stack."""
+        return rect.translate(self._dx, self._dy).intersection(self._clips[-1])
+
+    def to_screen(self, rect: Rect) -> Rect:
+        """Where a layout rect lands on screen at the current origin (unclipped)."""
+        return rect.translate(self._dx, self._dy)
 
-    def write_char(self, char: str, fg: str = "", bg: str = ""):
-        self.buffer[self.cursor_row][self.cursor_col] = Cell(char, fg, bg)
+    def drawable_area(self, rect: Rect) -> Rect:
+        """Part of a layout rect that drawing can reach this pass, in layout
+        coordinates. Lets widgets skip clipped-away content up front."""
+        return rect.intersection(self.clip.translate(-self._dx, -self._dy))
+
+    def clear_rect(self, rect: Rect):
+        """Blank out the cells covered by rect."""
+        area = rect.translate(self._dx, self._dy).intersection(self.clip)
+        if area.is_empty:
+            return
+
+        for row in range(area.y, area.bottom):
+            for start, end in self._runs(row, area.x, area.right):
+                self.buffer[row][start:end] = [BLANK] * (end - start)
+            self._snapshot_rows[row] = None
+
+    def _runs(self, row: int, start: int, end: int) -> Sequence[Tuple[int, int]]:
+        """The parts of columns [start, end) of a row inside the clip that the
+        damage mask lets through."""
+        if self._mask is None:
+            return ((start, end),)
+        runs = []
+        for rect in self._mask:
+            if rect.y <= row < rect.bottom:
+                low, high = max(start, rect.x), min(end, rect.right)
+                if low < high:
+                    runs.append((low, high))
+        return runs
+
+    def needs_paint(self, rect: Rect) -> bool:
+        """True if rect overlaps the area being repainted this frame."""
+        return self.damage is None or self.damage.intersects(rect)
+
+    def resize(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.clear()
+        self.set_damage()
+
+    def _sgr(self, color: Style, background: bool = False) -> str:
+        if color is None or isinstance(color, str):
+            return color or ""
+        return sgr(color, self.color_depth, background)
+
+    def write_char(self, char: str, fg: Style = "", bg: Style = ""):
+        self.write_char_at(self.cursor_row, self.cursor_col, char, fg, bg)
         self.cursor_col += 1
         if self.cursor_col >= self.width:
             self.cursor_col = 0
             self.cursor_row += 1
 
-    def write_char_at(self, row: int, col: int, char: str, fg: str = "", bg: str = ""):
-        self.buffer[row][col] = Cell(char, fg, bg)
+    def write_char_at(
+        self, row: int, col: int, char: str, fg: Style = "", bg: Style = ""
+    ):
+        row += self._dy
+        col += self._dx
+        clip = self.clip
+        if clip.y <= row < clip.bottom and clip.x <= col < clip.right:
+            if self._runs(row, col, col + 1):
+                self.buffer[row][col] = Cell(char, self._sgr(fg), self._sgr(bg, True))
+                self._snapshot_rows[row] = None
+
+    def write_text(self, row: int, col: int, text: str, fg: Style = "", bg: Style = ""):
+        """Write a run of characters on one row, dropping anything outside the clip."""
+        row += self._dy
+        col += self._dx
+        clip = self.clip
+        if not clip.y <= row < clip.bottom or not text:
+            return
+        start = max(col, clip.x)
+        end = min(col + len(text), clip.right)
+        if start >= end:
+            return
+
+        fg, bg = self._sgr(fg), self._sgr(bg, True)
+        for start, end in self._runs(row, start, end):
+            self.buffer[row][start:end] = [
+                Cell(char, fg, bg) for char in text[start - col : end - col]
+            ]
+        self._snapshot_rows[row] = None
+
+    def write_cells(self, row: int, col: int, cells: Sequence[Cell]):
+        """Copy a run of styled cells onto one row, dropping anything outside
+        the clip. Cells are immutable, so they are shared rather than copied."""
+        row += self._dy
+        col += self._dx
+        clip = self.clip
+        if not clip.y <= row < clip.bottom or not cells:
+            return
+        start = max(col, clip.x)
+        end = min(col + len(cells), clip.right)
+        if start >= end:
+            return
+
+        for start, end in self._runs(row, start, end):
+            self.buffer[row][start:end] = cells[start - col : end - col]
+        self._snapshot_rows[row] = None
+
+    def snapshot(self) -> Frame:
+        rows = self._snapshot_rows
+        for index, row in enumerate(rows):
+            if row is None:
+                rows[index] = tuple(self.buffer[index])
+        return Frame(width=self.width, height=self.height, rows=tuple(rows))
 
     def render_full(self) -> str:
         output = ["\033[H"]
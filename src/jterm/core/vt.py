@@ -0,0 +1,347 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from .cell import Cell, BLANK
+from ..color import ColorDepth, depth_codes
+
+# One token of terminal output: a run of printable text, a complete escape
+# sequence or a single control character
+_TOKEN = re.compile(
+    r"(?P<text>[^\x00-\x1f\x7f]+)"
+    r"|\x1b\[(?P<params>[\x30-\x3f]*)[\x20-\x2f]*(?P<final>[\x40-\x7e])"
+    r"|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    # Other escapes; "ESC [" and "ESC ]" only start CSI and OSC sequences,
+    # which may be cut off at the end of a chunk
+    r"|\x1b[\x20-\x2f]*[\x30-\x5a\x5c\x5e-\x7e]"
+    r"|(?P<control>[\x00-\x1a\x1c-\x1f\x7f])"
+)
+
+# What an escape sequence cut off at the end of a chunk can look like
+_INCOMPLETE = re.compile(
+    r"\x1b(?:\[[\x30-\x3f]*[\x20-\x2f]*|\][^\x07\x1b]*\x1b?|[\x20-\x2f]*)"
+)
+
+# Longest escape sequence kept pending across chunks; longer ones are garbage
+_MAX_SEQUENCE = 4096
+
+_TAB_WIDTH = 8
+
+# SGR attribute codes and the code that turns each one off
+_ATTRIBUTE_RESETS = {
+    22: (1, 2),
+    23: (3,),
+    24: (4,),
+    25: (5,),
+    27: (7,),
+    28: (8,),
+    29: (9,),
+}
+
+
+class VirtualTerminal:
+    """Interprets a stream of terminal output into rows of styled cells.
+
+    Handles what command output uses in practice: SGR colors and attributes,
+    carriage returns and backspaces (progress bars redraw a line in place),
+    cursor movement and line/screen erasure. Other sequences (OSC titles,
+    private modes, charset selection) are consumed and ignored.
+
+    The buffer keeps at most `max_lines` rows, the oldest rows are dropped
+    first. Rows wrap at `columns`. Attributes (bold, underline, ...) are
+    folded into each cell's fg sequence. The rows touched since the last
+    `take_damage()` are tracked so callers can repaint only those.
+
+    Sequences addressing absolute rows (CUP, ED) treat the last `height`
+    rows as the screen, like a terminal of that size would.
+
+    Colors are kept as the program wrote them; cells_at_depth() downsamples
+    them for the terminal they are shown on, which can change (a session
+    client with fewer colors attaching).
+    """
+
+    def __init__(
+        self, max_lines: int = 10_000, columns: int = 16 * 1024, height: int = 24
+    ):
+        self.max_lines = max_lines
+        self.columns = columns
+        self.height = height
+        self.rows: Deque[List[Cell]] = deque([[]], maxlen=max_lines)
+        # Total number of rows dropped off the top so far
+        self.dropped = 0
+        # Longest row ever written, the buffer's content width
+        self.width = 0
+
+        self.cursor_row = 0
+        self.cursor_col = 0
+        self._fg = ""
+        self._bg = ""
+        self._attributes: Tuple[int, ...] = ()
+        self._foreground: Tuple[str, ...] = ()
+        self._background: Tuple[str, ...] = ()
+        # Styles are interned so identical cells compare and encode cheaply
+        self._styles: Dict[Tuple[str, ...], str] = {(): ""}
+
+        # Unfinished escape sequence from the end of the last chunk
+        self._pending = ""
+        self._damage_first: Optional[int] = None
+        self._damage_last = 0
+
+    @property
+    def line_count(self) -> int:
+        """Number of rows, not counting an empty row the cursor waits on."""
+        count = len(self.rows)
+        if count > 1 and not self.rows[-1] and self.cursor_row == count - 1:
+            return count - 1
+        return count
+
+    def take_damage(self) -> Optional[Tuple[int, int]]:
+        """Inclusive range of rows changed since the last call, if any."""
+        if self._damage_first is None:
+            return None
+        damage = (self._damage_first, self._damage_last)
+        self._damage_first = None
+        return damage
+
+    def _damage(self, first: int, last: int):
+        if self._damage_first is None:
+            self._damage_first, self._damage_last = first, last
+        else:
+            self._damage_first = min(self._damage_first, first)
+            self._damage_last = max(self._damage_last, last)
+
+    # Parsing
+    def feed(self, data: str):
+        if self._pending:
+            data = self._pending + data
+            self._pending = ""
+
+        position = 0
+        end = len(data)
+        match = _TOKEN.match
+        while position < end:
+            token = match(data, position)
+            if token is None:
+                # A lone ESC: either a sequence split across chunks or garbage
+                rest = data[position:]
+                if len(rest) < _MAX_SEQUENCE and _INCOMPLETE.fullmatch(rest):
+                    self._pending = rest
+                    return
+                position += 1
+                continue
+
+            position = token.end()
+            text = token.group("text")
+            if text is not None:
+                self._write(text)
+            elif token.group("final") is not None:
+                self._csi(token.group("params"), token.group("final"))
+            elif token.group("control") is not None:
+                self._control(token.group("control"))
+
+    def _control(self, char: str):
+        if char == "\n":
+            # Output read from a pipe never went through a tty, so there is no
+            # onlcr translation: a newline also returns the carriage
+            self.cursor_col = 0
+            self._line_feed()
+        elif char == "\r":
+            self.cursor_col = 0
+        elif char == "\b":
+            self.cursor_col = max(0, self.cursor_col - 1)
+        elif char == "\t":
+            column = (self.cursor_col // _TAB_WIDTH + 1) * _TAB_WIDTH
+            self.cursor_col = min(column, self.columns - 1)
+
+    def _line_feed(self):
+        if self.cursor_row < len(self.rows) - 1:
+            self.cursor_row += 1
+            return
+
+        if len(self.rows) == self.max_lines:
+            # The deque drops the oldest row, shifting every index up by one
+            self.dropped += 1
+            if self._damage_first is not None:
+                self._damage_first = max(0, self._damage_first - 1)
+                self._damage_last = max(0, self._damage_last - 1)
+        self.rows.append([])
+        self.cursor_row = len(self.rows) - 1
+        self._damage(self.cursor_row, self.cursor_row)
+
+    def _write(self, text: str):
+        fg, bg = self._fg, self._bg
+        while text:
+            if self.cursor_col >= self.columns:
+                self.cursor_col = 0
+                self._line_feed()
+
+            room = self.columns - self.cursor_col
+            run, text = text[:room], text[room:]
+            row = self.rows[self.cursor_row]
+            col = self.cursor_col
+            if len(row) < col:
+                row.extend([BLANK] * (col - len(row)))
+            if fg or bg:
+                row[col : col + len(run)] = [Cell(char, fg, bg) for char in run]
+            else:
+                row[col : col + len(run)] = map(Cell, run)
+
+            self.cursor_col = col + len(run)
+            if len(row) > self.width:
+                self.width = len(row)
+            self._damage(self.cursor_row, self.cursor_row)
+
+    def _csi(self, params: str, final: str):
+        if params.startswith(("?", ">", "<", "=")):
+            # Private modes (cursor visibility, bracketed paste, ...)
+            return
+
+        fields = params.replace(":", ";").split(";")
+        args = [int(p) if p.isdigit() else 0 for p in fields]
+        first = args[0] or 1
+
+        if final == "m":
+            self._sgr(args)
+        elif final == "A":
+            self._move_to(self.cursor_row - first, self.cursor_col)
+        elif final in "BE":
+            # Cursor down never scrolls
+            row = min(self.cursor_row + first, len(self.rows) - 1)
+            self._move_to(row, 0 if final == "E" else self.cursor_col)
+        elif final == "F":
+            self._move_to(self.cursor_row - first, 0)
+        elif final == "C":
+            self.cursor_col = min(self.cursor_col + first, self.columns - 1)
+        elif final == "D":
+            self.cursor_col = max(0, self.cursor_col - first)
+        elif final == "G":
+            self.cursor_col = min(first - 1, self.columns - 1)
+        elif final in "Hf":
+            column = args[1] if len(args) > 1 and args[1] else 1
+            self._move_to(self._screen_top + first - 1, column - 1)
+        elif final == "K":
+            self._erase_line(args[0])
+        elif final == "J":
+            self._erase_screen(args[0])
+
+    @property
+    def _screen_top(self) -> int:
+        return max(0, len(self.rows) - self.height)
+
+    def _move_to(self, row: int, col: int):
+        # Rows that scrolled out of the buffer can't be reached anymore
+        rows = len(self.rows)
+        while row >= rows and rows < self.max_lines:
+            self.rows.append([])
+            rows += 1
+        self.cursor_row = max(0, min(row, rows - 1))
+        self.cursor_col = max(0, min(col, self.columns - 1))
+
+    def _erase_line(self, mode: int):
+        row = self.rows[self.cursor_row]
+        col = self.cursor_col
+        if mode == 0:
+            del row[col:]
+        elif mode == 1:
+            row[: col + 1] = [BLANK] * min(col + 1, len(row))
+        elif mode == 2:
+            row.clear()
+        self._damage(self.cursor_row, self.cursor_row)
+
+    def _erase_screen(self, mode: int):
+        top = self._screen_top
+        if mode == 0:
+            del self.rows[self.cursor_row][self.cursor_col :]
+            first, last = self.cursor_row, len(self.rows) - 1
+            for index in range(self.cursor_row + 1, len(self.rows)):
+                self.rows[index].clear()
+        elif mode == 1:
+            first, last = top, self.cursor_row
+            for index in range(top, self.cursor_row):
+                self.rows[index].clear()
+            self._erase_line(1)
+        else:
+            first, last = top, len(self.rows) - 1
+            for index in range(top, len(self.rows)):
+                self.rows[index].clear()
+        self._damage(first, last)
+
+    def _sgr(self, args: List[int]):
+        index = 0
+        attributes = list(self._attributes)
+        while index < len(args):
+            code = args[index]
+            index += 1
+            if code == 0:
+                attributes = []
+                self._foreground = ()
+                self._background = ()
+            elif 1 <= code <= 9:
+                if code not in attributes:
+                    attributes.append(code)
+            elif code in _ATTRIBUTE_RESETS:
+                reset = _ATTRIBUTE_RESETS[code]
+                attributes = [a for a in attributes if a not in reset]
+            elif 30 <= code <= 37 or 90 <= code <= 97:
+                self._foreground = (str(code),)
+            elif 40 <= code <= 47 or 100 <= code <= 107:
+                self._background = (str(code),)
+            elif code == 39:
+                self._foreground = ()
+            elif code == 49:
+                self._background = ()
+            elif code in (38, 48):
+                # Extended colors: 5;n (256 colors) or 2;r;g;b (truecolor)
+                count = 2 if index < len(args) and args[index] == 5 else 4
+                color = tuple(map(str, (code, *args[index : index + count])))
+                index += count
+                if code == 38:
+                    self._foreground = color
+                else:
+                    self._background = color
+
+        self._attributes = tuple(sorted(attributes))
+        self._fg = self._style((*map(str, self._attributes), *self._foreground))
+        self._bg = self._style(self._background)
+
+    def _style(self, codes: Tuple[str, ...]) -> str:
+        style = self._styles.get(codes)
+        if style is None:
+            style = f"\033[{';'.join(codes)}m"
+            self._styles[codes] = style
+        return style
+
+
+@lru_cache(maxsize=4096)
+def _style_at_depth(style: str, depth: ColorDepth) -> str:
+    if "8;" not in style:
+        # No extended color to downsample
+        return style
+    codes = [int(code) for code in style[2:-1].split(";") if code]
+    result: List[int] = []
+    index = 0
+    while index < len(codes):
+        code = codes[index]
+        if code in (38, 48) and index + 1 < len(codes):
+            count = 3 if codes[index + 1] == 5 else 5
+            result.extend(depth_codes(tuple(codes[index : index + count]), depth))
+            index += count
+        else:
+            result.append(code)
+            index += 1
+    return f"\033[{';'.join(map(str, result))}m"
+
+
+def cells_at_depth(cells: Sequence[Cell], depth: ColorDepth) -> Sequence[Cell]:
+    """Cells with their extended colors downsampled to depth."""
+    if depth == ColorDepth.TRUECOLOR:
+        return cells
+    result = []
+    for cell in cells:
+        fg = _style_at_depth(cell.fg, depth) if cell.fg else ""
+        bg = _style_at_depth(cell.bg, depth) if cell.bg else ""
+        if fg == cell.fg and bg == cell.bg:
+            result.append(cell)
+        else:
+            result.append(Cell(cell.char, fg, bg))
+    return result
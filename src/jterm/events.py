@@ -0,0 +1,80 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Any, List, Optional, Tuple
+
+
+class Priority(IntEnum):
+    """Lower values are handled first within a batch."""
+
+    INPUT = 0
+    TIMER = 1
+    BACKGROUND = 2
+
+
+class EventQueue:
+    """The app's single event pipeline.
+
+    Input events, due timers and background work (e.g. finished formatting
+    jobs) are queued with a priority and the time they arrived. The consumer
+    takes everything queued so far in one batch, ordered by priority and then
+    by arrival, so keys and mouse events keep their relative order and input
+    is never starved by timers or background callbacks.
+
+    Waiting costs nothing: the consumer sleeps until something is put or the
+    queue is closed.
+    """
+
+    def __init__(self):
+        # (priority, sequence, timestamp, event)
+        self._heap: List[Tuple[int, int, float, Any]] = []
+        self._sequence = itertools.count()
+        self._waiter: Optional[asyncio.Future] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, event: Any, priority: Priority = Priority.BACKGROUND):
+        if self._closed:
+            return
+        entry = (priority, next(self._sequence), time.monotonic(), event)
+        heapq.heappush(self._heap, entry)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def get_batch(self, limit: int = 256) -> Optional[List[Tuple[float, Any]]]:
+        """Wait for events and return up to `limit` (timestamp, event) pairs,
+        highest priority first. Returns None once the queue is closed."""
+        while not self._heap:
+            if self._closed:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        if self._closed:
+            return None
+
+        heap = self._heap
+        batch = []
+        while heap and len(batch) < limit:
+            _, _, timestamp, event = heapq.heappop(heap)
+            batch.append((timestamp, event))
+        return batch
+
+    def close(self):
+        """Drop pending events and wake the consumer so it can exit."""
+        self._closed = True
+        self._heap.clear()
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
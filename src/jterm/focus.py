@@ -0,0 +1,98 @@
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from .widgets import Widget
+
+
+class FocusManager:
+    """Tracks the focused widget and the path from the root down to it.
+
+    Keys are routed along `path` directly, so dispatch cost depends on the
+    tree depth, never on how many siblings (e.g. transcript messages) the
+    focused widget has. The tab order of focusable widgets is computed once
+    and reused until widgets are mounted or unmounted.
+    """
+
+    def __init__(self, root: "Widget"):
+        self.root = root
+        self.focused: Optional["Widget"] = None
+        self._path: Optional[List["Widget"]] = None
+        self._order: Optional[List["Widget"]] = None
+
+    @property
+    def path(self) -> List["Widget"]:
+        """Widgets from the root down to the focused one (just the root when
+        nothing is focused)."""
+        if self._path is None:
+            path = []
+            widget = self.focused
+            while widget is not None:
+                path.append(widget)
+                widget = widget._parent
+            if not path or path[-1] is not self.root:
+                # Detached from the tree
+                path = [self.root]
+            else:
+                path.reverse()
+            self._path = path
+        return self._path
+
+    def focus(self, widget: Optional["Widget"]):
+        if widget is self.focused:
+            return
+        if self.focused is not None:
+            self.focused.focused = False
+        self.focused = widget
+        if widget is not None:
+            widget.focused = True
+        self._path = None
+
+    # Tree changes
+    def tree_changed(self):
+        """Forget the cached path and tab order after widgets moved."""
+        self._path = None
+        self._order = None
+
+    def mounted(self, widget: "Widget"):
+        self._order = None
+        if widget.focused:
+            self.focus(widget)
+
+    def unmounted(self, widget: "Widget"):
+        """Drop focus if it was inside the unmounted subtree."""
+        self._order = None
+        # Walk up from the focused widget: the cached path may be stale
+        ancestor = self.focused
+        while ancestor is not None:
+            if ancestor is widget:
+                self.focus(None)
+                break
+            ancestor = ancestor._parent
+        self._path = None
+
+    # Traversal
+    @property
+    def order(self) -> List["Widget"]:
+        """Focusable widgets in tree (tab) order."""
+        if self._order is None:
+            order = []
+            stack = [self.root]
+            while stack:
+                widget = stack.pop()
+                if widget.can_focus:
+                    order.append(widget)
+                stack.extend(reversed(widget.children))
+            self._order = order
+        return self._order
+
+    def focus_next(self, step: int = 1):
+        order = self.order
+        if not order:
+            return
+        index = next((i for i, w in enumerate(order) if w is self.focused), None)
+        if index is None:
+            index = -1 if step > 0 else 0
+        self.focus(order[(index + step) % len(order)])
+
+    def focus_previous(self):
+        self.focus_next(-1)
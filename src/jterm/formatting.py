@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import textwrap
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, Executor
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+from . import logging
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+FormatKey = Tuple[bytes, int]
+
+
+def wrap_line(line: str, width: int) -> List[str]:
+    """Word-wrap one line to width."""
+    if width <= 0:
+        return [line]
+    if len(line) <= width and line.isprintable():
+        # What textwrap makes of a short line without tabs
+        return [line.rstrip(" ")]
+    return textwrap.fill(line, width=width).split("\n")
+
+
+def wrap_lines(content: str, width: int) -> List[List[str]]:
+    """Word-wrap each line of content to width: the rows of every line.
+
+    Runs inside worker processes for large content, so it must stay a
+    module-level function.
+    """
+    return [wrap_line(line, width) for line in content.split("\n")]
+
+
+def split_lines(content: str, width: int) -> List[List[str]]:
+    """Cheap placeholder for wrap_lines: hard-split lines at width."""
+    if width <= 0:
+        return [[line] for line in content.split("\n")]
+    return [
+        [line[i : i + width] for i in range(0, len(line), width)] or [""]
+        for line in content.split("\n")
+    ]
+
+
+class Formatter:
+    """Formats widget content, sending heavy jobs to a process pool.
+
+    Results are cached by content hash and width. Content above `threshold`
+    characters is formatted in a worker process; until the result arrives
+    `wrap` returns None and callers fall back to a cheap rendering.
+
+    Each `on_ready` callback waits for one job at a time: asking for other
+    content (e.g. after an append) drops it from the job it waited for, and
+    a job nobody waits for any more is cancelled. A job that fails (e.g. a
+    worker died) is formatted inline instead, and a broken pool is replaced
+    by a new one for the next job.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 16_384,
+        max_entries: int = 256,
+        dispatch: Optional[Callable[[Callable[[], None]], None]] = None,
+    ):
+        """`dispatch` schedules the `on_ready` callbacks of finished jobs; by
+        default they are called as soon as the result arrives."""
+        self.threshold = threshold
+        self._dispatch = dispatch
+        self.max_entries = max_entries
+        self._cache: OrderedDict[FormatKey, List[List[str]]] = OrderedDict()
+        self._pending: dict[FormatKey, List[Callable[[], None]]] = {}
+        self._futures: dict[FormatKey, "asyncio.Future[List[List[str]]]"] = {}
+        # The job each on_ready callback waits for
+        self._waiting: dict[Callable[[], None], FormatKey] = {}
+        self._executor: Optional["ProcessPoolExecutor"] = None
+        # (content, digest) of the last content hashed: the same string is
+        # asked for again at other widths and until its job is done
+        self._digest: Tuple[Optional[str], bytes] = (None, b"")
+
+    def _key(self, content: str, width: int) -> FormatKey:
+        if content is not self._digest[0]:
+            digest = hashlib.blake2b(content.encode("utf-8"), digest_size=16)
+            self._digest = (content, digest.digest())
+        return self._digest[1], width
+
+    def _store(self, key: FormatKey, lines: List[List[str]]):
+        self._cache[key] = lines
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def wrap(
+        self,
+        content: str,
+        width: int,
+        on_ready: Optional[Callable[[], None]] = None,
+    ) -> Optional[List[List[str]]]:
+        """Return the wrapped rows of each line, or None while a background
+        job is running.
+
+        `on_ready` is called on the event loop once a background result is cached.
+        """
+        if len(content) < self.threshold:
+            return wrap_lines(content, width)
+
+        key = self._key(content, width)
+        lines = self._cache.get(key)
+        if lines is not None:
+            self._cache.move_to_end(key)
+            if on_ready is not None:
+                self._release(on_ready)
+            return lines
+
+        callbacks = self._pending.get(key)
+        if callbacks is not None:
+            if on_ready is not None:
+                self._wait(on_ready, key)
+            return None
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to deliver the result on, format inline
+            lines = wrap_lines(content, width)
+            self._store(key, lines)
+            return lines
+
+        if self._executor is None:
+            # multiprocessing is only imported once a heavy job shows up
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor()
+
+        executor = self._executor
+        try:
+            future = loop.run_in_executor(executor, wrap_lines, content, width)
+        except BrokenExecutor as e:
+            logging.log(f"Formatting pool is broken: {e!r}")
+            self._discard(executor)
+            lines = wrap_lines(content, width)
+            self._store(key, lines)
+            return lines
+
+        self._pending[key] = []
+        self._futures[key] = future
+        future.add_done_callback(lambda f: self._on_done(key, f, content, executor))
+        if on_ready is not None:
+            self._wait(on_ready, key)
+        return None
+
+    def _wait(self, on_ready: Callable[[], None], key: FormatKey):
+        if self._waiting.get(on_ready) == key:
+            return
+        self._release(on_ready)
+        self._pending[key].append(on_ready)
+        self._waiting[on_ready] = key
+
+    def _release(self, on_ready: Callable[[], None]):
+        """Stop on_ready waiting for its job, cancelling the job if it was
+        the last one waiting: its content was superseded."""
+        key = self._waiting.pop(on_ready, None)
+        callbacks = self._pending.get(key)
+        if callbacks is None:
+            return
+        callbacks.remove(on_ready)
+        if not callbacks:
+            del self._pending[key]
+            self._futures.pop(key).cancel()
+
+    def _on_done(
+        self,
+        key: FormatKey,
+        future: "asyncio.Future[List[List[str]]]",
+        content: str,
+        executor: Executor,
+    ):
+        if self._futures.get(key) is not future:
+            # Cancelled, and possibly submitted again since
+            return
+        del self._futures[key]
+        callbacks = self._pending.pop(key, [])
+        for callback in callbacks:
+            del self._waiting[callback]
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is None:
+            lines = future.result()
+        else:
+            # Callers are waiting for the result, so it is made here instead
+            logging.log(f"Formatting job failed: {error!r}")
+            if isinstance(error, BrokenExecutor):
+                self._discard(executor)
+            lines = wrap_lines(content, key[1])
+
+        self._store(key, lines)
+        for callback in callbacks:
+            if self._dispatch is not None:
+                self._dispatch(callback)
+            else:
+                callback()
+
+    def _discard(self, executor: Executor):
+        """Drop a broken pool; the next job starts a new one. Its other jobs
+        fail as well and each is formatted inline."""
+        executor.shutdown(wait=False, cancel_futures=True)
+        if self._executor is executor:
+            self._executor = None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+        self._futures.clear()
+        self._waiting.clear()
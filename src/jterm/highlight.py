@@ -0,0 +1,298 @@
+"""Incremental syntax highlighting.
+
+Lexers are line based: tokenizing a line takes the lexer state at the end
+of the previous line (inside a triple-quoted string, a block comment, ...)
+and returns the line's spans and the state at its end. A Highlighter caches
+both for every line of a document, so after an edit it re-tokenizes from
+the first changed line only until the end state matches the cached one
+again; every line after that is still valid. Lines are tokenized when
+asked for, so a long document costs the visible lines (and the ones above
+them, once), not the whole text on every frame.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from .color import Color, ColorDepth, sgr
+from .core import Cell
+
+# (start, end, token) of a highlighted run; text outside spans is plain
+Span = Tuple[int, int, str]
+# (pattern, token, next state); a None token leaves the text plain and a
+# None state stays in the current one
+Rule = Tuple[str, Optional[str], Optional[str]]
+
+THEME: Dict[str, Color] = {
+    "keyword": Color.parse("magenta"),
+    "builtin": Color.parse("cyan"),
+    "string": Color.parse("green"),
+    "number": Color.parse("yellow"),
+    "comment": Color.parse("bright_black"),
+    "function": Color.parse("blue"),
+    "decorator": Color.parse("bright_cyan"),
+    "variable": Color.parse("bright_cyan"),
+}
+
+
+class Lexer:
+    """Regex rules per state, compiled into one alternation per state."""
+
+    def __init__(self, name: str, states: Dict[str, Sequence[Rule]]):
+        self.name = name
+        self._states = {}
+        for state, rules in states.items():
+            pattern = "|".join(f"(?P<r{i}>{rule[0]})" for i, rule in enumerate(rules))
+            actions = {f"r{i}": rule[1:] for i, rule in enumerate(rules)}
+            self._states[state] = (re.compile(pattern), actions)
+
+    def tokenize(self, line: str, state: str = "root") -> Tuple[List[Span], str]:
+        """Spans of line when it starts in state, and the state at its end."""
+        spans: List[Span] = []
+        position = 0
+        while position < len(line):
+            pattern, actions = self._states[state]
+            match = pattern.match(line, position)
+            if match is None or match.end() == position:
+                position += 1
+                continue
+            token, next_state = actions[match.lastgroup]
+            if token is not None:
+                spans.append((position, match.end(), token))
+            if next_state is not None:
+                state = next_state
+            position = match.end()
+        return spans, state
+
+
+def _words(words: str) -> str:
+    """A pattern matching any of the whitespace-separated words."""
+    return r"\b(?:" + "|".join(words.split()) + r")\b"
+
+
+_NUMBER = r"\b(?:0[xXoObB][\da-fA-F_]+|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?)\b"
+
+PYTHON = Lexer(
+    "python",
+    {
+        "root": [
+            (r"#.*", "comment", None),
+            (r'[rRbBuUfF]{0,2}"""', "string", "double3"),
+            (r"[rRbBuUfF]{0,2}'''", "string", "single3"),
+            (r'[rRbBuUfF]{0,2}"(?:[^"\\]|\\.)*"?', "string", None),
+            (r"[rRbBuUfF]{0,2}'(?:[^'\\]|\\.)*'?", "string", None),
+            (r"@[\w.]+", "decorator", None),
+            (r"(?<=\bdef )\w+|(?<=\bclass )\w+", "function", None),
+            (
+                _words(
+                    """
+                    False None True and as assert async await break class
+                    continue def del elif else except finally for from global if
+                    import in is lambda nonlocal not or pass raise return try
+                    while with yield
+                    """
+                ),
+                "keyword",
+                None,
+            ),
+            (
+                _words(
+                    """
+                    self cls print len range enumerate zip dict list set tuple
+                    str int float bool bytes isinstance super open type
+                    """
+                ),
+                "builtin",
+                None,
+            ),
+            (_NUMBER, "number", None),
+            (r"\w+", None, None),
+        ],
+        "double3": [(r'.*?"""', "string", "root"), (r".+", "string", None)],
+        "single3": [(r".*?'''", "string", "root"), (r".+", "string", None)],
+    },
+)
+
+C_LIKE = Lexer(
+    "c-like",
+    {
+        "root": [
+            (r"//.*", "comment", None),
+            (r"/\*.*?\*/", "comment", None),
+            (r"/\*.*", "comment", "comment"),
+            (r'"(?:[^"\\]|\\.)*"?', "string", None),
+            (r"'(?:[^'\\]|\\.)*'?", "string", None),
+            (r"`(?:[^`\\]|\\.)*`", "string", None),
+            (r"`(?:[^`\\]|\\.)*", "string", "template"),
+            (r"#\s*\w+", "decorator", None),
+            (
+                _words(
+                    """
+                    if else for while do switch case default break continue
+                    return function fn func var let const mut class struct enum
+                    interface impl trait type public private protected static
+                    new delete try catch finally throw import export from
+                    package use async await yield true false null nil undefined
+                    this self typeof instanceof in of void match pub
+                    """
+                ),
+                "keyword",
+                None,
+            ),
+            (
+                _words(
+                    """
+                    int char float double long short bool boolean string String
+                    u8 u16 u32 u64 i8 i16 i32 i64 f32 f64 usize number
+                    """
+                ),
+                "builtin",
+                None,
+            ),
+            (_NUMBER, "number", None),
+            (r"\w+(?=\s*\()", "function", None),
+            (r"\w+", None, None),
+        ],
+        "comment": [(r".*?\*/", "comment", "root"), (r".+", "comment", None)],
+        "template": [(r"(?:[^`\\]|\\.)*`", "string", "root"), (r".+", "string", None)],
+    },
+)
+
+SHELL = Lexer(
+    "shell",
+    {
+        "root": [
+            (r"(?<!\S)#.*", "comment", None),
+            (r'"(?:[^"\\]|\\.)*"?', "string", None),
+            (r"'[^']*'?", "string", None),
+            (r"\$\{[^}]*\}?|\$\w+|\$[?!#@*$0-9-]", "variable", None),
+            (
+                _words(
+                    """
+                    if then else elif fi for while until do done case esac in
+                    function return export local readonly source exit
+                    """
+                ),
+                "keyword",
+                None,
+            ),
+            (r"(?<!\S)-{1,2}[\w-]+", "builtin", None),
+            (_NUMBER, "number", None),
+            (r"\w+", None, None),
+        ],
+    },
+)
+
+_LEXERS = {
+    "python": PYTHON,
+    "py": PYTHON,
+    "python3": PYTHON,
+    "bash": SHELL,
+    "sh": SHELL,
+    "shell": SHELL,
+    "zsh": SHELL,
+    "console": SHELL,
+}
+for _name in """
+    c cpp c++ h java javascript js jsx typescript ts tsx go rust rs json csharp
+    cs kotlin swift
+""".split():
+    _LEXERS[_name] = C_LIKE
+
+
+def lexer_for(language: str) -> Optional[Lexer]:
+    """The lexer for a language name or alias (e.g. a code fence's info
+    string), or None if there is none."""
+    if not language:
+        return None
+    return _LEXERS.get(language.split()[0].lower())
+
+
+class Highlighter:
+    """Highlights a document, caching each line's spans, end state and cells.
+
+    update() takes the new lines and keeps the cache of every line before
+    the first change and after the last one. The list is kept, not copied,
+    so it must be replaced rather than edited in place. Lines are tokenized on demand
+    by spans()/cells().
+    """
+
+    def __init__(self, lexer: Lexer):
+        self.lexer = lexer
+        self._lines: List[str] = []
+        # Per line: spans, lexer state at its end, cells (None until needed)
+        self._spans: List[Optional[List[Span]]] = []
+        self._states: List[Optional[str]] = []
+        self._cells: List[Optional[List[Cell]]] = []
+        # Lines from here on may be stale
+        self._dirty = 0
+        # (depth, base style) the cells were styled with
+        self._style: Optional[Tuple[ColorDepth, str]] = None
+        # Lines tokenized so far, for measurement
+        self.tokenized = 0
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def update(self, lines: Sequence[str]):
+        old = self._lines
+        if lines is old:
+            return
+        # Unchanged lines at the start and at the end keep their cache
+        limit = min(len(old), len(lines))
+        prefix = 0
+        while prefix < limit and old[prefix] == lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < limit - prefix and old[len(old) - 1 - suffix] == lines[-1 - suffix]
+        ):
+            suffix += 1
+
+        changed = len(lines) - prefix - suffix
+        tail = len(old) - suffix
+        self._spans[prefix:tail] = [None] * changed
+        self._states[prefix:tail] = [None] * changed
+        self._cells[prefix:tail] = [None] * changed
+        self._lines = lines
+        self._dirty = min(self._dirty, prefix)
+
+    def _ensure(self, index: int):
+        """Tokenize up to line index, stopping early where the end state of a
+        re-tokenized line matches its cached state."""
+        states = self._states
+        while self._dirty <= index:
+            line = self._dirty
+            start = states[line - 1] if line else "root"
+            spans, end = self.lexer.tokenize(self._lines[line], start)
+            self.tokenized += 1
+
+            converged = end == states[line] and self._spans[line] is not None
+            if self._spans[line] != spans:
+                self._cells[line] = None
+            self._spans[line] = spans
+            states[line] = end
+            self._dirty = line + 1
+            if converged:
+                # The lines after were tokenized from this same state: skip
+                # to the next line without a cache
+                while self._dirty < len(states) and states[self._dirty] is not None:
+                    self._dirty += 1
+
+    def spans(self, index: int) -> List[Span]:
+        self._ensure(index)
+        return self._spans[index]
+
+    def cells(self, index: int, depth: ColorDepth, base: str = "") -> List[Cell]:
+        """The line as cells styled at depth; plain text gets `base`."""
+        if self._style != (depth, base):
+            self._style = (depth, base)
+            self._cells = [None] * len(self._lines)
+        self._ensure(index)
+        cells = self._cells[index]
+        if cells is None:
+            line = self._lines[index]
+            cells = [Cell(char, base) for char in line]
+            for start, end, token in self._spans[index]:
+                style = sgr(THEME[token], depth) if token in THEME else base
+                cells[start:end] = [Cell(char, style) for char in line[start:end]]
+            self._cells[index] = cells
+        return cells
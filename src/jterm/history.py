@@ -0,0 +1,299 @@
+"""Persistent input history.
+
+Entries are appended to a file, one per line (newlines and backslashes
+escaped), and never rewritten, so concurrent sessions can share it. The
+file is only read when the history is first used, and entries are only
+decoded when recalled.
+
+Reverse search ranks, most recent first within each group:
+
+1. entries starting with the query, found with a burst trie
+2. entries containing it, found by intersecting trigram postings
+3. entries sharing most of its trigrams, for typos ("gti status")
+
+Building the indexes costs a few seconds of CPU per 100k entries, so it is
+done newest first in small batches (index_step()) that the app runs in the
+background. The older entries not indexed yet are scanned for substrings
+instead.
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from . import logging
+
+# Queries shorter than a trigram can't use the index
+_GRAM = 3
+# Entries a trie node holds before it splits by the next character
+_BURST = 32
+# Share of the query's trigrams a fuzzy match must contain
+FUZZY_THRESHOLD = 0.6
+# Entries indexed per index_step() by default
+BATCH_SIZE = 500
+
+
+def default_path() -> str:
+    state = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return os.path.join(state, "jterm", "history")
+
+
+def encode(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+_ESCAPE = re.compile(r"\\(.)")
+
+
+def decode(line: str) -> str:
+    if "\\" not in line:
+        return line
+    return _ESCAPE.sub(lambda m: "\n" if m.group(1) == "n" else m.group(1), line)
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    return {text[i : i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+class _Node:
+    """A trie node: a bucket of entry ids until it bursts into children keyed
+    by the character at `depth`."""
+
+    __slots__ = ("depth", "ids", "children")
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.ids: List[int] = []
+        self.children: Optional[Dict[str, "_Node"]] = None
+
+
+class _Trie:
+    def __init__(self, texts: List[str]):
+        # Entry id -> lowercased text
+        self._texts = texts
+        self._root = _Node(0)
+
+    def add(self, entry: int):
+        text = self._texts[entry]
+        node = self._root
+        while node.children is not None:
+            node = self._child(node, text)
+        node.ids.append(entry)
+        # Entries ending at this depth share their whole text: never split
+        if len(node.ids) > _BURST and len(text) > node.depth:
+            ids, node.ids, node.children = node.ids, [], {}
+            for moved in ids:
+                self._child(node, self._texts[moved]).ids.append(moved)
+
+    @staticmethod
+    def _child(node: _Node, text: str) -> _Node:
+        char = text[node.depth] if len(text) > node.depth else ""
+        child = node.children.get(char)
+        if child is None:
+            child = node.children[char] = _Node(node.depth + 1)
+        return child
+
+    def starting_with(self, prefix: str) -> List[int]:
+        node = self._root
+        while node.children is not None and node.depth < len(prefix):
+            node = node.children.get(prefix[node.depth])
+            if node is None:
+                return []
+        ids: List[int] = []
+        stack = [node]
+        while stack:
+            subtree = stack.pop()
+            ids.extend(subtree.ids)
+            if subtree.children is not None:
+                stack.extend(subtree.children.values())
+        if node.depth < len(prefix):
+            # Stopped at a bucket: its entries only share part of the prefix
+            texts = self._texts
+            ids = [i for i in ids if texts[i].startswith(prefix)]
+        return ids
+
+
+class History:
+    """Submitted inputs, oldest first, backed by an append-only file.
+
+    Repeated entries are indexed once, ranked by their latest use.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_path()
+        # Encoded entries, None until the file is read
+        self._lines: Optional[List[str]] = None
+
+        # Distinct entries: encoded line -> id, the lowercased line and the
+        # position of its latest use, by id
+        self._ids: Dict[str, int] = {}
+        self._texts: List[str] = []
+        self._latest: List[int] = []
+        # Lines before this position are not indexed yet
+        self._unindexed = 0
+        self._trie = _Trie(self._texts)
+        self._postings: Dict[str, List[int]] = {}
+
+    def _load(self) -> List[str]:
+        if self._lines is None:
+            try:
+                with open(self.path, encoding="utf-8", errors="replace") as file:
+                    self._lines = [line for line in file.read().split("\n") if line]
+            except FileNotFoundError:
+                self._lines = []
+            except OSError as e:
+                logging.log(f"Failed to read history {self.path}: {e!r}")
+                self._lines = []
+            self._unindexed = len(self._lines)
+        return self._lines
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __getitem__(self, index: int) -> str:
+        return decode(self._load()[index])
+
+    def append(self, text: str):
+        """Record a submitted input, unless it is empty or repeats the last."""
+        if not text.strip():
+            return
+        line = encode(text)
+        # Read the file first, or a repeat of its last entry would be written
+        lines = self._load()
+        if lines and lines[-1] == line:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # One write of a whole line: appends from other sessions can't
+            # interleave with it
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        except OSError as e:
+            logging.log(f"Failed to write history {self.path}: {e!r}")
+        lines.append(line)
+        self._index(len(lines) - 1)
+
+    # Indexing
+    @property
+    def indexed(self) -> bool:
+        self._load()
+        return self._unindexed == 0
+
+    def index_step(self, limit: int = BATCH_SIZE) -> bool:
+        """Index up to limit more entries, newest first; False once
+        everything is indexed."""
+        self._load()
+        end = max(0, self._unindexed - limit)
+        for position in range(self._unindexed - 1, end - 1, -1):
+            self._index(position)
+        self._unindexed = end
+        return end > 0
+
+    def _index(self, position: int):
+        line = self._lines[position]
+        entry = self._ids.get(line)
+        if entry is not None:
+            self._latest[entry] = max(self._latest[entry], position)
+            return
+        entry = self._ids[line] = len(self._texts)
+        text = line.lower()
+        self._texts.append(text)
+        self._latest.append(position)
+        self._trie.add(entry)
+        for gram in _trigrams(text):
+            postings = self._postings.get(gram)
+            if postings is None:
+                self._postings[gram] = [entry]
+            else:
+                postings.append(entry)
+
+    # Recall
+    def previous(self, index: int, prefix: str = "") -> Optional[int]:
+        """Position of the last entry before index starting with prefix."""
+        lines = self._load()
+        prefix = encode(prefix)
+        for position in range(min(index, len(lines)) - 1, -1, -1):
+            if lines[position].startswith(prefix):
+                return position
+        return None
+
+    def next(self, index: int, prefix: str = "") -> Optional[int]:
+        """Position of the first entry after index starting with prefix."""
+        lines = self._load()
+        prefix = encode(prefix)
+        for position in range(index + 1, len(lines)):
+            if lines[position].startswith(prefix):
+                return position
+        return None
+
+    def search(self, query: str, limit: int = 50) -> List[str]:
+        """Up to limit distinct entries matching query, best first."""
+        query = encode(query).lower()
+        lines = self._load()
+        if not query or not lines:
+            return []
+
+        latest = self._latest
+
+        def recent(entry: int) -> int:
+            return -latest[entry]
+
+        prefixed = sorted(self._trie.starting_with(query), key=recent)
+        ranked = prefixed[:limit]
+        seen = set(ranked)
+
+        if len(ranked) < limit:
+            texts = self._texts
+            if len(query) < _GRAM:
+                candidates = range(len(texts))
+            else:
+                postings = [self._postings.get(gram, []) for gram in _trigrams(query)]
+                postings.sort(key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+            contained = [
+                entry
+                for entry in candidates
+                if entry not in seen and query in texts[entry]
+            ]
+            contained.sort(key=recent)
+            ranked.extend(contained[: limit - len(ranked)])
+            seen.update(ranked)
+
+        results = [lines[latest[entry]] for entry in ranked]
+        if not self.indexed and len(results) < limit:
+            results.extend(self._scan(query, results, limit))
+
+        if len(results) < limit and len(query) >= _GRAM:
+            fuzzy = self._fuzzy(query, seen, limit - len(results))
+            results.extend(lines[latest[entry]] for entry in fuzzy)
+        return [decode(line) for line in results]
+
+    def _fuzzy(self, query: str, exclude: set, limit: int) -> List[int]:
+        grams = list(_trigrams(query))
+        needed = max(1, math.ceil(len(grams) * FUZZY_THRESHOLD))
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        latest = self._latest
+        matches = [
+            entry
+            for entry, count in shared.items()
+            if count >= needed and entry not in exclude
+        ]
+        matches.sort(key=lambda entry: (-shared[entry], -latest[entry]))
+        return matches[:limit]
+
+    def _scan(self, query: str, found: List[str], limit: int) -> List[str]:
+        """Matches among the entries not indexed yet, newest first."""
+        lines = self._lines
+        seen = set(found)
+        matches: List[str] = []
+        for position in range(self._unindexed - 1, -1, -1):
+            if len(found) + len(matches) >= limit:
+                break
+            line = lines[position]
+            if line not in seen and query in line.lower():
+                seen.add(line)
+                matches.append(line)
+        return matches
@@ -0,0 +1,134 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from . import ascii, logging
+
+# A single key press: key name and modifier bitmask (see ascii.SHIFT, ...)
+Stroke = Tuple[str, int]
+
+_MODIFIERS = {"shift": ascii.SHIFT, "alt": ascii.ALT, "ctrl": ascii.CTRL}
+_ALIASES = {"space": " ", "return": "enter", "esc": "escape"}
+
+# Seconds to wait for the next key of a chord before dropping it
+CHORD_TIMEOUT = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class Binding:
+    """Binds a key (e.g. "ctrl+f") or a chord of keys separated by spaces
+    (e.g. "ctrl+x ctrl+s") to an action. Running the action calls the
+    `action_<name>` method of the widget (or app) declaring the binding."""
+
+    keys: str
+    action: str
+    description: str = ""
+
+
+def parse_stroke(spec: str) -> Stroke:
+    *modifiers, name = spec.split("+")
+    mask = 0
+    for modifier in modifiers:
+        try:
+            mask |= _MODIFIERS[modifier.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown modifier {modifier!r} in {spec!r}") from None
+    return _ALIASES.get(name.lower(), name), mask
+
+
+def parse_keys(keys: str) -> Tuple[Stroke, ...]:
+    return tuple(parse_stroke(spec) for spec in keys.split())
+
+
+# A keymap node maps a stroke to an action name, or to the next node of a chord
+Node = Dict[Stroke, Union[str, "Node"]]
+
+
+class Keymap:
+    """Bindings compiled into nested lookup tables keyed on (key, modifiers)."""
+
+    def __init__(self, bindings: Sequence[Binding] = ()):
+        self.root: Node = {}
+        for binding in bindings:
+            self.bind(binding)
+
+    def bind(self, binding: Binding):
+        strokes = parse_keys(binding.keys)
+        if not strokes:
+            raise ValueError(f"Empty key binding for {binding.action!r}")
+
+        node = self.root
+        for stroke in strokes[:-1]:
+            child = node.get(stroke)
+            if not isinstance(child, dict):
+                # Later bindings win: a chord replaces a single-key binding
+                # on its prefix (and vice versa)
+                child = node[stroke] = {}
+            node = child
+        node[strokes[-1]] = binding.action
+
+
+_compiled: Dict[type, Keymap] = {}
+
+
+def keymap_for(cls: type) -> Keymap:
+    """The keymap of a widget or app class, compiled on first use.
+
+    BINDINGS are inherited: a subclass binding for the same keys replaces
+    the base class one.
+    """
+    keymap = _compiled.get(cls)
+    if keymap is None:
+        bindings: List[Binding] = []
+        for klass in reversed(cls.__mro__):
+            bindings.extend(klass.__dict__.get("BINDINGS", ()))
+        keymap = _compiled[cls] = Keymap(bindings)
+    return keymap
+
+
+class KeyDispatcher:
+    """Resolves key presses against the binding layers along the focus path.
+
+    Layers are searched innermost first (the focused widget, its ancestors,
+    then the app), so a widget can shadow a global binding. Each layer costs
+    one dict lookup. The first key of a chord is held until the next key
+    completes it, or until CHORD_TIMEOUT passes.
+    """
+
+    def __init__(self, timeout: float = CHORD_TIMEOUT):
+        self.timeout = timeout
+        # (node, target) of the chord in progress, and when it expires
+        self._pending: Optional[Tuple[Node, Any]] = None
+        self._deadline = 0.0
+
+    def dispatch(self, key: ascii.Key, layers: Sequence[Any]) -> bool:
+        """Run the action bound to key, returning False if nothing is bound."""
+        stroke = (key.key, key.mask)
+
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            if time.monotonic() <= self._deadline:
+                node, target = pending
+                entry = node.get(stroke)
+                if entry is not None:
+                    return self._resolve(entry, target)
+            # Broken or expired chord, handle the key on its own
+
+        for target in layers:
+            entry = keymap_for(type(target)).root.get(stroke)
+            if entry is not None and self._resolve(entry, target):
+                return True
+        return False
+
+    def _resolve(self, entry: Union[str, Node], target: Any) -> bool:
+        if isinstance(entry, dict):
+            self._pending = (entry, target)
+            self._deadline = time.monotonic() + self.timeout
+            return True
+
+        action = getattr(target, f"action_{entry}", None)
+        if action is None:
+            logging.log(f"No action_{entry} on {type(target).__name__}")
+            return False
+        # Actions return False to let outer layers handle the key
+        return action() is not False
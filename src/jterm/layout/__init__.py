@@ -1,18 +1,24 @@
 from .position import PositionMode, Position
-from .geometry import Size, Rect
+from .geometry import Size, Rect, Region
 from .size import SizeMode, Sizing
 from .border import Border, BorderStyle, BORDER_CHARS
 from .overflow import Overflow
+from .spacing import Spacing
+from .flex import Direction, FlexItem
 
 __all__ = [
     "PositionMode",
     "Position",
     "Size",
     "Rect",
+    "Region",
     "SizeMode",
     "Sizing",
     "Border",
     "BorderStyle",
     "BORDER_CHARS",
     "Overflow",
+    "Spacing",
+    "Direction",
+    "FlexItem",
 ]
@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import Optional
+from typing import Optional, Union
+from ..color import Color
 
 
 class BorderStyle(Enum):
@@ -23,12 +24,12 @@ BORDER_CHARS = {
 }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BorderSide:
     """Represents one side of a border (like CSS border-top, etc.)"""
 
     style: BorderStyle = BorderStyle.NONE
-    color: str = ""
+    color: Optional[Color] = None
 
     @property
     def width(self) -> int:
@@ -46,8 +47,15 @@ class Border:
     left: BorderSide = field(default_factory=BorderSide)
 
     @classmethod
-    def all(cls, style: BorderStyle = BorderStyle.SOLID, color: str = "") -> "Border":
-        """Create a uniform border on all sides (like CSS `border: 1px solid`)"""
+    def all(
+        cls,
+        style: BorderStyle = BorderStyle.SOLID,
+        color: Union[Color, str, None] = None,
+    ) -> "Border":
+        """Create a uniform border on all sides (like CSS `border: 1px solid`).
+        `color` is a Color or anything Color.parse() takes ("red", "#ff8800")."""
+        if isinstance(color, str):
+            color = Color.parse(color)
         side = BorderSide(style=style, color=color)
         return cls(top=side, right=side, bottom=side, left=side)
 
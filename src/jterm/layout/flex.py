@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import List, Optional, Sequence
+
+
+class Direction(Enum):
+    ROW = auto()  # Children placed left to right - flex-direction: row
+    COLUMN = auto()  # Children placed top to bottom - flex-direction: column
+
+
+@dataclass(frozen=True, slots=True)
+class FlexItem:
+    """Main-axis sizing inputs of one child."""
+
+    basis: int = 0
+    grow: int = 0
+    shrink: int = 0
+    min_value: int = 0
+    max_value: Optional[int] = None
+
+    def clamp(self, size: int) -> int:
+        if self.max_value is not None:
+            size = min(size, self.max_value)
+        return max(size, self.min_value)
+
+
+def _distribute(amount: int, weights: Sequence[int]) -> List[int]:
+    """Split amount proportionally to weights; leftover cells go to the first items."""
+    total = sum(weights)
+    shares = [amount * weight // total for weight in weights]
+    leftover = amount - sum(shares)
+    for index, weight in enumerate(weights):
+        if leftover <= 0:
+            break
+        if weight > 0:
+            shares[index] += 1
+            leftover -= 1
+    return shares
+
+
+def solve(items: Sequence[FlexItem], available: Optional[int]) -> List[int]:
+    """Resolve main-axis sizes for items sharing `available` cells.
+
+    Free space is handed out by grow weight, overflow is taken back by shrink
+    weight scaled by size (like CSS flexbox), and min/max are honored by
+    freezing clamped items and redistributing the rest. With no available
+    size every item keeps its (clamped) basis.
+    """
+    sizes = [item.clamp(item.basis) for item in items]
+    if available is None:
+        return sizes
+
+    free = available - sum(sizes)
+
+    if free > 0:
+        active = [
+            i
+            for i, item in enumerate(items)
+            if item.grow > 0 and (item.max_value is None or sizes[i] < item.max_value)
+        ]
+        while free > 0 and active:
+            shares = _distribute(free, [items[i].grow for i in active])
+            # Items a share would take past their max are frozen there; the
+            # others are sized again from what is left
+            clamped = {
+                i
+                for i, share in zip(active, shares)
+                if items[i].max_value is not None
+                and sizes[i] + share >= items[i].max_value
+            }
+            if not clamped:
+                for i, share in zip(active, shares):
+                    sizes[i] += share
+                break
+            for i in clamped:
+                free -= items[i].max_value - sizes[i]
+                sizes[i] = items[i].max_value
+            active = [i for i in active if i not in clamped]
+
+    elif free < 0:
+        active = [
+            i
+            for i, item in enumerate(items)
+            if item.shrink > 0 and sizes[i] > item.min_value
+        ]
+        while free < 0 and active:
+            weights = [items[i].shrink * sizes[i] for i in active]
+            if not any(weights):
+                break
+            shares = _distribute(-free, weights)
+            clamped = {
+                i
+                for i, share in zip(active, shares)
+                if sizes[i] - share <= items[i].min_value
+            }
+            if not clamped:
+                for i, share in zip(active, shares):
+                    sizes[i] -= share
+                break
+            for i in clamped:
+                free += sizes[i] - items[i].min_value
+                sizes[i] = items[i].min_value
+            active = [i for i in active if i not in clamped]
+
+    return sizes
@@ -1,14 +1,18 @@
 from dataclasses import dataclass
+from typing import Iterable, Iterator, List
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Size:
     width: int = 0
     height: int = 0
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Rect:
+    """Immutable screen rectangle. Operations return existing instances
+    whenever the result is unchanged."""
+
     x: int = 0
     y: int = 0
     width: int = 0
@@ -18,12 +22,128 @@ class Rect:
     def size(self) -> Size:
         return Size(self.width, self.height)
 
+    @property
+    def right(self) -> int:
+        """Exclusive right edge."""
+        return self.x + self.width
+
+    @property
+    def bottom(self) -> int:
+        """Exclusive bottom edge."""
+        return self.y + self.height
+
+    @property
+    def is_empty(self) -> bool:
+        return self.width <= 0 or self.height <= 0
+
     def inset(
         self, top: int = 0, right: int = 0, bottom: int = 0, left: int = 0
     ) -> "Rect":
+        if not (top or right or bottom or left):
+            return self
         return Rect(
             x=self.x + left,
             y=self.y + top,
             width=max(0, self.width - left - right),
             height=max(0, self.height - top - bottom),
         )
+
+    def translate(self, dx: int = 0, dy: int = 0) -> "Rect":
+        if not (dx or dy):
+            return self
+        return Rect(x=self.x + dx, y=self.y + dy, width=self.width, height=self.height)
+
+    def intersects(self, other: "Rect") -> bool:
+        return (
+            self.x < other.right
+            and other.x < self.right
+            and self.y < other.bottom
+            and other.y < self.bottom
+        )
+
+    def contains_rect(self, other: "Rect") -> bool:
+        return (
+            self.x <= other.x
+            and self.y <= other.y
+            and other.right <= self.right
+            and other.bottom <= self.bottom
+        )
+
+    def intersection(self, other: "Rect") -> "Rect":
+        # Reuse an existing instance when one rect already covers the other
+        if self.contains_rect(other):
+            return other
+        if other.contains_rect(self):
+            return self
+        x = max(self.x, other.x)
+        y = max(self.y, other.y)
+        return Rect(
+            x=x,
+            y=y,
+            width=max(0, min(self.right, other.right) - x),
+            height=max(0, min(self.bottom, other.bottom) - y),
+        )
+
+    def union(self, other: "Rect") -> "Rect":
+        """Smallest rect containing both rects."""
+        if self.contains_rect(other):
+            return self
+        if other.contains_rect(self):
+            return other
+        x = min(self.x, other.x)
+        y = min(self.y, other.y)
+        return Rect(
+            x=x,
+            y=y,
+            width=max(self.right, other.right) - x,
+            height=max(self.bottom, other.bottom) - y,
+        )
+
+
+class Region:
+    """Set of screen rects (e.g. damaged areas). Overlapping rects are merged."""
+
+    def __init__(self, rects: Iterable[Rect] = ()):
+        self.rects: List[Rect] = []
+        for rect in rects:
+            self.add(rect)
+
+    def add(self, rect: Rect):
+        if rect.is_empty:
+            return
+
+        merged = True
+        while merged:
+            merged = False
+            for index, other in enumerate(self.rects):
+                if rect.intersects(other):
+                    rect = rect.union(other)
+                    del self.rects[index]
+                    merged = True
+                    break
+        self.rects.append(rect)
+
+    def intersects(self, rect: Rect) -> bool:
+        return any(other.intersects(rect) for other in self.rects)
+
+    @property
+    def bounds(self) -> Rect:
+        """The smallest rect containing the region."""
+        if not self.rects:
+            return Rect()
+        bounds = self.rects[0]
+        for rect in self.rects[1:]:
+            bounds = bounds.union(rect)
+        return bounds
+
+    def clear(self):
+        self.rects.clear()
+
+    def __bool__(self) -> bool:
+        return bool(self.rects)
+
+    def __iter__(self) -> Iterator[Rect]:
+        return iter(self.rects)
+
+    def __repr__(self) -> str:
+        return f"Region({self.rects!r})"
@@ -1,6 +1,7 @@
 from enum import Enum, auto
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from typing import Optional
+from .geometry import Rect, Size
 
 
 class PositionMode(Enum):
@@ -8,10 +9,49 @@ class PositionMode(Enum):
     FIXED = auto()  # Anchored to screen, stays at this screen position
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Position:
     mode: PositionMode = PositionMode.FLOW
     top: Optional[int] = None
     right: Optional[int] = None
     bottom: Optional[int] = None
     left: Optional[int] = None
+
+    # Stacking order of FIXED widgets, higher is drawn on top
+    z_index: int = 0
+
+    @classmethod
+    def fixed(
+        cls,
+        top: Optional[int] = None,
+        right: Optional[int] = None,
+        bottom: Optional[int] = None,
+        left: Optional[int] = None,
+        z_index: int = 0,
+    ) -> "Position":
+        return cls(PositionMode.FIXED, top, right, bottom, left, z_index)
+
+    def resolve(self, size: Size, container: Rect) -> Rect:
+        """Place a widget of `size` inside container using the top/right/bottom/left
+        offsets (like CSS `position: fixed`). Setting both offsets of an axis
+        stretches the widget between them."""
+        x, width = self._resolve_axis(
+            self.left, self.right, size.width, container.x, container.width
+        )
+        y, height = self._resolve_axis(
+            self.top, self.bottom, size.height, container.y, container.height
+        )
+        return Rect(x=x, y=y, width=width, height=height)
+
+    @staticmethod
+    def _resolve_axis(
+        start: Optional[int], end: Optional[int], size: int, origin: int, extent: int
+    ) -> tuple[int, int]:
+        if start is not None and end is not None:
+            return origin + start, max(0, extent - start - end)
+        size = min(size, extent)
+        if start is not None:
+            return origin + start, size
+        if end is not None:
+            return origin + extent - end - size, size
+        return origin, size
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from enum import Enum, auto
+from typing import Optional
 
 
 class SizeMode(Enum):
@@ -8,21 +9,42 @@ class SizeMode(Enum):
     FILL = auto()  # Expand to fill - flex: 1 1 0
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Sizing:
-    """Sizing policy (how a widget should be sized)."""
+    """Sizing policy (how a widget should be sized).
+
+    grow/shrink are flex weights along the parent's main axis; min_value and
+    max_value bound the resolved size.
+    """
 
     value: int = 0
     mode: SizeMode = field(default=SizeMode.AUTO)
+    grow: int = 0
+    shrink: int = 0
+    min_value: int = 0
+    max_value: Optional[int] = None
 
     @classmethod
-    def auto(cls, value: int = 0) -> "Sizing":
-        return cls(value, SizeMode.AUTO)
+    def auto(
+        cls, value: int = 0, min_value: int = 0, max_value: Optional[int] = None
+    ) -> "Sizing":
+        return cls(value, SizeMode.AUTO, 0, 0, min_value, max_value)
 
     @classmethod
     def fixed(cls, value: int) -> "Sizing":
-        return cls(value, SizeMode.FIXED)
+        return cls(value, SizeMode.FIXED, 0, 0, value, value)
 
     @classmethod
-    def fill(cls) -> "Sizing":
-        return cls(0, SizeMode.FILL)
+    def fill(
+        cls,
+        grow: int = 1,
+        shrink: int = 1,
+        min_value: int = 0,
+        max_value: Optional[int] = None,
+    ) -> "Sizing":
+        return cls(0, SizeMode.FILL, grow, shrink, min_value, max_value)
+
+    def clamp(self, size: int) -> int:
+        if self.max_value is not None:
+            size = min(size, self.max_value)
+        return max(size, self.min_value)
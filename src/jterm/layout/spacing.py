@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Spacing:
+    """Space around content on each side (like CSS padding)."""
+
+    top: int = 0
+    right: int = 0
+    bottom: int = 0
+    left: int = 0
+
+    @classmethod
+    def all(cls, value: int) -> "Spacing":
+        return cls(value, value, value, value)
+
+    @classmethod
+    def symmetric(cls, vertical: int = 0, horizontal: int = 0) -> "Spacing":
+        return cls(vertical, horizontal, vertical, horizontal)
+
+    @property
+    def horizontal(self) -> int:
+        """Total horizontal space (left + right)"""
+        return self.left + self.right
+
+    @property
+    def vertical(self) -> int:
+        """Total vertical space (top + bottom)"""
+        return self.top + self.bottom
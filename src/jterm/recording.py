@@ -0,0 +1,248 @@
+"""Session recording and headless replay.
+
+A recording is a compact binary log: a header with the initial terminal size,
+then one record per input event, terminal resize and frame, in the order the
+app applied them. Every record is
+
+    kind (u8) | time (f64) | payload length (u32) | payload
+
+where time is in seconds since the recording started. Replaying feeds the
+recorded input to a fresh app without a terminal, renders a frame wherever
+the recording wrote one and reports how long each frame took, next to how
+far apart the frames were recorded. The encoded output is compared frame
+by frame against a baseline recording, so a recorded session doubles as a
+regression test.
+"""
+
+import statistics
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, BinaryIO, List, Optional, Tuple
+from . import ascii, core
+
+if TYPE_CHECKING:
+    from .app import App
+
+MAGIC = b"JTRM\x03"
+_HEADER = struct.Struct("<HH")
+_RECORD = struct.Struct("<BdI")
+_MOUSE = struct.Struct("<HHB")
+_SIZE = struct.Struct("<HH")
+
+KEY = 1
+MOUSE = 2
+RESIZE = 3
+FRAME = 4
+PASTE = 5
+
+
+@dataclass(frozen=True, slots=True)
+class Record:
+    kind: int
+    # Seconds since the recording started
+    time: float
+    payload: bytes
+
+
+# Payload encodings
+def encode_key(key: ascii.Key) -> bytes:
+    flags = key.is_printable | key.shift << 1 | key.alt << 2 | key.ctrl << 3
+    return bytes([flags]) + key.key.encode("utf-8")
+
+
+def decode_key(payload: bytes) -> ascii.Key:
+    flags = payload[0]
+    return ascii.Key(
+        key=payload[1:].decode("utf-8"),
+        is_printable=bool(flags & 1),
+        shift=bool(flags & 2),
+        alt=bool(flags & 4),
+        ctrl=bool(flags & 8),
+    )
+
+
+def encode_mouse(mouse: ascii.Mouse) -> bytes:
+    flags = (
+        mouse.scroll_up
+        | mouse.scroll_down << 1
+        | mouse.scroll_left << 2
+        | mouse.scroll_right << 3
+    )
+    return _MOUSE.pack(mouse.x, mouse.y, flags)
+
+
+def decode_mouse(payload: bytes) -> ascii.Mouse:
+    x, y, flags = _MOUSE.unpack(payload)
+    return ascii.Mouse(
+        x=x,
+        y=y,
+        scroll_up=bool(flags & 1),
+        scroll_down=bool(flags & 2),
+        scroll_left=bool(flags & 4),
+        scroll_right=bool(flags & 8),
+    )
+
+
+class Recorder:
+    """Appends records to a log file.
+
+    Input is recorded as it is dispatched and frames as they are submitted,
+    both on the event loop, so the log has them in the order they were
+    applied. Frames are encoded against the previous recorded frame, like
+    replay does, rather than taken from the renderer, which drops the
+    frames a slow terminal can't keep up with. The file is buffered; records
+    reach the disk in large writes.
+    """
+
+    def __init__(self, path: str, width: int, height: int):
+        self._file: BinaryIO = open(path, "wb")
+        self._previous: Optional[core.Frame] = None
+        self._start = time.monotonic()
+        self._file.write(MAGIC + _HEADER.pack(width, height))
+
+    def _write(self, kind: int, payload: bytes):
+        if not self._file.closed:
+            header = _RECORD.pack(kind, time.monotonic() - self._start, len(payload))
+            self._file.write(header + payload)
+
+    def key(self, key: ascii.Key):
+        self._write(KEY, encode_key(key))
+
+    def mouse(self, mouse: ascii.Mouse):
+        self._write(MOUSE, encode_mouse(mouse))
+
+    def paste(self, paste: ascii.Paste):
+        self._write(PASTE, paste.text.encode("utf-8"))
+
+    def resize(self, width: int, height: int):
+        self._write(RESIZE, _SIZE.pack(width, height))
+
+    def frame(self, frame: core.Frame):
+        data = core.encode_frame(frame, self._previous).encode("utf-8")
+        self._previous = frame
+        self._write(FRAME, data)
+
+    def close(self):
+        self._file.close()
+
+
+def read_log(path: str) -> Tuple[Tuple[int, int], List[Record]]:
+    """Return the initial (width, height) and the records of a log."""
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a jterm recording")
+    offset = len(MAGIC)
+    width, height = _HEADER.unpack_from(data, offset)
+    offset += _HEADER.size
+
+    records = []
+    while offset + _RECORD.size <= len(data):
+        kind, timestamp, length = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        if offset + length > len(data):
+            # Truncated by a crash: keep what is complete
+            break
+        records.append(Record(kind, timestamp, data[offset : offset + length]))
+        offset += length
+    return (width, height), records
+
+
+def frames(records: List[Record]) -> List[bytes]:
+    return [r.payload for r in records if r.kind == FRAME]
+
+
+# Replay
+@dataclass
+class ReplayReport:
+    # Seconds spent painting (render + snapshot) and encoding each frame
+    render_times: List[float] = field(default_factory=list)
+    encode_times: List[float] = field(default_factory=list)
+    output_bytes: int = 0
+    # Indices of frames whose output differs from the baseline
+    mismatches: List[int] = field(default_factory=list)
+    baseline_frames: int = 0
+    # When each replayed frame was recorded, in seconds since the start
+    recorded_times: List[float] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [f"{len(self.render_times)} frames, {self.output_bytes} bytes written"]
+        intervals = [
+            b - a for a, b in zip(self.recorded_times, self.recorded_times[1:])
+        ]
+        for name, times in (
+            ("render", self.render_times),
+            ("encode", self.encode_times),
+            ("recorded frame interval", intervals),
+        ):
+            if not times:
+                continue
+            ordered = sorted(times)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(
+                f"{name}: mean {statistics.mean(times) * 1000:.2f} ms, "
+                f"p50 {statistics.median(times) * 1000:.2f} ms, "
+                f"p95 {p95 * 1000:.2f} ms, max {ordered[-1] * 1000:.2f} ms"
+            )
+        if self.recorded_times:
+            lines.append(f"recorded over {self.recorded_times[-1]:.2f} s")
+
+        if len(self.render_times) != self.baseline_frames:
+            lines.append(
+                f"frame count differs: {len(self.render_times)} replayed, "
+                f"{self.baseline_frames} in baseline"
+            )
+        if self.mismatches:
+            shown = ", ".join(map(str, self.mismatches[:10]))
+            lines.append(f"{len(self.mismatches)} frames differ from baseline: {shown}")
+        else:
+            lines.append("output matches baseline")
+        return "\n".join(lines)
+
+
+def replay(
+    app: "App", records: List[Record], baseline: Optional[List[bytes]] = None
+) -> ReplayReport:
+    """Feed recorded input to app headlessly, rendering one frame for each
+    recorded frame, and compare the output with `baseline` (by default the
+    frames of the recording itself).
+
+    The app is not run: there is no event loop, so timers and child
+    processes (e.g. `!cmd` messages) don't run during replay. Frame
+    callbacks run before each frame, as they would live.
+    """
+    if baseline is None:
+        baseline = frames(records)
+    report = ReplayReport(baseline_frames=len(baseline))
+
+    app._mount_widget(app.root)
+    previous: Optional[core.Frame] = None
+    for record in records:
+        if record.kind == KEY:
+            app.dispatch_key(decode_key(record.payload))
+        elif record.kind == MOUSE:
+            app.dispatch_mouse(decode_mouse(record.payload))
+        elif record.kind == PASTE:
+            app.dispatch_paste(ascii.Paste(record.payload.decode("utf-8")))
+        elif record.kind == RESIZE:
+            app.resize(*_SIZE.unpack(record.payload))
+        elif record.kind == FRAME:
+            start = time.perf_counter()
+            app.scheduler.run_frame_callbacks()
+            app._paint()
+            frame = app.screen.snapshot()
+            painted = time.perf_counter()
+            data = core.encode_frame(frame, previous).encode("utf-8")
+            encoded = time.perf_counter()
+            previous = frame
+
+            index = len(report.render_times)
+            report.render_times.append(painted - start)
+            report.recorded_times.append(record.time)
+            report.encode_times.append(encoded - painted)
+            report.output_bytes += len(data)
+            if index >= len(baseline) or baseline[index] != data:
+                report.mismatches.append(index)
+    return report
@@ -0,0 +1,163 @@
+import math
+import time
+from typing import Callable, List, Optional
+from . import logging
+
+
+class Timer:
+    """Handle returned by set_timeout/set_interval."""
+
+    __slots__ = ("callback", "interval", "deadline", "cancelled", "_rounds")
+
+    def __init__(
+        self, callback: Callable[[], None], deadline: float, interval: Optional[float]
+    ):
+        self.callback = callback
+        self.deadline = deadline
+        self.interval = interval
+        self.cancelled = False
+        # Full turns of the wheel left before the timer is due
+        self._rounds = 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _run(self):
+        # Cancelled after it came due but before its callback ran
+        if not self.cancelled:
+            self.callback()
+
+
+class Scheduler:
+    """Timers on a hashed timer wheel, plus one-shot frame callbacks.
+
+    Time is cut into ticks of `resolution` seconds and each timer sits in the
+    slot of the tick it is due on, so adding, cancelling and firing a timer
+    are O(1) and advancing only looks at the slots of the elapsed ticks.
+    Timers fire late by up to one tick plus however long the event loop
+    takes to call advance().
+
+    Frame callbacks run once, right before the next frame is painted. Work
+    that only needs doing while something is animating (scroll
+    accumulation, spinners) subscribes per frame instead of being polled on
+    every widget.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.01,
+        slots: int = 512,
+        clock: Callable[[], float] = time.monotonic,
+        dispatch: Optional[Callable[[Callable[[], None]], None]] = None,
+    ):
+        """`dispatch` receives the callbacks of due timers; by default they
+        are called right away from advance()."""
+        self.resolution = resolution
+        self._clock = clock
+        self._dispatch = dispatch
+        self._origin = clock()
+        self._wheel: List[List[Timer]] = [[] for _ in range(slots)]
+        # Last tick processed by advance()
+        self._tick = 0
+        # Timers on the wheel, including cancelled ones not swept yet
+        self._count = 0
+        self._frame_callbacks: List[Callable[[], None]] = []
+
+    # Timers
+    def set_timeout(self, delay: float, callback: Callable[[], None]) -> Timer:
+        timer = Timer(callback, self._clock() + delay, None)
+        self._insert(timer)
+        return timer
+
+    def set_interval(self, interval: float, callback: Callable[[], None]) -> Timer:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        timer = Timer(callback, self._clock() + interval, interval)
+        self._insert(timer)
+        return timer
+
+    def _tick_of(self, when: float) -> int:
+        # The epsilon keeps float noise from pushing a deadline a tick late
+        return math.ceil((when - self._origin) / self.resolution - 1e-9)
+
+    def _insert(self, timer: Timer):
+        slots = len(self._wheel)
+        # Never due on a tick that was already processed
+        due = max(self._tick + 1, self._tick_of(timer.deadline))
+        timer._rounds = (due - self._tick - 1) // slots
+        self._wheel[due % slots].append(timer)
+        self._count += 1
+
+    def advance(self, now: Optional[float] = None):
+        """Fire every timer due by `now` (default: the clock)."""
+        if now is None:
+            now = self._clock()
+        target = int((now - self._origin) / self.resolution)
+        slots = len(self._wheel)
+        while self._tick < target:
+            if not self._count:
+                # Nothing scheduled: skip the idle ticks
+                self._tick = target
+                break
+            self._tick += 1
+            index = self._tick % slots
+            bucket = self._wheel[index]
+            if not bucket:
+                continue
+
+            waiting, due = [], []
+            for timer in bucket:
+                if timer.cancelled:
+                    self._count -= 1
+                elif timer._rounds:
+                    timer._rounds -= 1
+                    waiting.append(timer)
+                else:
+                    self._count -= 1
+                    due.append(timer)
+            self._wheel[index] = waiting
+
+            for timer in due:
+                self._fire(timer, now)
+
+    def _fire(self, timer: Timer, now: float):
+        if self._dispatch is not None:
+            self._dispatch(timer._run)
+        else:
+            try:
+                timer._run()
+            except Exception as e:
+                logging.log(f"Timer callback {timer.callback!r} failed: {e!r}")
+        if timer.interval is not None and not timer.cancelled:
+            # Skip the beats we missed rather than firing them in a burst
+            timer.deadline += timer.interval
+            if timer.deadline <= now:
+                timer.deadline = now + timer.interval
+            self._insert(timer)
+
+    def next_deadline(self) -> Optional[float]:
+        """When the next timer is due, or None without timers. Looks ahead at
+        most one turn of the wheel."""
+        if not self._count:
+            return None
+        slots = len(self._wheel)
+        for tick in range(self._tick + 1, self._tick + slots + 1):
+            for timer in self._wheel[tick % slots]:
+                if not timer.cancelled and not timer._rounds:
+                    return self._origin + tick * self.resolution
+        return self._origin + (self._tick + slots) * self.resolution
+
+    # Frame callbacks
+    def request_frame_callback(self, callback: Callable[[], None]):
+        """Run callback once, before the next frame is painted."""
+        self._frame_callbacks.append(callback)
+
+    @property
+    def has_frame_callbacks(self) -> bool:
+        return bool(self._frame_callbacks)
+
+    def run_frame_callbacks(self):
+        # Callbacks requested while running wait for the following frame
+        callbacks, self._frame_callbacks = self._frame_callbacks, []
+        for callback in callbacks:
+            callback()
@@ -0,0 +1,110 @@
+from typing import Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+K = TypeVar("K")
+
+# Queries shorter than a trigram can't use the index
+_GRAM = 3
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+class SearchIndex(Generic[K]):
+    """Case-insensitive substring search over a growing set of documents.
+
+    Each document is indexed by its trigrams when it is added, so a query
+    only checks documents containing every trigram of the query instead of
+    scanning them all. Search-as-you-type is incremental as well: when a
+    query extends the previous one, only the previous matches (plus
+    documents added since) are checked again.
+
+    `key` is whatever the caller wants back from `search` (e.g. a widget).
+    """
+
+    def __init__(self):
+        # Keys and lowercased texts by document id
+        self._keys: Dict[int, K] = {}
+        self._texts: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._next_id = 0
+
+        # (query, matching ids, next id at the time) of the last search
+        self._last: Optional[Tuple[str, List[int], int]] = None
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def add(self, key: K, text: str) -> int:
+        """Index a document, returning its id for update() and remove()."""
+        doc_id = self._next_id
+        self._next_id += 1
+        self._insert(doc_id, key, text.lower())
+        return doc_id
+
+    def update(self, doc_id: int, text: str):
+        key = self._keys[doc_id]
+        self._delete(doc_id)
+        self._insert(doc_id, key, text.lower())
+        # Matches of the last query may have changed
+        self._last = None
+
+    def remove(self, doc_id: int):
+        self._delete(doc_id)
+        self._last = None
+
+    def _insert(self, doc_id: int, key: K, text: str):
+        self._keys[doc_id] = key
+        self._texts[doc_id] = text
+        for gram in _trigrams(text):
+            postings = self._postings.get(gram)
+            if postings is None:
+                self._postings[gram] = {doc_id}
+            else:
+                postings.add(doc_id)
+
+    def _delete(self, doc_id: int):
+        del self._keys[doc_id]
+        text = self._texts.pop(doc_id)
+        for gram in _trigrams(text):
+            postings = self._postings[gram]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[gram]
+
+    def _candidates(self, query: str) -> List[int]:
+        last = self._last
+        if last is not None and last[0] in query:
+            # Anything matching the longer query matched the shorter one
+            _, ids, next_id = last
+            added = range(next_id, self._next_id)
+            return ids + [i for i in added if i in self._texts]
+
+        if len(query) < _GRAM:
+            return list(self._texts)
+
+        postings = []
+        for gram in _trigrams(query):
+            ids = self._postings.get(gram)
+            if ids is None:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        return sorted(postings[0].intersection(*postings[1:]))
+
+    def search(self, query: str) -> List[K]:
+        """Keys of the documents containing query, oldest first."""
+        query = query.lower()
+        if not query:
+            self._last = None
+            return []
+
+        texts = self._texts
+        ids = [i for i in self._candidates(query) if query in texts[i]]
+        self._last = (query, ids, self._next_id)
+        return list(map(self._keys.__getitem__, ids))
+
+    def matches(self, doc_id: int, query: str) -> bool:
+        """Whether the document contains query, without a search."""
+        text = self._texts.get(doc_id)
+        return text is not None and query.lower() in text
@@ -0,0 +1,342 @@
+"""Detachable sessions.
+
+`jterm serve` runs the app headless in a background process that listens on
+a Unix socket, and `jterm attach` connects the current terminal to it. The
+session outlives the connection: dropping an SSH link only detaches the
+client.
+
+Both sides exchange length-prefixed messages
+
+    kind (u8) | payload length (u32) | payload
+
+The client says HELLO with its terminal size, then streams raw INPUT bytes
+and RESIZE messages. The server answers with one FRAME holding the whole
+screen, then only the escape sequences of what changed, optionally zlib
+compressed as one stream. Only one client is attached at a time; attaching
+again detaches the previous one.
+"""
+
+import asyncio
+import functools
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import zlib
+from dataclasses import replace
+from typing import TYPE_CHECKING, Optional, Set, Tuple
+from . import ascii, capabilities, commands, core, logging
+
+if TYPE_CHECKING:
+    from .app import App
+
+_MESSAGE = struct.Struct("<BI")
+_HELLO = struct.Struct("<HHB")
+_SIZE = struct.Struct("<HH")
+
+# Client to server
+HELLO = 1
+INPUT = 2
+RESIZE = 3
+# Server to client
+FRAME = 4
+EXIT = 5
+DETACHED = 6
+
+# HELLO flags
+COMPRESS = 1
+TRUECOLOR = 2
+ANSI256 = 4
+
+# Clients that have this many bytes unsent skip frames until they catch up,
+# then get a fresh snapshot
+MAX_BACKLOG = 1 << 20
+
+# ctrl+\ detaches, as a plain control character and as a kitty key report
+DETACH_KEYS = (b"\x1c", b"\x1b[92;5u")
+
+
+def default_socket_path() -> str:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    directory = (
+        os.path.join(runtime, "jterm") if runtime else f"/tmp/jterm-{os.getuid()}"
+    )
+    return os.path.join(directory, "session.sock")
+
+
+def secure_directory(directory: str, create: bool = True):
+    """Create the socket's directory, or make sure an existing one is only
+    ours: in /tmp another user could have created it first, to replace the
+    socket and read what the client types."""
+    if create:
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or stat.S_IMODE(info.st_mode) & 0o077
+    ):
+        raise PermissionError(
+            f"{directory} must be a directory owned by the current user with mode 0700"
+        )
+
+
+def pack_message(kind: int, payload: bytes = b"") -> bytes:
+    return _MESSAGE.pack(kind, len(payload)) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[Tuple[int, bytes]]:
+    """The next (kind, payload), or None once the connection is closed."""
+    try:
+        kind, length = _MESSAGE.unpack(await reader.readexactly(_MESSAGE.size))
+        return kind, await reader.readexactly(length)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+
+
+def is_running(path: str) -> bool:
+    """Whether a session server is listening on path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+    return True
+
+
+# Server
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter, compress: bool):
+        self.writer = writer
+        self._compressor = zlib.compressobj() if compress else None
+        # Frames were skipped, the next one must be a full snapshot
+        self.stale = False
+
+    @property
+    def backlog(self) -> int:
+        return self.writer.transport.get_write_buffer_size()
+
+    def send(self, kind: int, payload: bytes = b""):
+        if kind == FRAME and self._compressor is not None:
+            # One stream for the whole connection: later frames reuse the
+            # dictionary of earlier ones
+            payload = self._compressor.compress(payload) + self._compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+        self.writer.write(pack_message(kind, payload))
+
+    def close(self):
+        self.writer.close()
+
+
+class SessionServer:
+    """Runs an app headless and serves its frames to an attached client."""
+
+    def __init__(self, app: "App", path: str):
+        self.app = app
+        self.path = path
+        self._client: Optional[_Client] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._catch_up_task: Optional[asyncio.Task] = None
+        # Connection handlers, waited for on shutdown
+        self._connections: Set[asyncio.Task] = set()
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        secure_directory(os.path.dirname(self.path) or ".")
+        if os.path.lexists(self.path):
+            # Left behind by a server that died
+            os.unlink(self.path)
+        # The socket is created without access for others, rather than
+        # restricted after it is already listening
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.path)
+        finally:
+            os.umask(umask)
+
+        self._loop.add_signal_handler(signal.SIGTERM, self.app.exit)
+        try:
+            await self.app.run_headless(self._on_frame)
+        finally:
+            self._loop.remove_signal_handler(signal.SIGTERM)
+            server.close()
+            client, self._client = self._client, None
+            if client is not None:
+                client.send(EXIT)
+                client.close()
+            # Closing the connections ends their handlers
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def _on_frame(self, data: bytes):
+        # Renderer thread
+        self._loop.call_soon_threadsafe(self._send_frame, data)
+
+    def _send_frame(self, data: bytes):
+        client = self._client
+        if client is None or client.stale:
+            return
+        if client.backlog > MAX_BACKLOG:
+            # Slow link: skip frames until it drains, then send the screen
+            # as it is by then
+            client.stale = True
+            self._catch_up_task = asyncio.ensure_future(self._catch_up(client))
+        else:
+            client.send(FRAME, data)
+
+    async def _catch_up(self, client: _Client):
+        try:
+            await client.writer.drain()
+        except ConnectionError:
+            return
+        if self._client is client:
+            self._send_snapshot(client)
+
+    def _send_snapshot(self, client: _Client):
+        client.stale = False
+        frame = self.app.screen.snapshot()
+        client.send(FRAME, core.encode_frame(frame).encode("utf-8"))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            await self._serve_client(reader, writer)
+        finally:
+            self._connections.discard(task)
+
+    async def _serve_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        message = await read_message(reader)
+        if message is None or message[0] != HELLO:
+            writer.close()
+            return
+        width, height, flags = _HELLO.unpack(message[1])
+
+        if self._client is not None:
+            self._client.send(DETACHED)
+            self._client.close()
+        client = self._client = _Client(writer, bool(flags & COMPRESS))
+        logging.log(f"Client attached at {width}x{height}")
+        # Render colors for the attached terminal
+        self.app.set_capabilities(
+            replace(
+                self.app.capabilities,
+                truecolor=bool(flags & TRUECOLOR),
+                ansi256=bool(flags & ANSI256),
+            )
+        )
+
+        if (width, height) != (self.app.width, self.app.height):
+            # The resize repaints everything, which is the snapshot
+            self.app.post_input(functools.partial(self.app.resize, width, height))
+        else:
+            self._send_snapshot(client)
+
+        # Each connection gets its own parser, so a sequence cut off by a
+        # dropped link never leaks into the next one
+        parser = ascii.InputParser()
+        try:
+            while self._client is client:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                kind, payload = message
+                if kind == INPUT:
+                    for event in parser.feed(payload):
+                        self.app.post_input(event)
+                elif kind == RESIZE:
+                    resize = functools.partial(self.app.resize, *_SIZE.unpack(payload))
+                    self.app.post_input(resize)
+        finally:
+            if self._client is client:
+                self._client = None
+                logging.log("Client detached")
+            client.close()
+
+
+async def serve(app: "App", path: str):
+    await SessionServer(app, path).run()
+
+
+def daemonize():
+    """Detach from the controlling terminal, so the session survives the
+    shell (or SSH connection) that started it."""
+    if os.fork():
+        os._exit(0)
+    os.setsid()
+    if os.fork():
+        os._exit(0)
+
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+
+
+# Client
+async def attach(path: str, compress: bool = False) -> str:
+    """Show the session served on path in this terminal until it ends or
+    the user detaches. Returns why the client stopped."""
+    secure_directory(os.path.dirname(path) or ".", create=False)
+    reader, writer = await asyncio.open_unix_connection(path)
+    fd = sys.stdin.fileno()
+    terminal = capabilities.detect(fd)
+    width, height = commands.terminal_size()
+    flags = COMPRESS if compress else 0
+    if terminal.truecolor:
+        flags |= TRUECOLOR
+    if terminal.ansi256:
+        flags |= ANSI256
+    writer.write(pack_message(HELLO, _HELLO.pack(width, height, flags)))
+    decompressor = zlib.decompressobj() if compress else None
+
+    loop = asyncio.get_running_loop()
+    reason = "connection lost"
+
+    def read_input():
+        nonlocal reason
+        data = os.read(fd, 65536)
+        # End of input (e.g. the terminal went away) detaches too
+        if not data or any(key in data for key in DETACH_KEYS):
+            reason = "detached"
+            loop.remove_reader(fd)
+            writer.close()
+            return
+        writer.write(pack_message(INPUT, data))
+
+    def resize():
+        writer.write(pack_message(RESIZE, _SIZE.pack(*commands.terminal_size())))
+
+    settings = commands.start_terminal(fd, terminal)
+    loop.add_reader(fd, read_input)
+    loop.add_signal_handler(signal.SIGWINCH, resize)
+    try:
+        while (message := await read_message(reader)) is not None:
+            kind, payload = message
+            if kind == FRAME:
+                if decompressor is not None:
+                    payload = decompressor.decompress(payload)
+                if terminal.synchronized_output:
+                    payload = core.SYNC_BEGIN + payload + core.SYNC_END
+                core.write_stdout(payload)
+            elif kind == EXIT:
+                reason = "session ended"
+                break
+            elif kind == DETACHED:
+                reason = "attached from elsewhere"
+                break
+    finally:
+        loop.remove_reader(fd)
+        loop.remove_signal_handler(signal.SIGWINCH)
+        commands.stop_terminal(fd, settings, terminal)
+        writer.close()
+    return reason
@@ -0,0 +1,268 @@
+"""CSS-like stylesheets.
+
+    Input { border: rounded; }
+    #messages > Text.error { color: red; }
+    .muted, SearchBar { color: bright_black; scrollbar-color: gray; }
+
+Selectors are chains of compound selectors (a widget type, `#id` and
+`.class`es, or `*`) joined by descendant (space) and child (`>`)
+combinators. A type matches its subclasses too. Among the rules matching
+a widget the most specific wins (ids, then classes, then types), and the
+later one on a tie; inline values (e.g. `border=` passed to the widget)
+win over the sheet.
+
+Rules are indexed by the rightmost compound of their selector, under its
+id, else its first class, else its type. Styling a widget only tests the
+rules filed under its own id, classes and types, and walks up the tree
+only for those. The app computes a widget's style when it is mounted and
+again only when it moves or its (or an ancestor's) classes change, never
+per frame.
+"""
+
+import re
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, TYPE_CHECKING
+from .color import Color
+from .layout import BorderStyle, Spacing
+
+if TYPE_CHECKING:
+    from .widgets import Widget
+
+
+@dataclass(frozen=True, slots=True)
+class ComputedStyle:
+    """A widget's resolved style; None where no rule sets a property."""
+
+    color: Optional[Color] = None
+    border: Optional[BorderStyle] = None
+    border_color: Optional[Color] = None
+    padding: Optional[Spacing] = None
+    scrollbar_color: Optional[Color] = None
+    scrollbar_track_color: Optional[Color] = None
+
+
+EMPTY = ComputedStyle()
+
+# Properties a widget inherits from its parent unless a rule sets them
+INHERITED = ("color",)
+
+
+@dataclass(frozen=True, slots=True)
+class Compound:
+    """One step of a selector, e.g. `Text#title.muted`."""
+
+    type: Optional[str] = None
+    id: Optional[str] = None
+    classes: FrozenSet[str] = frozenset()
+
+    def matches(self, widget: "Widget") -> bool:
+        if self.id is not None and widget.id != self.id:
+            return False
+        if self.classes and not self.classes <= widget.classes:
+            return False
+        return self.type is None or self.type in type_names(type(widget))
+
+
+@dataclass(frozen=True, slots=True)
+class Selector:
+    # Compounds from left to right, and the combinator before each but the
+    # first: " " (descendant) or ">" (child)
+    compounds: Tuple[Compound, ...]
+    combinators: Tuple[str, ...]
+
+    @property
+    def specificity(self) -> Tuple[int, int, int]:
+        ids = sum(c.id is not None for c in self.compounds)
+        classes = sum(len(c.classes) for c in self.compounds)
+        types = sum(c.type is not None for c in self.compounds)
+        return ids, classes, types
+
+    @property
+    def key(self) -> str:
+        """The index key of the rightmost compound."""
+        last = self.compounds[-1]
+        if last.id is not None:
+            return f"#{last.id}"
+        if last.classes:
+            return f".{min(last.classes)}"
+        if last.type is not None:
+            return last.type
+        return "*"
+
+    def matches(self, widget: "Widget") -> bool:
+        if not self.compounds[-1].matches(widget):
+            return False
+        return self._match_ancestors(len(self.compounds) - 2, widget)
+
+    def _match_ancestors(self, index: int, widget: "Widget") -> bool:
+        """Whether compounds[:index + 1] match the ancestors of widget."""
+        if index < 0:
+            return True
+        compound = self.compounds[index]
+        ancestor = widget._parent
+        if self.combinators[index] == ">":
+            return (
+                ancestor is not None
+                and compound.matches(ancestor)
+                and self._match_ancestors(index - 1, ancestor)
+            )
+        while ancestor is not None:
+            if compound.matches(ancestor) and self._match_ancestors(
+                index - 1, ancestor
+            ):
+                return True
+            ancestor = ancestor._parent
+        return False
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    selector: Selector
+    declarations: Tuple[Tuple[str, Any], ...]
+    # Position in the sheet, the tie breaker between equal specificities
+    order: int
+
+
+@lru_cache(maxsize=None)
+def type_names(cls: type) -> FrozenSet[str]:
+    """Names a type selector can match a widget class by: its own and its
+    bases'."""
+    return frozenset(base.__name__ for base in cls.__mro__ if base is not object)
+
+
+class Stylesheet:
+    def __init__(self, source: str = ""):
+        self.rules: List[Rule] = []
+        # Rules by the key of their rightmost compound
+        self._index: Dict[str, List[Rule]] = {}
+        if source:
+            self.add(source)
+
+    def add(self, source: str):
+        """Parse rules and add them after the existing ones."""
+        source = re.sub(r"/\*.*?\*/", "", source, flags=re.DOTALL)
+        position = 0
+        for match in _RULE.finditer(source):
+            if source[position : match.start()].strip():
+                break
+            position = match.end()
+            declarations = parse_declarations(match.group(2))
+            for text in match.group(1).split(","):
+                rule = Rule(parse_selector(text), declarations, len(self.rules))
+                self.rules.append(rule)
+                self._index.setdefault(rule.selector.key, []).append(rule)
+        rest = source[position:].strip()
+        if rest:
+            raise ValueError(f"Invalid rule: {rest[:40]!r}")
+
+    def candidates(self, widget: "Widget") -> List[Rule]:
+        """Rules whose rightmost compound may match widget."""
+        index = self._index
+        rules = list(index.get(f"#{widget.id}", ()))
+        for name in widget.classes:
+            rules.extend(index.get(f".{name}", ()))
+        for name in type_names(type(widget)):
+            rules.extend(index.get(name, ()))
+        rules.extend(index.get("*", ()))
+        return rules
+
+    def compute(self, widget: "Widget", parent: ComputedStyle = EMPTY) -> ComputedStyle:
+        """The style of widget, whose parent's style is `parent`."""
+        matched = [
+            rule for rule in self.candidates(widget) if rule.selector.matches(widget)
+        ]
+        matched.sort(key=lambda rule: (rule.selector.specificity, rule.order))
+        values: Dict[str, Any] = {
+            name: getattr(parent, name)
+            for name in INHERITED
+            if getattr(parent, name) is not None
+        }
+        for rule in matched:
+            values.update(rule.declarations)
+        return _computed(tuple(sorted(values.items())))
+
+
+@lru_cache(maxsize=1024)
+def _computed(values: Tuple[Tuple[str, Any], ...]) -> ComputedStyle:
+    # Widgets styled alike share one instance
+    return ComputedStyle(**dict(values))
+
+
+# Parsing
+_RULE = re.compile(r"([^{}]*)\{([^{}]*)\}")
+_COMPOUND = re.compile(r"(\*|[A-Za-z_][\w-]*)?((?:[#.][\w-]+)*)$")
+_PROPERTIES = {f.name.replace("_", "-") for f in fields(ComputedStyle)}
+
+
+def parse_selector(text: str) -> Selector:
+    tokens = re.sub(r"\s*>\s*", " > ", text.strip()).split()
+    compounds: List[Compound] = []
+    combinators: List[str] = []
+    combinator = " "
+    for token in tokens:
+        if token == ">":
+            if not compounds or combinator == ">":
+                raise ValueError(f"Invalid selector {text.strip()!r}")
+            combinator = ">"
+            continue
+        match = _COMPOUND.match(token)
+        if match is None:
+            raise ValueError(f"Invalid selector {text.strip()!r}")
+        name, rest = match.groups()
+        parts = re.findall(r"[#.][\w-]+", rest)
+        ids = [part[1:] for part in parts if part[0] == "#"]
+        if len(ids) > 1:
+            raise ValueError(f"Invalid selector {text.strip()!r}")
+        if compounds:
+            combinators.append(combinator)
+        compounds.append(
+            Compound(
+                type=None if name in (None, "*") else name,
+                id=ids[0] if ids else None,
+                classes=frozenset(part[1:] for part in parts if part[0] == "."),
+            )
+        )
+        combinator = " "
+    if not compounds or combinator == ">":
+        raise ValueError(f"Invalid selector {text.strip()!r}")
+    return Selector(tuple(compounds), tuple(combinators))
+
+
+def parse_declarations(text: str) -> Tuple[Tuple[str, Any], ...]:
+    declarations: Dict[str, Any] = {}
+    for declaration in text.split(";"):
+        if not declaration.strip():
+            continue
+        name, colon, value = declaration.partition(":")
+        name, value = name.strip().lower(), value.strip()
+        if not colon or name not in _PROPERTIES:
+            raise ValueError(f"Unknown style property {name!r}")
+        declarations.update(_parse_value(name, value))
+    return tuple(declarations.items())
+
+
+def _parse_value(name: str, value: str) -> Dict[str, Any]:
+    if name == "border":
+        # A style name, optionally followed by a color: "rounded red"
+        style, _, color = value.partition(" ")
+        try:
+            parsed = {"border": BorderStyle[style.upper()]}
+        except KeyError:
+            raise ValueError(f"Unknown border style {style!r}") from None
+        if color.strip():
+            parsed["border_color"] = Color.parse(color)
+        return parsed
+    if name == "padding":
+        # 1 to 4 values, in CSS order
+        try:
+            values = [int(v) for v in value.split()]
+        except ValueError:
+            raise ValueError(f"Invalid padding {value!r}") from None
+        if not 1 <= len(values) <= 4:
+            raise ValueError(f"Invalid padding {value!r}")
+        top, right, bottom, left = (values * 4)[:4]
+        if len(values) == 3:
+            left = right
+        return {"padding": Spacing(top, right, bottom, left)}
+    return {name.replace("-", "_"): Color.parse(value)}
@@ -0,0 +1,168 @@
+from typing import Dict, List, Optional, Tuple
+from . import app, layout, logging, search
+from .history import History
+from .keymap import Binding
+from .widgets import Container, Text, Input, ProcessOutput, SearchBar, Widget
+from .messages import on
+
+
+class JTERM(app.App):
+    BINDINGS = [Binding("ctrl+f", "search", "Search the transcript")]
+    STYLESHEET = """
+    Input { border: rounded; }
+    """
+
+    def __init__(
+        self,
+        dev: bool = False,
+        size: Optional[Tuple[int, int]] = None,
+        record: Optional[str] = None,
+        history: Optional[str] = None,
+    ):
+        """`history` is the path of the input history file; without one,
+        inputs aren't recorded or recalled."""
+        root = Container(
+            id="root",
+            height=layout.Sizing.fill(),
+            children=[
+                Container(
+                    id="messages",
+                    height=layout.Sizing.fill(),
+                    overflow_y=layout.Overflow.AUTO,
+                    children=[
+                        Text(
+                            id="welcome_header",
+                            content="Welcome to JTerm",
+                        ),
+                    ],
+                ),
+                Input(
+                    id="input",
+                    focused=True,
+                    height=layout.Sizing.auto(),
+                    history=History(history) if history else None,
+                ),
+            ],
+        )
+        super().__init__(root, dev, size=size, record=record)
+
+        # Transcript messages, indexed as they are appended
+        self._search_index: search.SearchIndex[Widget] = search.SearchIndex()
+        # Document id of each indexed widget, by the widget's id()
+        self._search_docs: Dict[int, int] = {}
+        welcome = self.query_one("#welcome_header")
+        self._index(welcome, welcome.content)
+        self._search_bar: SearchBar | None = None
+        # The matches of the search and the query they matched
+        self._search_matches: List[Widget] = []
+        self._search_query = ""
+        self._search_position = -1
+        self._search_current: Widget | None = None
+
+    @on(Input.Submitted)
+    def on_input_submitted(self, message: Input.Submitted):
+        messages_container = self.query_one("#messages")
+
+        if messages_container is None:
+            logging.log("Failed to find messages container")
+        else:
+            message_count = len(messages_container.children)
+            if message.value.startswith("!"):
+                # "!cmd" runs a shell command and streams its output
+                child = ProcessOutput(
+                    id=f"msg-{message_count + 1}",
+                    command=message.value[1:],
+                )
+            else:
+                child = Text(
+                    id=f"msg-{message_count + 1}",
+                    content=f"{message.value}",
+                    height=layout.Sizing.auto(),
+                )
+            self.mount(parent=messages_container, child=child)
+            if isinstance(child, Text):
+                self._index(child, child.content)
+            logging.log("added new child: ", messages_container.children)
+            self.mark_dirty()
+
+    @on(ProcessOutput.Finished)
+    def on_process_output_finished(self, message: ProcessOutput.Finished):
+        # Output is only searchable once the command is done streaming it
+        self._index(message.sender, message.sender.text)
+
+    def _index(self, widget: Widget, text: str):
+        self._search_docs[id(widget)] = self._search_index.add(widget, text)
+
+    # Search
+    def action_search(self):
+        if self._search_bar is not None:
+            return
+
+        self._search_bar = SearchBar(
+            id="search",
+            focused=True,
+            height=layout.Sizing.auto(),
+            # Covers the input box while searching
+            position=layout.Position.fixed(bottom=0, left=0, right=0, z_index=1),
+        )
+        # Mounting a focused widget moves focus to it
+        self.mount(parent=self.root, child=self._search_bar)
+
+    @on(SearchBar.Closed)
+    def on_search_bar_closed(self, message: SearchBar.Closed):
+        self._set_search_matches([], "")
+        self.unmount(self._search_bar)
+        self._search_bar = None
+        self.focus.focus(self.query_one("#input"))
+
+    @on(SearchBar.Changed)
+    def on_search_bar_changed(self, message: SearchBar.Changed):
+        matches = self._search_index.search(message.value)
+        self._set_search_matches(matches, message.value)
+        # Start from the most recent match
+        self._search_position = len(self._search_matches) - 1
+        self._show_current_match()
+
+    @on(SearchBar.Navigate)
+    def on_search_bar_navigate(self, message: SearchBar.Navigate):
+        if not self._search_matches:
+            return
+        position = self._search_position + message.direction
+        self._search_position = max(0, min(position, len(self._search_matches) - 1))
+        self._show_current_match()
+
+    def search_highlight(self, widget: Widget) -> Optional[Tuple[str, bool]]:
+        doc_id = self._search_docs.get(id(widget))
+        if doc_id is None or not self._search_query:
+            return None
+        if self._search_index.matches(doc_id, self._search_query):
+            return self._search_query, widget is self._search_current
+        return None
+
+    def _set_search_matches(self, matches: List[Widget], query: str):
+        """Move the highlight from the previous matches to the new ones. Matches
+        look their highlight up when drawn, so none of them is visited here."""
+        self._search_matches = matches
+        self._search_query = query
+        self._search_position = -1
+        self._search_current = None
+        self.query_one("#messages").refresh()
+
+    def _show_current_match(self):
+        """Scroll the transcript so the current match is in view."""
+        messages_container = self.query_one("#messages")
+        if self._search_position < 0:
+            return
+
+        widget = self._search_matches[self._search_position]
+        self._search_current = widget
+
+        line = 0
+        if isinstance(widget, Text):
+            line = widget.find_line(self._search_query) or 0
+
+        # Child rects are laid out at their natural (unscrolled) position
+        top = widget.content_rect.y - messages_container.content_rect.y
+        # Keep a couple of lines of context above the match
+        messages_container.scroll_to(top + line - 2)
+        messages_container.refresh()
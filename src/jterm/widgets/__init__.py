@@ -1,6 +1,48 @@
-from .widget import Widget
-from .input import Input
-from .text import Text
-from .container import Container
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["Widget", "Text", "Input", "Container"]
+if TYPE_CHECKING:
+    from .widget import Widget
+    from .input import Input
+    from .text import Text
+    from .container import Container
+    from .process_output import ProcessOutput
+    from .search_bar import SearchBar
+    from .markdown import Markdown
+    from .table import Table
+
+# Widget classes are loaded on first access, keyed by the submodule defining them
+_LAZY = {
+    "Widget": ".widget",
+    "Input": ".input",
+    "Text": ".text",
+    "Container": ".container",
+    "ProcessOutput": ".process_output",
+    "SearchBar": ".search_bar",
+    "Markdown": ".markdown",
+    "Table": ".table",
+}
+
+__all__ = [
+    "Widget",
+    "Text",
+    "Input",
+    "Container",
+    "ProcessOutput",
+    "SearchBar",
+    "Markdown",
+    "Table",
+]
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,82 +1,162 @@
-from dataclasses import dataclass
+import bisect
+from dataclasses import dataclass, field
+from typing import List
 from . import widget
-from .. import logging, layout
-from ..layout import Rect, SizeMode, Size, Overflow
+from .. import core
+from ..layout import (
+    Rect,
+    SizeMode,
+    Sizing,
+    Size,
+    Overflow,
+    Direction,
+    FlexItem,
+    flex,
+)
 
 
 @dataclass
 class Container(widget.Widget):
-    """Note: This will map to a "div" in web UI"""
+    """Note: This will map to a "div" in web UI
+
+    Children are placed along `direction` with `gap` cells between them and
+    sized by a flexbox-style solver (see layout.flex). Measuring resolves every
+    child's main-axis size once; layout() only positions children.
+    """
+
+    direction: Direction = Direction.COLUMN
+    gap: int = 0
+
+    # In-flow children and their main-axis sizes resolved by the last
+    # measure(), reused by layout(). FIXED children are placed by the app.
+    _flow_children: List[widget.Widget] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _flex_sizes: List[int] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    # Children drawn by the last render, to forget the ones scrolled out
+    _drawn: List[widget.Widget] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    # Natural size of the children (before clipping to the container's own size)
+    _natural_size: Size = field(
+        default_factory=Size, init=False, repr=False, compare=False
+    )
+
+    @property
+    def _total_content_height(self) -> int:
+        return self._natural_size.height
+
+    @property
+    def _total_content_width(self) -> int:
+        return self._natural_size.width
+
+    def _flex_item(self, child: widget.Widget, basis: int) -> FlexItem:
+        sizing = child.width if self.direction == Direction.ROW else child.height
+        return FlexItem(
+            basis=basis,
+            grow=sizing.grow,
+            shrink=sizing.shrink,
+            min_value=sizing.min_value,
+            max_value=sizing.max_value,
+        )
+
+    def _own_content_size(
+        self, sizing: Sizing, available: int | None, chrome: int
+    ) -> int | None:
+        """Content size along one axis if the sizing policy fixes it up front."""
+        if sizing.mode == SizeMode.FIXED:
+            return max(0, sizing.value - chrome)
+        return available
 
     def _calculate_dimensions(
         self, available_width: int | None, available_height: int | None
     ) -> Size:
-        """Returns CONTENT dimensions only (no borders).
+        """Returns CONTENT dimensions only (no borders or padding).
 
-        Note: available_width/height are already CONTENT space (borders subtracted by parent).
+        Note: available_width/height are already CONTENT space (chrome subtracted by parent).
         """
-        # For scrollable containers, measure children with UNCONSTRAINED height
-        measure_height = (
-            None if self.overflow_y != Overflow.VISIBLE else available_height
+        row = self.direction == Direction.ROW
+        width_limit = self._own_content_size(
+            self.width, available_width, self._chrome_width
+        )
+        height_limit = self._own_content_size(
+            self.height, available_height, self._chrome_height
+        )
+        main_limit, cross_limit = (
+            (width_limit, height_limit) if row else (height_limit, width_limit)
         )
 
-        # Two-pass sizing for FILL children
-        auto_fixed_height = 0
-        fill_count = 0
-        max_child_width = 0
-
-        for child in self.children:
-            if child.height.mode == SizeMode.FILL:
-                fill_count += 1
+        # Children may be as wide (tall) as they like when we scroll on the cross axis
+        cross_overflow = self.overflow_y if row else self.overflow_x
+        child_cross_limit = None if cross_overflow != Overflow.VISIBLE else cross_limit
+
+        def measure_child(child: widget.Widget, main: int | None) -> Size:
+            if row:
+                return child.measure(main, child_cross_limit)
+            return child.measure(child_cross_limit, main)
+
+        # Flex basis: FIXED uses its value, AUTO its measured size, FILL starts at 0
+        flow_children = [c for c in self.children if not c.is_overlay]
+        items = []
+        measured_main = []
+        for child in flow_children:
+            sizing = child.width if row else child.height
+            if sizing.mode == SizeMode.AUTO:
+                size = measure_child(child, None)
+                basis = size.width if row else size.height
+                measured_main.append(basis)
             else:
-                # measure() returns TOTAL size, content_size is stored
-                child.measure(available_width, None)
-                # Use TOTAL height for layout positioning (child occupies this space)
-                auto_fixed_height += (
-                    child.content_size.height + child.border.vertical_space
-                )
-                max_child_width = max(
-                    max_child_width,
-                    child.content_size.width + child.border.horizontal_space,
-                )
-
-        # Calculate height per FILL child
-        if measure_height is not None and fill_count > 0:
-            remaining = max(0, measure_height - auto_fixed_height)
-            height_per_fill = remaining // fill_count
+                basis = sizing.value if sizing.mode == SizeMode.FIXED else 0
+                measured_main.append(None)
+            items.append(self._flex_item(child, basis))
+
+        # Scrollable containers let children overflow instead of shrinking them
+        scrollable = (self.overflow_x if row else self.overflow_y) != Overflow.VISIBLE
+        free_space = None
+        if main_limit is not None:
+            free_space = max(0, main_limit - self.gap * max(0, len(items) - 1))
+            if scrollable:
+                items = [
+                    FlexItem(i.basis, i.grow, 0, i.min_value, i.max_value)
+                    for i in items
+                ]
+        sizes = flex.solve(items, free_space)
+
+        # Measure children whose final size differs from what they were measured at
+        max_cross = 0
+        for child, size, measured in zip(flow_children, sizes, measured_main):
+            if measured != size:
+                measure_child(child, size)
+            total = child.measured_size
+            max_cross = max(max_cross, total.height if row else total.width)
+
+        self._flow_children = flow_children
+        self._flex_sizes = sizes
+        main_total = sum(sizes) + self.gap * max(0, len(sizes) - 1)
+        if row:
+            self._natural_size = Size(width=main_total, height=max_cross)
         else:
-            height_per_fill = 0
-
-        # Measure FILL children
-        total_height = auto_fixed_height
-        for child in self.children:
-            if child.height.mode == SizeMode.FILL:
-                child.measure(available_width, height_per_fill)
-                total_height += child.content_size.height + child.border.vertical_space
-                max_child_width = max(
-                    max_child_width,
-                    child.content_size.width + child.border.horizontal_space,
-                )
-
-        # Store CONTENT size (sum of children's outer sizes, but this IS our content)
-        self.content_size = Size(width=max_child_width, height=total_height)
+            self._natural_size = Size(width=max_cross, height=main_total)
 
         # Apply sizing policy to determine final content dimensions
+        natural = self._natural_size
         if self.width.mode == SizeMode.FILL:
-            width = available_width if available_width else max_child_width
+            width = available_width if available_width else natural.width
         elif self.width.mode == SizeMode.FIXED:
-            width = max(0, self.width.value - self.border.horizontal_space)
+            width = width_limit
         else:  # AUTO
-            width = max_child_width
+            width = natural.width
             if available_width:
                 width = min(width, available_width)
 
         if self.height.mode == SizeMode.FILL:
-            height = available_height if available_height else total_height
+            height = available_height if available_height else natural.height
         elif self.height.mode == SizeMode.FIXED:
-            height = max(0, self.height.value - self.border.vertical_space)
+            height = height_limit
         else:  # AUTO
-            height = total_height
+            height = natural.height
             if available_height:
                 height = min(height, available_height)
 
@@ -86,59 +166,75 @@ class Container(widget.Widget):
         """Layout children at their NATURAL positions - no scroll offset here!"""
         self.rect = rect
         content = self.content_rect
+        row = self.direction == Direction.ROW
 
-        # Calculate FILL heights
-        auto_fixed_height = sum(
-            c.content_size.height + c.border.vertical_space
-            for c in self.children
-            if c.height.mode != SizeMode.FILL
-        )
-        fill_count = sum(1 for c in self.children if c.height.mode == SizeMode.FILL)
-
-        if fill_count > 0:
-            remaining = max(0, content.height - auto_fixed_height)
-            base_fill = remaining // fill_count
-            extra = remaining % fill_count
-        else:
-            base_fill = 0
-            extra = 0
-
-        # Layout children at natural positions (0, 1, 2, ... from top)
-        y = 0
-        fill_idx = 0
-        for child in self.children:
-            if child.height.mode == SizeMode.FILL:
-                h = base_fill + (1 if fill_idx < extra else 0)
-                fill_idx += 1
-            else:
-                h = child.content_size.height + child.border.vertical_space
-
+        # Place children along the main axis using the sizes from measure()
+        offset = 0
+        for child, size in zip(self._flow_children, self._flex_sizes):
             # Child rect is relative to content area
             # NOTE: No scroll_offset here! That's handled in render.
-            child.layout(
-                Rect(
-                    x=content.x,
-                    y=content.y + y,  # Natural position
-                    width=content.width,
-                    height=h,
+            if row:
+                cross = child.height.clamp(content.height)
+                if self.overflow_y != Overflow.VISIBLE:
+                    cross = max(cross, child.measured_size.height)
+                child_rect = Rect(
+                    x=content.x + offset, y=content.y, width=size, height=cross
+                )
+            else:
+                cross = child.width.clamp(content.width)
+                if self.overflow_x != Overflow.VISIBLE:
+                    cross = max(cross, child.measured_size.width)
+                child_rect = Rect(
+                    x=content.x, y=content.y + offset, width=cross, height=size
                 )
-            )
-            y += h
-
-    def render_content(self):
-        """Render children with scroll-based clipping."""
-        viewport = self.content_rect
-
-        for child in self.children:
-            # Calculate where child appears after scroll
-            visual_y = child.rect.y - self.scroll_offset
-            visual_bottom = visual_y + child.rect.height
-
-            # Skip if completely outside viewport
-            if visual_bottom <= viewport.y:
-                continue
-            if visual_y >= viewport.y + viewport.height:
-                continue
-
-            # Render with scroll translation
-            child.render_scrolled(viewport=viewport, scroll_offset=self.scroll_offset)
+            child.layout(child_rect)
+            offset += size + self.gap
+
+    def render_content(self, screen: core.Screen):
+        """Render children translated by the scroll offsets; the clip stack
+        (content_rect, pushed by render()) hides whatever falls outside."""
+        # Visible window in layout coordinates
+        window = self.content_rect.translate(self.scroll_offset_x, self.scroll_offset)
+        visible = self._visible_children(window)
+
+        drawn = {id(child) for child in visible}
+        for child in self._drawn:
+            if id(child) not in drawn:
+                child._render_region = Rect()
+        self._drawn = visible
+
+        with screen.translated(-self.scroll_offset_x, -self.scroll_offset):
+            for child in visible:
+                if not child.rect.intersects(window):
+                    child._render_region = Rect()
+                    continue
+                child.render(screen)
+
+    def _visible_children(self, window: Rect) -> List[widget.Widget]:
+        """The in-flow children overlapping window along the main axis. They
+        are laid out in order, so their positions are bisected rather than
+        every child tested."""
+        children = self._flow_children
+        if self.direction == Direction.ROW:
+            first = bisect.bisect_right(children, window.x, key=_right)
+            last = bisect.bisect_left(children, window.right, key=_left)
+        else:
+            first = bisect.bisect_right(children, window.y, key=_bottom)
+            last = bisect.bisect_left(children, window.bottom, key=_top)
+        return children[first:last]
+
+
+def _left(child: widget.Widget) -> int:
+    return child.rect.x
+
+
+def _right(child: widget.Widget) -> int:
+    return child.rect.right
+
+
+def _top(child: widget.Widget) -> int:
+    return child.rect.y
+
+
+def _bottom(child: widget.Widget) -> int:
+    return child.rect.bottom
@@ -1,9 +1,9 @@
-from dataclasses import dataclass
-import subprocess
-import sys
+from dataclasses import dataclass, field
+from typing import List
 from . import text
-from .. import logging, messages, ascii
-import textwrap
+from .. import ascii, highlight, messages
+from ..history import History
+from ..keymap import Binding
 
 
 @dataclass
@@ -13,25 +13,175 @@ class Submitted(messages.Message):
 
 @dataclass
 class Input(text.Text):
+    """Multi-line text input.
+
+    With a `history`, submitted inputs are recorded. up/down recall older and
+    newer ones starting with what was typed so far, and ctrl+r searches them:
+    typing refines the query, ctrl+r again goes to the next match, enter
+    takes the match and escape goes back to the input.
+    """
+
     content: str = ""
+    history: History | None = None
     Submitted = Submitted
 
-    def handle_key(self, key: ascii.Key):
-        if super().handle_key(key):
-            return True
+    can_focus = True
 
-        if key.modifiers == {"shift"} and key.key == "enter":
-            self.content += "\n"
-            return True
-        elif key.key == "enter":
-            self.post_message(Input.Submitted(sender=self, value=self.content))
-            self.content = ""
-            return True
-        elif key.key == "backspace":
-            self.content = self.content[:-1]
+    BINDINGS = [
+        Binding("shift+enter", "newline", "Insert a newline"),
+        Binding("enter", "submit", "Submit"),
+        Binding("backspace", "delete_left", "Delete the last character"),
+        Binding("up", "history_previous", "Recall the previous input"),
+        Binding("down", "history_next", "Recall the next input"),
+        Binding("ctrl+r", "history_search", "Search previous inputs"),
+        Binding("escape", "cancel_search", "Cancel the history search"),
+    ]
+
+    # Position in history of the recalled input (None while editing a new
+    # one), and what was typed before recalling
+    _recalled: int | None = field(default=None, init=False, repr=False, compare=False)
+    _draft: str = field(default="", init=False, repr=False, compare=False)
+    # The reverse search query (None when not searching), its results and
+    # the one shown
+    _query: str | None = field(default=None, init=False, repr=False, compare=False)
+    _matches: List[str] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _match: int = field(default=0, init=False, repr=False, compare=False)
+    _indexing: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def _lexer(self) -> highlight.Lexer | None:
+        # "!cmd" runs a shell command, so it is highlighted as one
+        if not self.language and self.content.startswith("!"):
+            return highlight.SHELL
+        return super()._lexer()
+
+    def _edit(self, content: str):
+        self.content = content
+        self._recalled = None
+        self._content_changed()
+
+    def action_newline(self):
+        self._finish_search()
+        self._edit(self.content + "\n")
+
+    def action_submit(self):
+        if self._query is not None:
+            # Take the match, to edit or submit it
+            self._finish_search()
+            return
+        if self.history is not None:
+            self.history.append(self.content)
+        self.post_message(Input.Submitted(sender=self, value=self.content))
+        self._edit("")
+
+    def action_delete_left(self):
+        if self._query is not None:
+            self._search(self._query[:-1])
+            return
+        self._edit(self.content[:-1])
+
+    def handle_paste(self, text: str) -> bool:
+        if self._query is not None:
+            self._search(self._query + text)
             return True
-        elif key.is_printable:
-            self.content += key.key
+        # Pasted newlines are kept rather than submitting
+        self._edit(self.content + text)
+        return True
+
+    def handle_key(self, key: ascii.Key):
+        if key.is_printable:
+            if self._query is not None:
+                self._search(self._query + key.key)
+            else:
+                self._edit(self.content + key.key)
             return True
 
         return False
+
+    # History
+    def _start_indexing(self):
+        """Index the history in the background, a batch per callback."""
+        if self._indexing or self._app is None:
+            return
+        self._indexing = True
+
+        def step():
+            if self.history.index_step() and self._app is not None:
+                self._app.post_background(step)
+
+        self._app.post_background(step)
+
+    def action_history_previous(self):
+        if self.history is None:
+            return False
+        self._finish_search()
+        self._start_indexing()
+        if self._recalled is None:
+            self._draft = self.content
+            position = len(self.history)
+        else:
+            position = self._recalled
+        found = self.history.previous(position, self._draft)
+        if found is not None:
+            self.content = self.history[found]
+            self._recalled = found
+            self._content_changed()
+
+    def action_history_next(self):
+        if self.history is None or self._recalled is None:
+            return False
+        found = self.history.next(self._recalled, self._draft)
+        if found is None:
+            # Past the newest entry: back to what was typed
+            self._edit(self._draft)
+            return
+        self.content = self.history[found]
+        self._recalled = found
+        self._content_changed()
+
+    def action_history_search(self):
+        if self.history is None:
+            return False
+        self._start_indexing()
+        if self._query is None:
+            self._draft = self.content
+            self._search("")
+        elif self._match + 1 < len(self._matches):
+            self._match += 1
+            self._show_match()
+
+    def action_cancel_search(self):
+        if self._query is None:
+            return False
+        self._query = None
+        self.highlight = ""
+        self._edit(self._draft)
+
+    def _search(self, query: str):
+        self._query = query
+        self._matches = self.history.search(query) if query else []
+        self._match = 0
+        self._show_match()
+
+    def _show_match(self):
+        """Show the current match with the query highlighted, or the query
+        itself while nothing matches."""
+        if self._match < len(self._matches):
+            self.content = self._matches[self._match]
+            self.highlight_current = True
+        else:
+            self.content = self._query
+            self.highlight_current = False
+        self.highlight = self._query
+        self._content_changed()
+
+    def _finish_search(self):
+        if self._query is None:
+            return
+        if self._match >= len(self._matches):
+            self.content = self._draft
+        self._query = None
+        self._matches = []
+        self.highlight = ""
+        self._edit(self.content)
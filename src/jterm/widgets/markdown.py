@@ -0,0 +1,420 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import ClassVar, Dict, List, Optional, Tuple
+from . import text
+from .. import core, highlight
+from ..color import Color, ColorDepth, sgr
+from ..core import Cell
+from ..layout import Size, SizeMode
+
+Row = List[Cell]
+
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})\s*([^`]*)$")
+_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_RULE = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_LIST_ITEM = re.compile(r"^([ \t]*)([-*+]|\d{1,9}[.)])[ \t]+(.*)$")
+_QUOTE = re.compile(r"^ {0,3}>[ \t]?(.*)$")
+_INLINE = re.compile(
+    r"`([^`]+)`"
+    r"|\*\*(.+?)\*\*|__(.+?)__"
+    r"|\*([^*\s](?:[^*]*[^*\s])?)\*|\b_([^_\s](?:[^_]*[^_\s])?)_\b"
+    r"|\[([^\]]+)\]\(([^)\s]*)\)"
+)
+
+# Widths (and depths) whose rendered rows are kept
+_MAX_RENDERS = 4
+
+# SGR attributes
+BOLD = 1
+ITALIC = 3
+UNDERLINE = 4
+
+
+@dataclass(eq=False)
+class Block:
+    """A top-level markdown block: its kind, source lines and where it starts
+    in the document."""
+
+    kind: str  # "paragraph", "heading", "list", "code", "quote" or "rule"
+    lines: List[str]
+    start: int
+    # Heading level, or the info string of a code fence
+    info: str = ""
+
+
+def parse_blocks(source: str, offset: int = 0) -> List[Block]:
+    """Split markdown into blocks. Only the last block can still grow when
+    more text is appended: every other one was ended by the next."""
+    blocks: List[Block] = []
+    # The block the next line may continue
+    block: Optional[Block] = None
+    fence = ""
+    blank = False
+    position = offset
+    for line in source.split("\n"):
+        start = position
+        position += len(line) + 1
+
+        if fence:
+            stripped = line.strip()
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                fence = ""
+                block = None
+            else:
+                block.lines.append(line)
+            continue
+
+        if not line.strip():
+            # Lists continue across blank lines, other blocks end
+            if block is not None and block.kind != "list":
+                block = None
+            blank = True
+            continue
+        follows_blank, blank = blank, False
+
+        match = _FENCE.match(line)
+        if match:
+            fence = match.group(1)
+            block = Block("code", [], start, match.group(2).strip())
+            blocks.append(block)
+            continue
+
+        match = _HEADING.match(line)
+        if match:
+            heading = Block("heading", [match.group(2) or ""], start)
+            heading.info = str(len(match.group(1)))
+            blocks.append(heading)
+            block = None
+            continue
+
+        if _RULE.match(line):
+            blocks.append(Block("rule", [line], start))
+            block = None
+            continue
+
+        if _LIST_ITEM.match(line):
+            if block is None or block.kind != "list":
+                block = Block("list", [], start)
+                blocks.append(block)
+            block.lines.append(line)
+            continue
+
+        match = _QUOTE.match(line)
+        if match:
+            if block is None or block.kind != "quote":
+                block = Block("quote", [], start)
+                blocks.append(block)
+            block.lines.append(match.group(1))
+            continue
+
+        if block is not None and (
+            block.kind in ("paragraph", "quote")
+            or (block.kind == "list" and (not follows_blank or line[0] in " \t"))
+        ):
+            # Paragraph text, or a (lazy) continuation line
+            block.lines.append(line)
+            continue
+
+        block = Block("paragraph", [line], start)
+        blocks.append(block)
+    return blocks
+
+
+@lru_cache(maxsize=None)
+def _style(
+    depth: ColorDepth, color: Optional[Color], attributes: Tuple[int, ...]
+) -> str:
+    style = f"\033[{';'.join(map(str, attributes))}m" if attributes else ""
+    if color is not None:
+        style += sgr(color, depth)
+    return style
+
+
+def wrap_cells(cells: Row, width: int) -> List[Row]:
+    """Word-wrap a run of cells; words longer than a row are split."""
+    if width <= 0:
+        return [cells]
+    rows: List[Row] = []
+    row: Row = []
+    index = 0
+    while index < len(cells):
+        end = index
+        while end < len(cells) and cells[end].char != " ":
+            end += 1
+        word = cells[index:end]
+        if row and len(row) + 1 + len(word) > width:
+            rows.append(row)
+            row = []
+        elif row:
+            row.append(cells[index - 1])
+        while len(row) + len(word) > width:
+            split = width - len(row)
+            rows.append(row + word[:split])
+            row, word = [], word[split:]
+        row.extend(word)
+        index = end + 1
+    rows.append(row)
+    return rows
+
+
+@dataclass
+class Markdown(text.Text):
+    """Renders `content` as markdown, built for text streamed in with append().
+
+    Completed blocks are parsed and rendered once: their cells are frozen
+    and reused, and only the last block, which the next append may still
+    change, is parsed and rendered again. Appending a token costs about the
+    size of the last block, not of the document.
+    """
+
+    HEADING_COLOR: ClassVar[Color] = Color.parse("bright_cyan")
+    CODE_COLOR: ClassVar[Color] = Color.parse("yellow")
+    LINK_COLOR: ClassVar[Color] = Color.parse("blue")
+    MUTED_COLOR: ClassVar[Color] = Color.parse("bright_black")
+
+    # Completed blocks and the source they were parsed from
+    _frozen: List[Block] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _frozen_text: str = field(default="", init=False, repr=False, compare=False)
+    # The open blocks (the last one, and any started on the last, partial
+    # line), and the content they were parsed from
+    _tail: List[Block] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _parsed: str | None = field(default=None, init=False, repr=False, compare=False)
+    # Per (width, color depth): rows of the frozen blocks, how many blocks
+    # they cover, and (content, rows) of the open block. Layout measures at
+    # more than one width (e.g. with and without a scrollbar)
+    _renders: Dict[tuple, list] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # (start, highlighter) of the last highlighted code block: while it is
+    # streamed in, an append only tokenizes its new lines
+    _code: Tuple[int, highlight.Highlighter] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def append(self, text: str):
+        """Add streamed text to the end of the document."""
+        self.content += text
+        self._content_changed()
+
+    # Parsing
+    def _sync(self):
+        content = self.content
+        if content is self._parsed:
+            return
+        if not content.startswith(self._frozen_text):
+            # Edited rather than appended to: start over
+            self._frozen = []
+            self._frozen_text = ""
+            self._renders.clear()
+
+        offset = len(self._frozen_text)
+        blocks = parse_blocks(content[offset:], offset)
+        # A block is complete once the next one starts on a complete line:
+        # the last line may still turn out to continue it ("#" + "#x more")
+        complete = content.rfind("\n") + 1
+        open_from = len(blocks) - 1
+        while open_from > 0 and blocks[open_from].start >= complete:
+            open_from -= 1
+        if open_from > 0:
+            self._frozen.extend(blocks[:open_from])
+            self._frozen_text = content[: blocks[open_from].start]
+            blocks = blocks[open_from:]
+        self._tail = blocks
+        self._parsed = content
+
+    # Rendering
+    def _rows(self, width: int) -> Tuple[List[Row], List[Row]]:
+        """Rows of the frozen blocks and of the open block at width."""
+        self._sync()
+        depth = self._app.screen.color_depth if self._app else ColorDepth.TRUECOLOR
+        key = (width, depth)
+
+        render = self._renders.get(key)
+        if render is None:
+            if len(self._renders) >= _MAX_RENDERS:
+                # Forget the oldest width
+                del self._renders[next(iter(self._renders))]
+            render = self._renders[key] = [[], 0, None]
+        frozen = render[0]
+        while render[1] < len(self._frozen):
+            if frozen:
+                frozen.append([])
+            frozen.extend(self._render_block(self._frozen[render[1]], *key))
+            render[1] += 1
+
+        cached = render[2]
+        if cached is None or cached[0] is not self.content:
+            tail: List[Row] = []
+            for block in self._tail:
+                if frozen:
+                    tail.append([])
+                tail.extend(self._render_block(block, *key))
+            cached = render[2] = (self.content, tail)
+        return frozen, cached[1]
+
+    def _render_block(self, block: Block, width: int, depth: ColorDepth) -> List[Row]:
+        if block.kind == "heading":
+            style = _style(depth, self.HEADING_COLOR, (BOLD,))
+            return wrap_cells(self._inline(block.lines[0], depth, style), width)
+
+        if block.kind == "rule":
+            muted = _style(depth, self.MUTED_COLOR, ())
+            return [[Cell("─", muted)] * width]
+
+        if block.kind == "code":
+            style = _style(depth, self.CODE_COLOR, ())
+            lines = [line.expandtabs(4) for line in block.lines]
+            highlighter = self._code_highlighter(block)
+            if highlighter is not None:
+                highlighter.update(lines)
+            rows = []
+            for index, line in enumerate(lines):
+                if highlighter is not None:
+                    cells = highlighter.cells(index, depth)
+                else:
+                    cells = [Cell(char, style) for char in line]
+                # Hard-wrapped: code keeps its spacing
+                step = max(1, width)
+                rows.extend(cells[i : i + step] for i in range(0, len(cells), step))
+                if not cells:
+                    rows.append([])
+            return rows
+
+        if block.kind == "quote":
+            muted = _style(depth, self.MUTED_COLOR, ())
+            style = _style(depth, None, (ITALIC,))
+            cells = self._inline(" ".join(block.lines), depth, style)
+            bar = [Cell("│", muted), Cell(" ")]
+            return [bar + row for row in wrap_cells(cells, width - 2)]
+
+        if block.kind == "list":
+            return self._render_list(block, width, depth)
+
+        cells = self._inline(" ".join(line.strip() for line in block.lines), depth, "")
+        return wrap_cells(cells, width)
+
+    def _code_highlighter(self, block: Block) -> highlight.Highlighter | None:
+        """The highlighter for a code block in a known language."""
+        lexer = highlight.lexer_for(block.info)
+        if lexer is None:
+            return None
+        code = self._code
+        if code is None or code[0] != block.start or code[1].lexer is not lexer:
+            code = self._code = (block.start, highlight.Highlighter(lexer))
+        return code[1]
+
+    def _render_list(self, block: Block, width: int, depth: ColorDepth) -> List[Row]:
+        # (indent, marker, text) of each item, with continuation lines joined
+        items: List[List[str]] = []
+        for line in block.lines:
+            match = _LIST_ITEM.match(line)
+            if match:
+                indent, marker, body = match.groups()
+                if marker in "-*+":
+                    marker = "•"
+                items.append([indent.expandtabs(4), marker, body])
+            elif items:
+                items[-1][2] += " " + line.strip()
+
+        rows = []
+        for indent, marker, body in items:
+            prefix = " " * (len(indent) // 2 * 2) + marker + " "
+            cells = self._inline(body, depth, "")
+            for index, row in enumerate(wrap_cells(cells, width - len(prefix))):
+                lead = prefix if index == 0 else " " * len(prefix)
+                rows.append([Cell(char) for char in lead] + row)
+        return rows
+
+    def _inline(self, source: str, depth: ColorDepth, base: str) -> Row:
+        """Cells for a run of text with `code`, **strong**, *emphasis* and
+        [links](url) styled."""
+        cells: Row = []
+
+        def add(text: str, style: str):
+            cells.extend(Cell(char, style) for char in text)
+
+        position = 0
+        for match in _INLINE.finditer(source):
+            add(source[position : match.start()], base)
+            position = match.end()
+            code, strong, strong_, emphasis, emphasis_, link, _ = match.groups()
+            if code is not None:
+                add(code, _style(depth, self.CODE_COLOR, ()))
+            elif strong is not None or strong_ is not None:
+                add(strong or strong_, base + _style(depth, None, (BOLD,)))
+            elif emphasis is not None or emphasis_ is not None:
+                add(emphasis or emphasis_, base + _style(depth, None, (ITALIC,)))
+            else:
+                add(link, _style(depth, self.LINK_COLOR, (UNDERLINE,)))
+        add(source[position:], base)
+        return cells
+
+    # Text overrides
+    @property
+    def _wraps(self) -> bool:
+        return True
+
+    def _wrap_width(self, available_width: int | None) -> int:
+        if self.width.mode == SizeMode.FIXED:
+            return max(0, self.width.value - self._chrome_width)
+        # Not laid out yet: assume a typical terminal
+        return 80 if available_width is None else available_width
+
+    def _calculate_dimensions(
+        self, available_width: int | None, available_height: int | None
+    ) -> Size:
+        width = self._wrap_width(available_width)
+        frozen, tail = self._rows(width)
+        rows = len(frozen) + len(tail)
+
+        if self.height.mode == SizeMode.FIXED:
+            height = max(0, self.height.value - self._chrome_height)
+        elif self.height.mode == SizeMode.FILL and available_height is not None:
+            height = available_height
+        else:
+            height = rows
+
+        if self.width.mode == SizeMode.AUTO:
+            width = max(
+                (len(row) for part in (frozen, tail) for row in part), default=0
+            )
+        return Size(width=width, height=height)
+
+    def _display_rows(self, width: int) -> List[Row]:
+        frozen, tail = self._rows(width)
+        return frozen + tail
+
+    def find_line(self, query: str) -> int | None:
+        query = query.lower()
+        for index, row in enumerate(self._display_rows(self.content_rect.width)):
+            if query in "".join(cell.char for cell in row).lower():
+                return index
+        return None
+
+    def render_content(self, screen: core.Screen):
+        r = self.content_rect
+        area = screen.drawable_area(r)
+        if area.is_empty:
+            return
+
+        frozen, tail = self._rows(r.width)
+        first = self.scroll_offset + (area.y - r.y)
+        column = self.scroll_offset_x + (area.x - r.x)
+        query, current = self._search_highlight()
+        for y in range(area.y, area.y + area.height):
+            index = first + y - area.y
+            if index < len(frozen):
+                row = frozen[index]
+            elif index - len(frozen) < len(tail):
+                row = tail[index - len(frozen)]
+            else:
+                break
+            screen.write_cells(y, area.x, row[column : column + area.width])
+            if query:
+                line = "".join(cell.char for cell in row)
+                self._render_matches(screen, y, area.x, line, column, query, current)
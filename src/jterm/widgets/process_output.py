@@ -0,0 +1,273 @@
+import asyncio
+import codecs
+import itertools
+import os
+import signal
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+from . import widget
+from .. import core, logging, messages
+from ..layout import Rect, Size, SizeMode, Sizing, Overflow
+
+
+@dataclass
+class Finished(messages.Message):
+    returncode: int | None = None
+
+
+@dataclass
+class ProcessOutput(widget.Widget):
+    """Runs a shell command and shows its output as it streams in.
+
+    stdout and stderr are read in large chunks and interpreted a slice at a
+    time by a VirtualTerminal (colors, carriage-return progress bars, cursor
+    moves) into a bounded ring buffer of styled rows, so a runaway producer
+    can't grow memory. Each slice only damages the rows it changed; the render
+    loop coalesces those into at most one repaint per frame, so intermediate
+    frames are dropped but lines never are (until they fall out of the ring
+    buffer).
+    """
+
+    command: str = ""
+    max_lines: int = 10_000
+    chunk_size: int = 64 * 1024
+    # Characters interpreted per turn of the event loop, so keystrokes and
+    # frames get through a flood of output
+    feed_size: int = 4 * 1024
+    # Lines longer than this wrap so a newline-free stream stays bounded
+    max_line_length: int = 16 * 1024
+
+    height: Sizing = field(default_factory=lambda: Sizing.fixed(12))
+    overflow_y: Overflow = field(default=Overflow.AUTO)
+    overflow_x: Overflow = field(default=Overflow.HIDDEN)
+
+    # Keep showing the newest output until the user scrolls up
+    follow: bool = True
+
+    returncode: int | None = field(default=None, init=False)
+
+    Finished = Finished
+
+    _terminal: core.VirtualTerminal = field(
+        default_factory=core.VirtualTerminal, init=False, repr=False, compare=False
+    )
+    _task: Optional["asyncio.Task[None]"] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _process: Optional[asyncio.subprocess.Process] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Screen position of the content area's top-left cell at the last render
+    _content_origin: Rect = field(
+        default_factory=Rect, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        self._terminal = core.VirtualTerminal(
+            max_lines=self.max_lines, columns=self.max_line_length
+        )
+
+    @property
+    def line_count(self) -> int:
+        return self._terminal.line_count
+
+    @property
+    def text(self) -> str:
+        """Plain text of the buffered output, without styling."""
+        rows = itertools.islice(self._terminal.rows, self.line_count)
+        return "\n".join("".join(cell.char or " " for cell in row) for row in rows)
+
+    # Lifecycle
+    def on_mount(self):
+        # Not while the app is only being replayed or inspected headlessly
+        if self.command and self._task is None and self._app.running:
+            self.start()
+
+    def on_unmount(self):
+        self.stop()
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        # The task kills the process and waits for it on its way out
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _run(self):
+        try:
+            await self._read()
+        except Exception as e:
+            # e.g. the shell could not be started
+            logging.log(f"{self.id} - '{self.command}' failed: {e!r}")
+            self.feed(f"{e}\n")
+        finally:
+            await self._reap()
+
+        logging.log(f"{self.id} - '{self.command}' exited with {self.returncode}")
+        self.post_message(
+            ProcessOutput.Finished(sender=self, returncode=self.returncode)
+        )
+
+    async def _read(self):
+        self._process = await asyncio.create_subprocess_shell(
+            self.command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            # Its own process group, so stopping it stops what it started too
+            start_new_session=True,
+        )
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        stdout = self._process.stdout
+        assert stdout is not None
+
+        # The stream reader stops reading the pipe while its buffer is full,
+        # so a producer faster than us blocks instead of filling memory
+        while chunk := await stdout.read(self.chunk_size):
+            data = decoder.decode(chunk)
+            for start in range(0, len(data), self.feed_size):
+                self.feed(data[start : start + self.feed_size])
+                # Let input and rendering run between slices
+                await asyncio.sleep(0)
+
+        self.feed(decoder.decode(b"", final=True))
+        self.returncode = await self._process.wait()
+
+    async def _reap(self):
+        """Kill the process group if the process is still running (stopped, or
+        reading its output failed) and wait for it, so it doesn't linger as a
+        zombie."""
+        process = self._process
+        if process is None or process.returncode is not None:
+            return
+        try:
+            # Children still holding the pipe would keep wait() from returning
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.returncode = await process.wait()
+
+    # Buffer
+    def feed(self, data: str):
+        """Interpret decoded output, repainting only the rows it changed."""
+        if not data:
+            return
+
+        terminal = self._terminal
+        line_count, dropped = self.line_count, terminal.dropped
+        terminal.feed(data)
+        damage = terminal.take_damage()
+
+        dropped = terminal.dropped - dropped
+        if dropped and not self.follow:
+            # Keep the view on the same lines while old ones fall out
+            self.scroll_offset = max(0, self.scroll_offset - dropped)
+
+        if dropped or self.line_count != line_count:
+            # Rows shifted or the scrollbar changed
+            self.refresh()
+        elif damage is not None:
+            self._refresh_rows(*damage)
+
+    def _refresh_rows(self, first: int, last: int):
+        """Damage the on-screen part of rows [first, last], e.g. a progress bar
+        redrawn in place."""
+        if self._app is None or self._render_region.is_empty:
+            return
+
+        first = max(first, self.scroll_offset)
+        last = min(last, self.scroll_offset + self._viewport_height - 1)
+        if first > last:
+            return
+
+        origin = self._content_origin
+        rows = Rect(
+            x=origin.x,
+            y=origin.y + first - self.scroll_offset,
+            width=origin.width,
+            height=last - first + 1,
+        )
+        self._app.add_damage(rows.intersection(self._render_region))
+
+    def _visible_rows(self, first: int, count: int) -> Iterable[List[core.Cell]]:
+        """Rows [first, first + count) without walking the whole deque."""
+        rows = self._terminal.rows
+        last = min(self.line_count, first + count)
+        if first >= last:
+            return []
+
+        if first > len(rows) // 2:
+            # Closer to the tail: walk backwards from the end
+            skip = len(rows) - last
+            tail = list(itertools.islice(reversed(rows), skip, skip + last - first))
+            tail.reverse()
+            return tail
+        return itertools.islice(rows, first, last)
+
+    # Scrolling
+    def scroll_up(self, lines: int = 1) -> bool:
+        if self.follow:
+            self.scroll_offset = self.max_scroll_offset
+            self.follow = False
+        return super().scroll_up(lines)
+
+    def scroll_down(self, lines: int = 1) -> bool:
+        scrolled = super().scroll_down(lines)
+        if self.scroll_offset >= self.max_scroll_offset:
+            self.follow = True
+        return scrolled
+
+    @property
+    def _total_content_height(self) -> int:
+        return self.line_count
+
+    @property
+    def _total_content_width(self) -> int:
+        return self._terminal.width
+
+    # Layout
+    def _calculate_dimensions(
+        self, available_width: int | None, available_height: int | None
+    ) -> Size:
+        """Returns CONTENT dimensions only (no borders or padding)."""
+        if self.height.mode == SizeMode.FIXED:
+            height = max(0, self.height.value - self._chrome_height)
+        elif self.height.mode == SizeMode.FILL and available_height is not None:
+            height = available_height
+        else:
+            height = self.line_count
+            if available_height is not None:
+                height = min(height, available_height)
+
+        if self.width.mode == SizeMode.FIXED:
+            width = max(0, self.width.value - self._chrome_width)
+        elif available_width is not None:
+            width = available_width
+        else:
+            width = self._total_content_width
+
+        return Size(width=width, height=height)
+
+    def layout(self, rect: Rect):
+        self.rect = rect
+
+    def render_content(self, screen: core.Screen):
+        r = self.content_rect
+        area = screen.drawable_area(r)
+        if area.is_empty:
+            return
+
+        if self.follow:
+            self.scroll_offset = self.max_scroll_offset
+        self._content_origin = screen.to_screen(r)
+
+        first = self.scroll_offset + (area.y - r.y)
+        column = self.scroll_offset_x + (area.x - r.x)
+        for row, cells in enumerate(self._visible_rows(first, area.height)):
+            segment = cells[column : column + area.width]
+            if segment:
+                # Colors are resolved for the terminal at paint time: its
+                # depth changes when a session client attaches
+                segment = core.cells_at_depth(segment, screen.color_depth)
+                screen.write_cells(area.y + row, area.x, segment)
@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from . import input
+from .. import messages
+from ..keymap import Binding
+
+
+@dataclass
+class Changed(messages.Message):
+    value: str = ""
+
+
+@dataclass
+class Navigate(messages.Message):
+    # -1 for the previous (older) match, 1 for the next one
+    direction: int = -1
+
+
+@dataclass
+class Closed(messages.Message):
+    pass
+
+
+@dataclass
+class SearchBar(input.Input):
+    """Single-line query input that reports every edit, for search-as-you-type.
+
+    enter/up go to the previous match, shift+enter/down to the next one and
+    escape closes the search.
+    """
+
+    Changed = Changed
+    Navigate = Navigate
+    Closed = Closed
+
+    BINDINGS = [
+        Binding("escape", "close", "Close search"),
+        Binding("enter", "previous_match", "Previous match"),
+        Binding("up", "previous_match", "Previous match"),
+        Binding("shift+enter", "next_match", "Next match"),
+        Binding("down", "next_match", "Next match"),
+    ]
+
+    def action_close(self):
+        self.post_message(SearchBar.Closed(sender=self))
+
+    def action_previous_match(self):
+        self.post_message(SearchBar.Navigate(sender=self, direction=-1))
+
+    def action_next_match(self):
+        self.post_message(SearchBar.Navigate(sender=self, direction=1))
+
+    def _content_changed(self):
+        super()._content_changed()
+        self.post_message(SearchBar.Changed(sender=self, value=self.content))
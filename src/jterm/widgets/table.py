@@ -0,0 +1,347 @@
+import asyncio
+import bisect
+from collections.abc import Sequence as SequenceABC
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    ClassVar,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+from . import widget
+from .. import core, logging, messages
+from ..color import Color
+from ..keymap import Binding
+from ..layout import Rect, Size, SizeMode, Sizing, Overflow
+
+Row = Sequence[Any]
+RowSource = Union[Sequence[Row], Iterable[Row], AsyncIterable[Row]]
+
+# Rows sampled to size the columns before anything is drawn
+SAMPLE_SIZE = 200
+# Rows read from an iterator between two turns of the event loop
+BATCH_SIZE = 1000
+# Blank columns between two table columns
+GAP = 2
+
+
+@dataclass
+class Loaded(messages.Message):
+    row_count: int = 0
+
+
+def format_value(value: Any) -> str:
+    """A value as the single line of text shown in its cell."""
+    if value is None:
+        return ""
+    text = value if isinstance(value, str) else str(value)
+    if "\n" in text or "\t" in text or "\r" in text:
+        text = text.replace("\r\n", "↵").replace("\n", "↵").replace("\r", "↵")
+        text = text.expandtabs(4)
+    return text
+
+
+def fit(text: str, width: int) -> str:
+    """Pad or truncate (with an ellipsis) text to exactly width columns."""
+    if len(text) <= width:
+        return text.ljust(width)
+    if width <= 0:
+        return ""
+    return text[: width - 1] + "…"
+
+
+@dataclass
+class Table(widget.Widget):
+    """Shows rows of values under a sticky header, for results too long to
+    read as text.
+
+    `rows` is a sequence, which is indexed in place and never copied, or an
+    (async) iterator, which is read in batches in the background up to
+    `max_rows`. Column widths are estimated from a sample of the rows and
+    only ever grow, as wider values arrive or are scrolled into view. Only
+    the visible rows and columns are formatted and drawn, so a million-row
+    result opens and scrolls as fast as a short one.
+    """
+
+    columns: List[str] = field(default_factory=list)
+    rows: RowSource = field(default_factory=list)
+    max_rows: int = 1_000_000
+    # Wider values are truncated with an ellipsis
+    max_column_width: int = 40
+
+    height: Sizing = field(default_factory=lambda: Sizing.fixed(12))
+    overflow_y: Overflow = field(default=Overflow.AUTO)
+    overflow_x: Overflow = field(default=Overflow.AUTO)
+
+    # Whether the source had more than max_rows rows
+    truncated: bool = field(default=False, init=False)
+
+    HEADER_COLOR: ClassVar[Color] = Color.parse("bright_cyan")
+
+    can_focus = True
+
+    BINDINGS = [
+        Binding("up", "scroll_up", "Scroll up"),
+        Binding("down", "scroll_down", "Scroll down"),
+        Binding("left", "scroll_left", "Scroll left"),
+        Binding("right", "scroll_right", "Scroll right"),
+        Binding("pageup", "page_up", "Scroll up a page"),
+        Binding("pagedown", "page_down", "Scroll down a page"),
+        Binding("home", "scroll_home", "Scroll to the first row"),
+        Binding("end", "scroll_end", "Scroll to the last row"),
+    ]
+
+    Loaded = Loaded
+
+    # Rows read so far from an iterator source
+    _loaded: List[Row] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _source: Optional[Union[Iterable[Row], AsyncIterable[Row]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _task: Optional["asyncio.Task[None]"] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Column widths, and the x offset of each column (plus the total width)
+    _widths: List[int] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _offsets: List[int] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Height available at the last measure, to stop relayouts once full
+    _height_limit: int | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if not isinstance(self.rows, SequenceABC):
+            self._source = self.rows
+            self.rows = self._loaded
+        self._widths = [len(name) for name in self.columns]
+        for index in _sample(len(self.rows)):
+            self._fit(self.rows[index])
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def loading(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # Lifecycle
+    def on_mount(self):
+        # Not while the app is only being replayed or inspected headlessly
+        if self._source is not None and self._task is None and self._app.running:
+            self._task = asyncio.get_running_loop().create_task(self._load())
+
+    def on_unmount(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _load(self):
+        batch: List[Row] = []
+        try:
+            await self._read(batch)
+        except Exception as e:
+            # Show what was read before the source failed
+            logging.log(f"{self.id} - reading rows failed: {e!r}")
+        self._add(batch)
+
+        logging.log(f"{self.id} - loaded {self.row_count} rows")
+        self.post_message(Table.Loaded(sender=self, row_count=self.row_count))
+
+    async def _read(self, batch: List[Row]):
+        """Read the source into batch, adding each full one."""
+        source = self._source
+        if hasattr(source, "__aiter__"):
+            async for row in source:
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE and not self._add(batch):
+                    break
+            if self.truncated and hasattr(source, "aclose"):
+                await source.aclose()
+        else:
+            for row in source:
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    if not self._add(batch):
+                        break
+                    # Let input and rendering run between batches
+                    await asyncio.sleep(0)
+
+    def _add(self, batch: List[Row]) -> bool:
+        """Append a batch of rows read from the source, emptying it; False
+        once max_rows is reached."""
+        room = self.max_rows - len(self._loaded)
+        if len(batch) > room:
+            del batch[room:]
+            self.truncated = True
+        widened = False
+        for row in batch:
+            widened |= self._fit(row)
+        self._loaded.extend(batch)
+        added = bool(batch)
+        batch.clear()
+
+        if added or widened:
+            grows = self.height.mode == SizeMode.AUTO and (
+                self._height_limit is None
+                or self.content_size.height < self._height_limit
+            )
+            self.refresh(layout=grows)
+        return not self.truncated
+
+    # Columns
+    def _fit(self, row: Row) -> bool:
+        """Widen the columns to fit row's values; True if any grew."""
+        widths = self._widths
+        widened = len(row) > len(widths)
+        if widened:
+            widths.extend([0] * (len(row) - len(widths)))
+        for index, value in enumerate(row):
+            width = min(len(format_value(value)), self.max_column_width)
+            if width > widths[index]:
+                widths[index] = width
+                widened = True
+        if widened:
+            self._offsets = None
+        return widened
+
+    def _column_offsets(self) -> List[int]:
+        offsets = self._offsets
+        if offsets is None:
+            offsets = [0]
+            for width in self._widths:
+                offsets.append(offsets[-1] + width + GAP)
+            self._offsets = offsets
+        return offsets
+
+    def _line(self, values: Row, first: int, last: int) -> str:
+        """Text of columns [first, last) of a row."""
+        widths = self._widths
+        parts = []
+        for index in range(first, last):
+            value = values[index] if index < len(values) else None
+            parts.append(fit(format_value(value), widths[index]))
+            parts.append(" " * GAP)
+        return "".join(parts)
+
+    # Scrolling
+    @property
+    def _total_content_height(self) -> int:
+        # The header, then the rows
+        return self.row_count + 1
+
+    @property
+    def _total_content_width(self) -> int:
+        return max(0, self._column_offsets()[-1] - GAP)
+
+    def action_scroll_up(self):
+        if self.scroll_up():
+            self.refresh()
+
+    def action_scroll_down(self):
+        if self.scroll_down():
+            self.refresh()
+
+    def action_scroll_left(self):
+        if self.scroll_left(4):
+            self.refresh()
+
+    def action_scroll_right(self):
+        if self.scroll_right(4):
+            self.refresh()
+
+    def action_page_up(self):
+        if self.scroll_up(max(1, self._viewport_height - 2)):
+            self.refresh()
+
+    def action_page_down(self):
+        if self.scroll_down(max(1, self._viewport_height - 2)):
+            self.refresh()
+
+    def action_scroll_home(self):
+        self.scroll_to_top()
+        self.refresh()
+
+    def action_scroll_end(self):
+        self.scroll_to_bottom()
+        self.refresh()
+
+    # Layout
+    def _calculate_dimensions(
+        self, available_width: int | None, available_height: int | None
+    ) -> Size:
+        """Returns CONTENT dimensions only (no borders or padding)."""
+        self._height_limit = available_height
+        if self.height.mode == SizeMode.FIXED:
+            height = max(0, self.height.value - self._chrome_height)
+        elif self.height.mode == SizeMode.FILL and available_height is not None:
+            height = available_height
+        else:
+            height = self._total_content_height
+            if available_height is not None:
+                height = min(height, available_height)
+
+        if self.width.mode == SizeMode.FIXED:
+            width = max(0, self.width.value - self._chrome_width)
+        elif available_width is not None:
+            width = available_width
+        else:
+            width = self._total_content_width
+
+        return Size(width=width, height=height)
+
+    def layout(self, rect: Rect):
+        self.rect = rect
+
+    def render_content(self, screen: core.Screen):
+        r = self.content_rect
+        area = screen.drawable_area(r)
+        if area.is_empty:
+            return
+
+        # Fit the columns to the visible rows first, so they are drawn with
+        # the widths the next frame will use
+        top = max(0, area.y - r.y - 1)
+        indices = range(
+            self.scroll_offset + top,
+            min(self.row_count, self.scroll_offset + area.bottom - r.y - 1),
+        )
+        visible = [self.rows[index] for index in indices]
+        widened = False
+        for values in visible:
+            widened |= self._fit(values)
+        if widened:
+            # The scrollbars follow the new width from the next frame
+            self.refresh(layout=True)
+
+        column = self.scroll_offset_x + (area.x - r.x)
+        offsets = self._column_offsets()
+        first = max(0, bisect.bisect_right(offsets, column) - 1)
+        last = min(len(self._widths), bisect.bisect_left(offsets, column + area.width))
+        if first >= last:
+            return
+        start = column - offsets[first]
+
+        y = area.y
+        if y == r.y:
+            # The header stays in place while the rows scroll under it
+            header = self._line(self.columns, first, last)
+            screen.write_text(y, area.x, header[start:], self.HEADER_COLOR)
+            y += 1
+        for values in visible:
+            screen.write_text(y, area.x, self._line(values, first, last)[start:])
+            y += 1
+
+
+def _sample(count: int) -> range:
+    """Indices of up to SAMPLE_SIZE rows spread evenly over count rows."""
+    return range(0, count, max(1, count // SAMPLE_SIZE))
@@ -1,67 +1,230 @@
-import sys
-import textwrap
-from dataclasses import dataclass
+import bisect
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Tuple
 from . import widget
-from .. import logging
-from ..layout import Size, SizeMode, Rect
+from .. import core, formatting
+from ..color import Color, sgr
+from ..highlight import Highlighter, Lexer, lexer_for
+from ..layout import Size, SizeMode, Rect, Overflow
+
+# (fg, bg) of search matches, and of matches in the current search result
+MATCH_STYLE = (Color.parse("black"), Color.parse("yellow"))
+CURRENT_MATCH_STYLE = (Color.parse("black"), Color.parse("cyan"))
+
+# Wrap widths whose rows are kept
+_MAX_WIDTHS = 4
+
+
+class _Wrapped:
+    """The word-wrapped rows of each line of a Text at one width, and the
+    row each line starts at.
+
+    An edit at the end of the content (an append, a backspace) only rewraps
+    the lines from the last one it kept, so neither streaming nor typing
+    rewraps the whole content, and the line shown at a row is found by
+    bisecting the offsets.
+    """
+
+    __slots__ = (
+        "width",
+        "content",
+        "rows",
+        "offsets",
+        "pending",
+        "ready",
+        "on_ready",
+    )
+
+    def __init__(self, width: int, on_ready: Callable[[], None]):
+        self.width = width
+        # The content the rows were wrapped from
+        self.content: str | None = None
+        self.rows: List[List[str]] = []
+        # offsets[i] is the row line i starts at, offsets[-1] the total
+        self.offsets: List[int] = [0]
+        # Lines from here on are hard-split placeholders until the formatting
+        # job is done (ready)
+        self.pending: int | None = None
+        self.ready = False
+        self.on_ready = on_ready
+
+    def line_at(self, row: int) -> int:
+        """The line shown at row."""
+        index = bisect.bisect_right(self.offsets, row) - 1
+        return max(0, min(len(self.rows) - 1, index))
 
 
 @dataclass
 class Text(widget.Widget):
     content: str = ""
 
+    # Occurrences of this string (case-insensitive) are highlighted
+    highlight: str = ""
+    highlight_current: bool = False
+
+    # Source code in this language (see lexer_for) is syntax
+    # highlighted, and hard-wrapped rather than word-wrapped
+    language: str = ""
+
+    # Word-wrapped rows by width
+    _wrapped: Dict[int, _Wrapped] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # (content, lines, longest line, {width: rows}) of the unwrapped content
+    _split: tuple | None = field(default=None, init=False, repr=False, compare=False)
+    # Row each line starts at when hard-split, by width, as far as drawn
+    _split_offsets: Dict[int, List[int]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _highlighter: Highlighter | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def _wraps(self) -> bool:
+        """Lines are word-wrapped unless the widget scrolls or clips horizontally."""
+        return self.overflow_x == Overflow.VISIBLE
+
+    def _lines(self) -> List[str]:
+        cached = self._split
+        content = self.content
+        if cached is not None and cached[0] is content:
+            return cached[1]
+
+        if cached is not None and content.startswith(cached[0]):
+            # Appended to: only the last line and the new ones are split
+            old, lines, longest, counts = cached
+            removed = lines[-1:]
+            added = (lines[-1] + content[len(old) :]).split("\n")
+            lines = lines[:-1] + added
+            kept = len(lines) - len(added)
+        elif cached is not None and cached[0].startswith(content):
+            # Cut at the end, e.g. backspace
+            old, lines, longest, counts = cached
+            kept = len(lines) - old.count("\n", len(content))
+            removed = lines[kept - 1 :]
+            added = [content[content.rfind("\n") + 1 :]]
+            lines = lines[: kept - 1] + added
+            kept -= 1
+        else:
+            lines = content.split("\n")
+            longest = max(map(len, lines), default=0)
+            self._split = (content, lines, longest, {})
+            self._split_offsets.clear()
+            return lines
+
+        # Lines before the first changed one keep their offsets
+        for offsets in self._split_offsets.values():
+            del offsets[kept + 1 :]
+
+        # Update the measurements by the lines replaced
+        widest = max(map(len, added))
+        if widest < longest <= max(map(len, removed)):
+            longest = max(map(len, lines))
+        else:
+            longest = max(longest, widest)
+        counts = {
+            width: rows
+            + sum(len(line) // width for line in added)
+            - sum(len(line) // width for line in removed)
+            + len(added)
+            - len(removed)
+            for width, rows in counts.items()
+        }
+        self._split = (content, lines, longest, counts)
+        return lines
+
+    def _split_rows(self, width: int | None) -> int:
+        """Rows the lines take when hard-split at width, or one each."""
+        lines = self._lines()
+        if width is None or width <= 0:
+            return len(lines)
+        counts = self._split[3]
+        rows = counts.get(width)
+        if rows is None:
+            if len(counts) >= 4:
+                # Forget the widths of earlier layouts
+                counts.clear()
+            rows = sum(len(line) // width for line in lines) + len(lines)
+            counts[width] = rows
+        return rows
+
+    def _split_offsets_to(self, width: int, row: int) -> List[int]:
+        """Row each line starts at when hard-split at width, computed up to the
+        line shown at row."""
+        offsets = self._split_offsets.get(width)
+        if offsets is None:
+            if len(self._split_offsets) >= _MAX_WIDTHS:
+                self._split_offsets.clear()
+            offsets = self._split_offsets[width] = [0]
+        lines = self._lines()
+        while offsets[-1] <= row and len(offsets) <= len(lines):
+            offsets.append(offsets[-1] + len(lines[len(offsets) - 1]) // width + 1)
+        return offsets
+
+    def _height(self, width: int | None) -> int:
+        """Rows the content takes at width: word-wrapped, or hard-split when
+        it is syntax highlighted."""
+        if width is not None and width > 0 and self._lexer() is None:
+            return self._wrap(width).offsets[-1]
+        return self._split_rows(width)
+
+    @property
+    def _total_content_height(self) -> int:
+        if self._wraps:
+            return self.content_size.height
+        return len(self._lines())
+
+    @property
+    def _total_content_width(self) -> int:
+        if self._wraps:
+            return self.content_size.width
+        self._lines()
+        return self._split[2]
+
     def _calculate_dimensions(
         self, available_width: int | None, available_height: int | None
     ) -> Size:
-        """Returns CONTENT dimensions only (no borders).
+        """Returns CONTENT dimensions only (no borders or padding).
 
         Args:
-            available_width: Width available for CONTENT (borders already subtracted)
-            available_height: Height available for CONTENT (borders already subtracted)
+            available_width: Width available for CONTENT (chrome already subtracted)
+            available_height: Height available for CONTENT (chrome already subtracted)
         """
-        lines = self.content.split("\n")
+        self._lines()
+        longest = self._split[2]
+        # Without wrapping every line takes exactly one row
+        wrap_width = available_width if self._wraps else None
 
         # Compute CONTENT height (no borders!)
         if self.height.mode == SizeMode.FILL:
             if available_height is None:
                 # Fallback to AUTO
-                content_height = 0
-                for line in lines:
-                    if available_width is not None and available_width > 0:
-                        content_height += (len(line) // available_width) + 1
-                    else:
-                        content_height += 1
+                content_height = self._height(wrap_width)
             else:
                 content_height = available_height
         elif self.height.mode == SizeMode.FIXED:
             # FIXED includes borders, so subtract them for content
-            content_height = max(0, self.height.value - self.border.vertical_space)
+            content_height = max(0, self.height.value - self._chrome_height)
         elif self.height.mode == SizeMode.AUTO:
-            content_height = 0
-            for line in lines:
-                if available_width is not None and available_width > 0:
-                    content_height += (len(line) // available_width) + 1
-                else:
-                    content_height += 1
+            content_height = self._height(wrap_width)
         else:
             raise ValueError(f"SizeMode {self.height.mode} not supported")
 
         # Compute CONTENT width (no borders!)
         if self.width.mode == SizeMode.FILL:
             if available_width is None:
-                content_width = max((len(line) for line in lines), default=0)
+                content_width = longest
             else:
                 content_width = available_width
         elif self.width.mode == SizeMode.FIXED:
-            content_width = max(0, self.width.value - self.border.horizontal_space)
+            content_width = max(0, self.width.value - self._chrome_width)
         elif self.width.mode == SizeMode.AUTO:
-            content_width = 0
-            for line in lines:
-                if available_width is not None:
-                    line_width = min(len(line), available_width)
-                else:
-                    line_width = len(line)
-                content_width = max(line_width, content_width)
+            if available_width is not None:
+                content_width = min(longest, available_width)
+            else:
+                content_width = longest
         else:
             raise ValueError(f"SizeMode {self.width.mode} not supported")
 
@@ -70,25 +233,202 @@ class Text(widget.Widget):
     def layout(self, rect: Rect):
         self.rect = rect
 
-    def render_content(self):
+    def _wrap(self, width: int) -> _Wrapped:
+        """The content word-wrapped at width. Large rewraps are formatted off
+        the UI thread, showing the lines hard-split until they are done."""
+        wrapped = self._wrapped.get(width)
+        if wrapped is None:
+            if len(self._wrapped) >= _MAX_WIDTHS:
+                self._wrapped.clear()
+            wrapped = _Wrapped(width, partial(self._on_formatted, width))
+            self._wrapped[width] = wrapped
+        content = self.content
+        if content is wrapped.content and not wrapped.ready:
+            # Up to date, or waiting for its formatting job
+            return wrapped
+
+        lines = self._lines()
+        old = wrapped.content
+        keep = 0
+        if old is not None and (content.startswith(old) or old.startswith(content)):
+            # Only the end changed: the lines before the last one kept still
+            # wrap the same
+            keep = max(0, min(len(wrapped.rows), len(lines)) - 1)
+        if wrapped.pending is not None:
+            keep = min(keep, wrapped.pending)
+
+        changed = "\n".join(lines[keep:])
+        pending = None
+        if self._app is None:
+            rows = formatting.wrap_lines(changed, width)
+        else:
+            rows = self._app.formatter.wrap(changed, width, wrapped.on_ready)
+            if rows is None:
+                rows = formatting.split_lines(changed, width)
+                pending = keep
+
+        wrapped.rows[keep:] = rows
+        offsets = wrapped.offsets
+        del offsets[keep + 1 :]
+        total = offsets[-1]
+        for line_rows in rows:
+            total += len(line_rows)
+            offsets.append(total)
+        wrapped.content = content
+        wrapped.pending = pending
+        wrapped.ready = False
+        return wrapped
+
+    def _on_formatted(self, width: int):
+        wrapped = self._wrapped.get(width)
+        if wrapped is not None and wrapped.pending is not None:
+            wrapped.ready = True
+            # The placeholder rows are replaced by ones that may add up to
+            # another height
+            self._content_changed()
+
+    def find_line(self, query: str) -> int | None:
+        """Index of the first displayed line containing query, if any."""
+        query = query.lower()
+        wrapped = self._wrap(self.content_rect.width) if self._wraps else None
+        for index, line in enumerate(self._lines()):
+            if query not in line.lower():
+                continue
+            if wrapped is None:
+                return index
+            # The row it is on, or the line's first row if it spans two
+            for offset, row in enumerate(wrapped.rows[index]):
+                if query in row.lower():
+                    return wrapped.offsets[index] + offset
+            return wrapped.offsets[index]
+        return None
+
+    def _content_changed(self):
+        """Repaint after a content edit, relaying out only if the height changes."""
+        if self.height.mode == SizeMode.AUTO:
+            size = self._calculate_dimensions(self.content_rect.width, None)
+            if size.height != self.content_size.height:
+                self.refresh(layout=True)
+                return
+        self.refresh()
+
+    def render_content(self, screen: core.Screen):
         r = self.content_rect
-        if r.height <= 0:
+
+        # Only the part of the content area the clip stack lets through is
+        # drawn, so clipped rows and columns are never sliced or written
+        area = screen.drawable_area(r)
+        if area.is_empty:
             return
 
-        lines = self.content.split("\n")
-        display_lines = []
-        for line in lines:
-            formatted = textwrap.fill(line, width=r.width) if r.width > 0 else line
-            display_lines.extend(formatted.split("\n"))
+        lexer = self._lexer()
+        if lexer is not None:
+            self._render_highlighted(screen, area, lexer)
+            return
+
+        first = self.scroll_offset + (area.y - r.y)
+        if self._wraps:
+            # Only the lines wrapped into the visible rows are drawn
+            wrapped = self._wrap(r.width)
+            index = wrapped.line_at(first)
+            skip = first - wrapped.offsets[index]
+            visible = []
+            for line_rows in wrapped.rows[index:]:
+                visible.extend(line_rows[skip:])
+                skip = 0
+                if len(visible) >= area.height:
+                    break
+        else:
+            visible = self._lines()[first : first + area.height]
+
+        color = self.computed_style.color
+        column = self.scroll_offset_x + (area.x - r.x)
+        query, current = self._search_highlight()
+        for row, line in enumerate(visible[: area.height]):
+            segment = line[column : column + area.width]
+            if segment:
+                screen.write_text(area.y + row, area.x, segment, color)
+                if query:
+                    self._render_matches(
+                        screen, area.y + row, area.x, line, column, query, current
+                    )
+
+    def _lexer(self) -> Lexer | None:
+        return lexer_for(self.language)
+
+    def _search_highlight(self) -> Tuple[str, bool]:
+        """The query to highlight and whether this is the current match: our
+        own, else the app's search."""
+        if self.highlight or self._app is None:
+            return self.highlight, self.highlight_current
+        return self._app.search_highlight(self) or ("", False)
 
-        # Skip lines clipped by parent scroll
-        clip_top = getattr(self, "_render_clip_top", 0)
-        start = self.scroll_offset + clip_top
-        visible = display_lines[start : start + r.height]
+    def _render_highlighted(self, screen: core.Screen, area: Rect, lexer: Lexer):
+        """Draw the visible lines with syntax highlighting. Lines are
+        hard-wrapped, taking as many rows as _calculate_dimensions counts."""
+        highlighter = self._highlighter
+        if highlighter is None or highlighter.lexer is not lexer:
+            highlighter = self._highlighter = Highlighter(lexer)
+        lines = self._lines()
+        highlighter.update(lines)
 
-        for row, line in enumerate(visible):
-            if row >= r.height:
+        color = self.computed_style.color
+        base = sgr(color, screen.color_depth) if color is not None else ""
+        r = self.content_rect
+        width = r.width if self._wraps and r.width > 0 else None
+        first = self.scroll_offset + (area.y - r.y)
+        column = self.scroll_offset_x + (area.x - r.x)
+        end = first + area.height
+        query, current = self._search_highlight()
+        if width:
+            # Lines above the viewport are skipped by their cached offsets
+            offsets = self._split_offsets_to(width, first)
+            start = bisect.bisect_right(offsets, first) - 1
+            row = offsets[start]
+        else:
+            start = row = first
+        for index in range(start, len(lines)):
+            if row >= end:
                 break
-            sys.stdout.write(f"\033[{r.y + 1 + row};{r.x + 1}H{line}")
+            line = lines[index]
+            count = len(line) // width + 1 if width else 1
+            cells = highlighter.cells(index, screen.color_depth, base)
+            for part in range(count):
+                if first <= row < end:
+                    start = part * width if width else 0
+                    stop = start + width if width else len(cells)
+                    segment = cells[start:stop][column : column + area.width]
+                    if segment:
+                        screen.write_cells(area.y + row - first, area.x, segment)
+                        if query:
+                            self._render_matches(
+                                screen,
+                                area.y + row - first,
+                                area.x,
+                                line[start:stop],
+                                column,
+                                query,
+                                current,
+                            )
+                row += 1
 
-        sys.stdout.flush()
+    def _render_matches(
+        self,
+        screen: core.Screen,
+        row: int,
+        x: int,
+        line: str,
+        column: int,
+        query: str,
+        current: bool,
+    ):
+        """Restyle the occurrences of query in a line drawn from `column`."""
+        query = query.lower()
+        fg, bg = CURRENT_MATCH_STYLE if current else MATCH_STYLE
+        lowered = line.lower()
+        start = lowered.find(query)
+        while start != -1:
+            end = start + len(query)
+            # The clip stack drops whatever is scrolled out horizontally
+            screen.write_text(row, x + start - column, line[start:end], fg, bg)
+            start = lowered.find(query, end)
@@ -1,7 +1,7 @@
-import sys
 from dataclasses import dataclass, field
-from enum import Enum, auto
-from .. import core, logging, ascii
+from .. import core, logging, ascii, keymap
+from ..color import Color
+from ..stylesheet import ComputedStyle, EMPTY
 from ..layout import (
     Sizing,
     Size,
@@ -10,10 +10,11 @@ from ..layout import (
     Border,
     BorderStyle,
     BORDER_CHARS,
-    SizeMode,
     Overflow,
+    Spacing,
+    PositionMode,
 )
-from typing import Optional, List, TYPE_CHECKING
+from typing import ClassVar, Optional, List, Set, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .. import messages, app
@@ -21,9 +22,16 @@ if TYPE_CHECKING:
 
 @dataclass
 class Widget:
+    # Key bindings, run as action_<name> methods while the widget (or one of
+    # its descendants) has focus. Inherited from base classes.
+    BINDINGS: ClassVar[List[keymap.Binding]] = []
+
     id: str
 
     _app: "app.App | None" = field(default=None, repr=False)
+    _parent: "Widget | None" = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     width: Sizing = field(default_factory=Sizing.fill)
     height: Sizing = field(default_factory=Sizing.auto)
@@ -31,7 +39,26 @@ class Widget:
 
     children: List["Widget"] = field(default_factory=list)
 
+    # Set on the focused widget by the app's FocusManager; widgets mounted
+    # with focused=True take focus
     focused: bool = False
+    # Whether tab/shift-tab traversal stops at this widget
+    can_focus: ClassVar[bool] = False
+
+    # Defaults for the stylesheet's scrollbar-track-color and scrollbar-color
+    SCROLLBAR_TRACK_COLOR: ClassVar[Color] = Color.parse("bright_black")
+    SCROLLBAR_THUMB_COLOR: ClassVar[Color] = Color.parse("white")
+
+    # Stylesheet classes; change them with add_class()/remove_class() so the
+    # style is recomputed
+    classes: Set[str] = field(default_factory=set)
+    # Resolved by the app's stylesheet when mounted
+    computed_style: ComputedStyle = field(
+        default=EMPTY, init=False, repr=False, compare=False
+    )
+    # (border, padding) last set from the stylesheet, so they can be told
+    # apart from inline values
+    _styled: tuple = field(default=(None, None), init=False, repr=False, compare=False)
 
     # Size of content
     content_size: Size = field(default_factory=Size)
@@ -42,21 +69,58 @@ class Widget:
     # Border
     border: "Border" = field(default_factory=Border.none)
 
+    # Padding between border (and scrollbar) and content
+    padding: Spacing = field(default_factory=Spacing)
+
     # Scrolling
     overflow_y: Overflow = field(default=Overflow.VISIBLE)
     scroll_offset: int = 0
     _scroll_events: List[int] = field(default_factory=list)
 
+    # Horizontal scrolling
+    overflow_x: Overflow = field(default=Overflow.VISIBLE)
+    scroll_offset_x: int = 0
+    _scroll_events_x: List[int] = field(default_factory=list)
+
+    # Screen area covered by the last paint, used to report damage
+    _render_region: Rect = field(
+        default_factory=Rect, init=False, repr=False, compare=False
+    )
+
+    # (rect, border, padding, content_rect) cached until one of them changes,
+    # reset by measure() and refresh()
+    _content_rect_cache: tuple | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     @property
     def _total_content_height(self) -> int:
         if self.children:
             return sum(child.content_size.height for child in self.children)
         return self.content_size.height
 
+    @property
+    def _chrome_width(self) -> int:
+        """Columns taken by border and padding."""
+        return self.border.horizontal_space + self.padding.horizontal
+
+    @property
+    def _chrome_height(self) -> int:
+        """Rows taken by border and padding."""
+        return self.border.vertical_space + self.padding.vertical
+
+    @property
+    def measured_size(self) -> Size:
+        """TOTAL size (content, padding and border) from the last measure()."""
+        return Size(
+            width=self.content_size.width + self._chrome_width,
+            height=self.content_size.height + self._chrome_height,
+        )
+
     @property
     def _viewport_height(self) -> int:
-        """Height of visible area inside borders."""
-        return max(0, self.rect.height - self.border.vertical_space)
+        """Height of visible area inside borders and padding."""
+        return max(0, self.rect.height - self._chrome_height)
 
     @property
     def needs_scrollbar(self) -> bool:
@@ -78,7 +142,8 @@ class Widget:
     def max_scroll_offset(self) -> int:
         if not self.needs_scrollbar:
             return 0
-        return max(0, self._total_content_height - self._viewport_height)
+        viewport_height = self._viewport_height - self.scrollbar_x_height
+        return max(0, self._total_content_height - viewport_height)
 
     @property
     def scrollbar_height(self) -> int:
@@ -106,6 +171,65 @@ class Widget:
         """Width of the scrollbar (1 if needed, 0 otherwise)."""
         return 1 if self.needs_scrollbar else 0
 
+    @property
+    def _total_content_width(self) -> int:
+        return self.content_size.width
+
+    @property
+    def _viewport_width(self) -> int:
+        """Width of visible area inside borders and padding."""
+        return max(0, self.rect.width - self._chrome_width)
+
+    @property
+    def needs_scrollbar_x(self) -> bool:
+        if self.overflow_x == Overflow.VISIBLE:
+            return False
+        elif self.overflow_x == Overflow.HIDDEN:
+            return False
+        elif self.overflow_x == Overflow.SCROLL:
+            return True
+        elif self.overflow_x == Overflow.AUTO:
+            return self._total_content_width > self._viewport_width
+        else:
+            raise ValueError(f"Unknown overflow method: {self.overflow_x}")
+
+    @property
+    def max_scroll_offset_x(self) -> int:
+        if not self.needs_scrollbar_x:
+            return 0
+        return max(
+            0, self._total_content_width - self._viewport_width + self.scrollbar_width
+        )
+
+    @property
+    def scrollbar_x_width(self) -> int:
+        """Width of the horizontal scrollbar thumb."""
+        if not self.needs_scrollbar_x:
+            return 0
+        inner_width = max(
+            0, self.rect.width - self.border.horizontal_space - self.scrollbar_width
+        )
+        thumb_width = max(
+            1, int(inner_width * inner_width / max(1, self._total_content_width))
+        )
+        return min(thumb_width, inner_width)
+
+    @property
+    def scrollbar_x_position(self) -> int:
+        """X position of horizontal scrollbar thumb (relative to inner left edge)."""
+        if not self.needs_scrollbar_x or self.max_scroll_offset_x == 0:
+            return 0
+        inner_width = max(
+            0, self.rect.width - self.border.horizontal_space - self.scrollbar_width
+        )
+        scrollable_range = inner_width - self.scrollbar_x_width
+        return int(self.scroll_offset_x / self.max_scroll_offset_x * scrollable_range)
+
+    @property
+    def scrollbar_x_height(self) -> int:
+        """Height of the horizontal scrollbar (1 if needed, 0 otherwise)."""
+        return 1 if self.needs_scrollbar_x else 0
+
     def scroll_up(self, lines: int = 1) -> bool:
         """Scroll content up (decrease offset). Returns True if scrolled."""
         if self.scroll_offset > 0:
@@ -120,6 +244,22 @@ class Widget:
             return True
         return False
 
+    def scroll_left(self, columns: int = 1) -> bool:
+        """Scroll content left (decrease offset). Returns True if scrolled."""
+        if self.scroll_offset_x > 0:
+            self.scroll_offset_x = max(0, self.scroll_offset_x - columns)
+            return True
+        return False
+
+    def scroll_right(self, columns: int = 1) -> bool:
+        """Scroll content right (increase offset). Returns True if scrolled."""
+        if self.scroll_offset_x < self.max_scroll_offset_x:
+            self.scroll_offset_x = min(
+                self.max_scroll_offset_x, self.scroll_offset_x + columns
+            )
+            return True
+        return False
+
     def scroll_to_top(self):
         """Scroll to the top."""
         self.scroll_offset = 0
@@ -128,17 +268,37 @@ class Widget:
         """Scroll to the bottom."""
         self.scroll_offset = self.max_scroll_offset
 
+    def scroll_to(self, offset: int):
+        """Scroll so content row `offset` is at the top, as far as possible."""
+        self.scroll_offset = max(0, min(offset, self.max_scroll_offset))
+
     @property
     def content_rect(self) -> "Rect":
-        """Returns the inner rect available for content (after border and scrollbar insets)."""
-        return Rect(
-            x=self.rect.x + self.border.left_width,
-            y=self.rect.y + self.border.top_width,
-            width=max(
-                0, self.rect.width - self.border.horizontal_space - self.scrollbar_width
+        """Returns the inner rect available for content (after border and scrollbar insets).
+
+        Cached per rect, border and padding instance. measure() and
+        refresh() invalidate it, since the content size decides whether
+        scrollbars take up a column or row.
+        """
+        cached = self._content_rect_cache
+        if (
+            cached is not None
+            and cached[0] is self.rect
+            and cached[1] is self.border
+            and cached[2] is self.padding
+        ):
+            return cached[3]
+
+        content_rect = self.rect.inset(
+            top=self.border.top_width + self.padding.top,
+            right=self.border.right_width + self.scrollbar_width + self.padding.right,
+            bottom=(
+                self.border.bottom_width + self.scrollbar_x_height + self.padding.bottom
             ),
-            height=max(0, self.rect.height - self.border.vertical_space),
+            left=self.border.left_width + self.padding.left,
         )
+        self._content_rect_cache = (self.rect, self.border, self.padding, content_rect)
+        return content_rect
 
     def _calculate_dimensions(
         self, available_width: int | None, available_height: int | None
@@ -148,20 +308,18 @@ class Widget:
     def measure(
         self, available_width: int | None, available_height: int | None
     ) -> Size:
-        """Measure the widget. Returns TOTAL size including borders."""
+        """Measure the widget. Returns TOTAL size including borders and padding."""
 
-        # Calculate available content space (exclude borders from available space)
+        # Calculate available content space (exclude borders and padding)
         content_available_width = None
         content_available_height = None
 
         if available_width is not None:
-            content_available_width = max(
-                0, available_width - self.border.horizontal_space
-            )
+            content_available_width = max(0, available_width - self._chrome_width)
         if available_height is not None:
-            content_available_height = max(
-                0, available_height - self.border.vertical_space
-            )
+            content_available_height = max(0, available_height - self._chrome_height)
+
+        self._content_rect_cache = None
 
         # _calculate_dimensions returns CONTENT-ONLY size
         content_size = self._calculate_dimensions(
@@ -169,11 +327,8 @@ class Widget:
         )
         self.content_size = content_size
 
-        # Total size = content + borders
-        total_size = Size(
-            width=content_size.width + self.border.horizontal_space,
-            height=content_size.height + self.border.vertical_space,
-        )
+        # Total size = content + padding + borders
+        total_size = self.measured_size
 
         logging.log(f"{self.id} - Size: {total_size}")
         return total_size
@@ -182,7 +337,7 @@ class Widget:
         """This defines what should be displayed based on the available size"""
         raise NotImplementedError
 
-    def _render_border(self):
+    def _render_border(self, screen: core.Screen):
         """Draw the border around the widget rect."""
         if self.rect.width < 2 or self.rect.height < 2:
             return  # Not enough space for a border
@@ -194,85 +349,44 @@ class Widget:
         if primary_style == BorderStyle.NONE:
             return  # No visible border
 
-        h, v, tl, tr, bl, br = BORDER_CHARS[primary_style]
-        color = self.border.top.color
-        reset = "\033[0m" if color else ""
-
         x, y = self.rect.x, self.rect.y
         w, h_size = self.rect.width, self.rect.height
+        # For sides without a color of their own
+        fallback = self.computed_style.border_color
 
         # Top border
         if self.border.top.style != BorderStyle.NONE:
             h_char, _, tl, tr, _, _ = BORDER_CHARS[self.border.top.style]
             top_line = tl + (h_char * (w - 2)) + tr
-            sys.stdout.write(f"\033[{y + 1};{x + 1}H{color}{top_line}{reset}")
+            screen.write_text(y, x, top_line, fg=self.border.top.color or fallback)
 
         # Left and right borders
         for row in range(1, h_size - 1):
             # Left
             if self.border.left.style != BorderStyle.NONE:
                 _, v_char, _, _, _, _ = BORDER_CHARS[self.border.left.style]
-                sys.stdout.write(
-                    f"\033[{y + row + 1};{x + 1}H{self.border.left.color}{v_char}{reset}"
+                screen.write_char_at(
+                    y + row, x, v_char, fg=self.border.left.color or fallback
                 )
             # Right
             if self.border.right.style != BorderStyle.NONE:
                 _, v_char, _, _, _, _ = BORDER_CHARS[self.border.right.style]
-                sys.stdout.write(
-                    f"\033[{y + row + 1};{x + w}H{self.border.right.color}{v_char}{reset}"
+                screen.write_char_at(
+                    y + row, x + w - 1, v_char, fg=self.border.right.color or fallback
                 )
 
         # Bottom border
         if self.border.bottom.style != BorderStyle.NONE:
             h_char, _, _, _, bl, br = BORDER_CHARS[self.border.bottom.style]
             bottom_line = bl + (h_char * (w - 2)) + br
-            sys.stdout.write(
-                f"\033[{y + h_size};{x + 1}H{self.border.bottom.color}{bottom_line}{reset}"
+            screen.write_text(
+                y + h_size - 1, x, bottom_line, fg=self.border.bottom.color or fallback
             )
 
-        sys.stdout.flush()
-
-    def render_scrolled(self, viewport: Rect, scroll_offset: int):
-        """Render this widget with scroll translation and clipping."""
-        logging.log(f"{self.id} - rect: {self.rect} - viewport: {viewport}")
-        # Calculate visual position
-        visual_y = self.rect.y - scroll_offset
-
-        # Calculate visible portion
-        clip_top = max(0, viewport.y - visual_y)
-        clip_bottom = max(
-            0, (visual_y + self.rect.height) - (viewport.y + viewport.height)
-        )
-        visible_height = self.rect.height - clip_top - clip_bottom
-
-        if visible_height <= 0:
-            return
-
-        # Create a temporary adjusted rect for rendering
-        original_rect = self.rect
-        self.rect = Rect(
-            x=self.rect.x,
-            y=visual_y + clip_top,
-            width=self.rect.width,
-            height=visible_height,
-        )
-
-        # Store clip info for content rendering
-        self._render_clip_top = clip_top
-
-        # Render
-        self._render_border()
-        self.render_content()
-        self._render_scrollbar()
-
-        # Restore
-        self.rect = original_rect
-        self._render_clip_top = 0
-
-    def render_content(self):
+    def render_content(self, screen: core.Screen):
         pass
 
-    def _render_scrollbar(self):
+    def _render_scrollbar(self, screen: core.Screen):
         """Draw the scrollbar on the right edge of the widget (after border)."""
         if not self.needs_scrollbar:
             return
@@ -281,7 +395,9 @@ class Widget:
         inner_x = self.rect.x + self.border.left_width
         inner_y = self.rect.y + self.border.top_width
         inner_width = max(0, self.rect.width - self.border.horizontal_space)
-        inner_height = max(0, self.rect.height - self.border.vertical_space)
+        inner_height = max(
+            0, self.rect.height - self.border.vertical_space - self.scrollbar_x_height
+        )
 
         if inner_width < 1 or inner_height < 1:
             return
@@ -293,10 +409,9 @@ class Widget:
         track_char = "│"  # or "║" or "┃"
         thumb_char = "█"  # or "▓" or "■"
 
-        # Color (you can make this configurable)
-        track_color = "\033[90m"  # Dark gray
-        thumb_color = "\033[37m"  # White
-        reset = "\033[0m"
+        style = self.computed_style
+        track_color = style.scrollbar_track_color or self.SCROLLBAR_TRACK_COLOR
+        thumb_color = style.scrollbar_color or self.SCROLLBAR_THUMB_COLOR
 
         thumb_start = self.scrollbar_position
         thumb_end = thumb_start + self.scrollbar_height
@@ -306,27 +421,143 @@ class Widget:
             y = inner_y + i
             if thumb_start <= i < thumb_end:
                 # Render thumb
-                sys.stdout.write(
-                    f"\033[{y + 1};{scrollbar_x + 1}H{thumb_color}{thumb_char}{reset}"
-                )
+                screen.write_char_at(y, scrollbar_x, thumb_char, fg=thumb_color)
             else:
                 # Render track
-                sys.stdout.write(
-                    f"\033[{y + 1};{scrollbar_x + 1}H{track_color}{track_char}{reset}"
-                )
+                screen.write_char_at(y, scrollbar_x, track_char, fg=track_color)
 
-        sys.stdout.flush()
+    def _render_scrollbar_x(self, screen: core.Screen):
+        """Draw the horizontal scrollbar on the bottom edge (after border)."""
+        if not self.needs_scrollbar_x:
+            return
 
-    def render(self):
-        """Template method: renders border, then delegates to render_content()."""
-        logging.log(f"{self.id} - rect: {self.rect}")
-        self._render_border()
-        self.render_content()
-        self._render_scrollbar()
+        inner_x = self.rect.x + self.border.left_width
+        inner_width = max(
+            0, self.rect.width - self.border.horizontal_space - self.scrollbar_width
+        )
+        inner_height = max(0, self.rect.height - self.border.vertical_space)
 
-    def on_frame(self):
-        """Called every frame (60 FPS). Process buffered events here."""
-        # Process scroll buffer
+        if inner_width < 1 or inner_height < 1:
+            return
+
+        # Scrollbar appears in the bottom row of inner area
+        scrollbar_y = self.rect.y + self.border.top_width + inner_height - 1
+
+        track_char = "─"
+        thumb_char = "━"
+
+        style = self.computed_style
+        track_color = style.scrollbar_track_color or self.SCROLLBAR_TRACK_COLOR
+        thumb_color = style.scrollbar_color or self.SCROLLBAR_THUMB_COLOR
+
+        thumb_start = self.scrollbar_x_position
+        thumb_end = thumb_start + self.scrollbar_x_width
+
+        screen.write_text(scrollbar_y, inner_x, track_char * thumb_start, track_color)
+        screen.write_text(
+            scrollbar_y,
+            inner_x + thumb_start,
+            thumb_char * (thumb_end - thumb_start),
+            thumb_color,
+        )
+        screen.write_text(
+            scrollbar_y,
+            inner_x + thumb_end,
+            track_char * (inner_width - thumb_end),
+            track_color,
+        )
+
+    def render(self, screen: core.Screen):
+        """Template method: renders border, then delegates to render_content().
+
+        All drawing is clipped to the widget rect, and content to content_rect.
+        """
+        self._render_region = screen.visible_region(self.rect)
+        if self._render_region.is_empty or not screen.needs_paint(self._render_region):
+            return
+
+        logging.log(f"{self.id} - rect: {self.rect}")
+        with screen.clipped(self.rect):
+            self._render_border(screen)
+            with screen.clipped(self.content_rect):
+                self.render_content(screen)
+            self._render_scrollbar(screen)
+            self._render_scrollbar_x(screen)
+
+    def refresh(self, layout: bool = False):
+        """Request a repaint of this widget on the next frame.
+
+        Only the screen area this widget last painted is redrawn. Pass
+        layout=True when the change can affect the widget's size.
+        """
+        # Content that changed without a relayout (e.g. a growing buffer) can
+        # still add or remove a scrollbar
+        self._content_rect_cache = None
+        if self._app is None:
+            return
+        if layout:
+            self._app.mark_dirty()
+        else:
+            self._app.add_damage(self._render_region)
+
+    # Styling
+    def has_class(self, name: str) -> bool:
+        return name in self.classes
+
+    def add_class(self, *names: str):
+        if not set(names) <= self.classes:
+            self.classes.update(names)
+            self._classes_changed()
+
+    def remove_class(self, *names: str):
+        if not self.classes.isdisjoint(names):
+            self.classes.difference_update(names)
+            self._classes_changed()
+
+    def toggle_class(self, name: str):
+        self.classes ^= {name}
+        self._classes_changed()
+
+    def _classes_changed(self):
+        # Selectors can match on ancestors' classes: restyle the subtree
+        if self._app is not None:
+            self._app.restyle(self)
+
+    def apply_style(self, style: ComputedStyle):
+        """Adopt a style computed by the stylesheet. Its border and padding
+        only replace the default (or previously styled) ones, not inline ones."""
+        self.computed_style = style
+        styled_border, styled_padding = self._styled
+
+        if self.border is styled_border or self.border == Border.none():
+            if style.border is not None:
+                self.border = Border.all(style.border, style.border_color)
+                styled_border = self.border
+            elif self.border is styled_border:
+                self.border, styled_border = Border.none(), None
+
+        if self.padding is styled_padding or self.padding == Spacing():
+            if style.padding is not None:
+                self.padding = styled_padding = style.padding
+            elif self.padding is styled_padding:
+                self.padding, styled_padding = Spacing(), None
+
+        self._styled = (styled_border, styled_padding)
+
+    def on_mount(self):
+        """Called once the widget (and its children) are attached to the app."""
+
+    def on_unmount(self):
+        """Called before the widget is detached from the app."""
+
+    def _queue_scroll(self, events: List[int], step: int):
+        """Buffer a wheel event; they are applied together on the next frame."""
+        if not self._scroll_events and not self._scroll_events_x and self._app:
+            self._app.request_frame_callback(self._flush_scroll)
+        events.append(step)
+
+    def _flush_scroll(self):
+        """Frame callback applying the wheel events buffered since the last one."""
         if self._scroll_events:
             THRESHOLD = 1
 
@@ -335,54 +566,70 @@ class Widget:
 
             if total >= THRESHOLD:
                 if self.scroll_up(3):
-                    if self._app:
-                        self._app._dirty = True
+                    self.refresh()
             elif total <= -THRESHOLD:
                 if self.scroll_down(3):
-                    if self._app:
-                        self._app._dirty = True
+                    self.refresh()
 
-        # Propagate to children
-        for child in self.children:
-            child.on_frame()
+        if self._scroll_events_x:
+            total = sum(self._scroll_events_x)
+            self._scroll_events_x.clear()
+
+            if total > 0:
+                if self.scroll_left(6):
+                    self.refresh()
+            elif total < 0:
+                if self.scroll_right(6):
+                    self.refresh()
 
     @property
     def focused_child(self) -> Optional["Widget"]:
-        """Get the currently focused child, if any."""
-        for child in self.children:
-            if child.focused:
-                return child
+        """The child on the path to the focused widget, if any."""
+        if self._app is None:
+            return None
+        path = self._app.focus.path
+        for index, widget in enumerate(path[:-1]):
+            if widget is self:
+                return path[index + 1]
         return None
 
     def handle_key(self, key: ascii.Key) -> bool:
-        if self.focused_child:
-            if self.focused_child.handle_key(key):
-                return True
+        """Handle a key no binding claimed. The app offers it to the focused
+        widget first, then to each ancestor."""
+        return False
 
+    def handle_paste(self, text: str) -> bool:
+        """Handle pasted text, offered along the focus path like keys."""
         return False
 
     def contains_point(self, x: int, y: int) -> bool:
-        return (
-            self.rect.x <= x < self.rect.x + self.rect.width
-            and self.rect.y <= y < self.rect.y + self.rect.height
-        )
+        """Hit-test against the area last painted (scrolled and clipped)."""
+        region = self._render_region
+        return region.x <= x < region.right and region.y <= y < region.bottom
+
+    @property
+    def is_overlay(self) -> bool:
+        """FIXED widgets are laid out against the screen and drawn by the app."""
+        return self.position.mode == PositionMode.FIXED
 
     def handle_mouse(self, mouse: ascii.Mouse):
-        # Propagate to children
+        # Propagate to children (overlays get events from the app first)
         for child in self.children:
+            if child.is_overlay:
+                continue
             if child.handle_mouse(mouse):
                 return True
 
         if mouse.scroll_up or mouse.scroll_down:
             if self.contains_point(mouse.x, mouse.y) and self.needs_scrollbar:
-                if mouse.scroll_up:
-                    self._scroll_events.append(1)
-                elif mouse.scroll_down:
-                    self._scroll_events.append(-1)
+                self._queue_scroll(self._scroll_events, 1 if mouse.scroll_up else -1)
 
-                if self._app:
-                    self._app._dirty = True
+                return True
 
+        if mouse.scroll_left or mouse.scroll_right:
+            if self.contains_point(mouse.x, mouse.y) and self.needs_scrollbar_x:
+                step = 1 if mouse.scroll_left else -1
+                self._queue_scroll(self._scroll_events_x, step)
                 return True
 
         return False
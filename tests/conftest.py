@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def stdin(monkeypatch):
+    # Apps take the terminal from stdin, which pytest replaces with an
+    # object that has no file descriptor
+    with open(os.devnull) as devnull:
+        monkeypatch.setattr(sys, "stdin", devnull)
+        yield devnull
+
+
+@pytest.fixture
+def count_layouts(monkeypatch):
+    """Returns a function that starts recording each measure and layout of an
+    app's root, into the list it returns."""
+
+    def count(app):
+        calls = []
+        for name in ("measure", "layout"):
+            method = getattr(app.root, name)
+
+            def counted(*args, method=method, name=name, **kwargs):
+                calls.append(name)
+                return method(*args, **kwargs)
+
+            monkeypatch.setattr(app.root, name, counted)
+        return calls
+
+    return count
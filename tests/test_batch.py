@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from jterm.terminal import JTERM
+from jterm.widgets import Text
+
+
+def make_app():
+    app = JTERM(size=(40, 10))
+    app._mount_widget(app.root)
+    return app, app.query_one("#messages")
+
+
+def ids(parent):
+    return [child.id for child in parent.children]
+
+
+def test_caught_inner_failure_drops_only_the_inner_batch():
+    app, messages = make_app()
+    before = ids(messages)
+    with app.batch():
+        app.mount(messages, Text(id="kept"))
+        with pytest.raises(RuntimeError):
+            with app.batch():
+                app.mount(messages, Text(id="dropped"))
+                raise RuntimeError
+        assert ids(messages) == before
+    assert ids(messages) == before + ["kept"]
+
+
+def test_batch_held_across_an_await_only_collects_its_task():
+    app, messages = make_app()
+    before = ids(messages)
+    opened = asyncio.Event()
+    mounted = asyncio.Event()
+
+    async def batched():
+        with pytest.raises(RuntimeError):
+            async with app.batch():
+                app.mount(messages, Text(id="batched"))
+                opened.set()
+                await mounted.wait()
+                raise RuntimeError
+
+    async def other():
+        await opened.wait()
+        # Applied at once, not queued into (and dropped with) the batch
+        app.mount(messages, Text(id="other"))
+        assert ids(messages) == before + ["other"]
+        mounted.set()
+
+    async def run():
+        await asyncio.gather(batched(), other())
+
+    asyncio.run(run())
+    assert ids(messages) == before + ["other"]
+
+
+def test_task_outliving_its_batch_mutates_directly():
+    app, messages = make_app()
+    before = ids(messages)
+
+    async def run():
+        with app.batch():
+            # Inherits the batch in its context, and runs after it exits
+            task = asyncio.create_task(mount_later())
+        await task
+
+    async def mount_later():
+        await asyncio.sleep(0)
+        app.mount(messages, Text(id="late"))
+
+    asyncio.run(run())
+    assert ids(messages) == before + ["late"]
+
+
+def test_stale_parent_is_not_an_error():
+    app, messages = make_app()
+    child = Text(id="child")
+    app.mount(messages, child)
+    messages.children.remove(child)
+    assert app._index_in_parent(child) is None
+    app.unmount(child)
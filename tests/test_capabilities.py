@@ -0,0 +1,105 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from jterm import capabilities
+from jterm.capabilities import Capabilities
+from jterm.color import ColorDepth
+from jterm.terminal import JTERM
+
+DA1 = "\x1b[?62;22c"
+
+
+@pytest.mark.parametrize(
+    "replies, environ, expected",
+    [
+        # No answers but DA1: only the assumed features
+        (DA1, {"TERM": "xterm"}, Capabilities(ansi256=False)),
+        ("", {"TERM": "xterm-256color"}, Capabilities()),
+        (
+            "\x1bP>|kitty(0.35.2)\x1b\\"
+            "\x1b[?2026;2$y\x1b[?2004;1$y\x1b[?1006;1$y"
+            "\x1b[?0u"
+            "\x1bP1$r0;38:2:1:2:3m\x1b\\" + DA1,
+            {"TERM": "xterm-kitty"},
+            Capabilities(
+                name="kitty(0.35.2)",
+                synchronized_output=True,
+                truecolor=True,
+                kitty_keyboard=True,
+            ),
+        ),
+        # Modes the terminal doesn't recognize or has permanently off
+        (
+            "\x1b[?2026;0$y\x1b[?2004;4$y\x1b[?1006;0$y" + DA1,
+            {"TERM": "screen"},
+            Capabilities(ansi256=False, bracketed_paste=False, mouse=False),
+        ),
+        # A rejected truecolor SGR, but $COLORTERM says otherwise
+        (
+            "\x1bP0$r\x1b\\" + DA1,
+            {"COLORTERM": "truecolor"},
+            Capabilities(truecolor=True),
+        ),
+    ],
+)
+def test_parse_replies(replies, environ, expected):
+    assert capabilities.parse_replies(replies, environ) == expected
+
+
+def test_color_depth():
+    assert Capabilities(truecolor=True).color_depth == ColorDepth.TRUECOLOR
+    assert Capabilities().color_depth == ColorDepth.EIGHT_BIT
+    assert Capabilities(ansi256=False).color_depth == ColorDepth.FOUR_BIT
+
+
+def test_the_screen_starts_at_the_default_depth():
+    app = JTERM(size=(10, 5))
+    assert app.screen.color_depth == app.capabilities.color_depth
+
+
+@pytest.fixture
+def terminal(tmp_path, monkeypatch):
+    """A pty whose probe replies are set by the test, with an empty cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("TERM", "xterm-256color")
+    monkeypatch.delenv("COLORTERM", raising=False)
+    master, slave = os.openpty()
+    terminal = SimpleNamespace(fd=slave, replies="", probes=0)
+
+    def read_replies(fd, timeout):
+        terminal.probes += 1
+        return terminal.replies
+
+    monkeypatch.setattr(capabilities, "_read_replies", read_replies)
+    yield terminal
+    os.close(master)
+    os.close(slave)
+
+
+def test_probed_capabilities_are_cached(terminal):
+    terminal.replies = "\x1b[?2026;2$y" + DA1
+    probed = capabilities.detect(terminal.fd)
+    assert probed.synchronized_output
+
+    assert capabilities.detect(terminal.fd) == probed
+    assert terminal.probes == 1
+    # Until the cache is refreshed
+    terminal.replies = DA1
+    assert capabilities.detect(terminal.fd, refresh=True) == Capabilities()
+    assert capabilities.detect(terminal.fd) == Capabilities()
+    assert terminal.probes == 2
+
+
+def test_a_timed_out_probe_is_not_cached(terminal):
+    # The DA1 reply didn't arrive in time
+    terminal.replies = "\x1b[?2026;2$y"
+    assert capabilities.detect(terminal.fd).synchronized_output
+    assert not os.path.exists(capabilities.cache_path())
+
+    terminal.replies += DA1
+    capabilities.detect(terminal.fd)
+    capabilities.detect(terminal.fd)
+    assert terminal.probes == 2
+    assert os.path.exists(capabilities.cache_path())
@@ -0,0 +1,61 @@
+import sys
+
+import pytest
+
+from jterm import cli
+
+
+def run_main(monkeypatch, *argv):
+    called = []
+    for name in cli.COMMANDS:
+        monkeypatch.setitem(
+            cli.COMMANDS, name, lambda args, name=name: called.append(name)
+        )
+    monkeypatch.setattr(sys, "argv", ["jterm", *argv])
+    cli.main()
+    return called
+
+
+def test_commands_are_dispatched(monkeypatch):
+    assert run_main(monkeypatch) == ["run"]
+    assert run_main(monkeypatch, "--dev") == ["run"]
+    assert run_main(monkeypatch, "attach", "--compress") == ["attach"]
+
+
+def test_unknown_commands_are_rejected(monkeypatch, capsys):
+    with pytest.raises(SystemExit) as exit:
+        run_main(monkeypatch, "atach")
+    assert exit.value.code == 2
+    assert "invalid choice: 'atach'" in capsys.readouterr().err
+
+
+class FakeApp:
+    def __init__(self, **options):
+        FakeApp.options = options
+
+    async def run(self):
+        pass
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["run", "--dev", "--record", "session.jtrec"],
+        ["--dev", "run", "--record", "session.jtrec"],
+        ["--dev", "--record", "session.jtrec"],
+    ],
+)
+def test_run_options_are_accepted_after_the_command(monkeypatch, argv):
+    monkeypatch.setattr("jterm.terminal.JTERM", FakeApp)
+    monkeypatch.setattr(sys, "argv", ["jterm", *argv])
+    cli.main()
+    assert FakeApp.options["dev"] is True
+    assert FakeApp.options["record"] == "session.jtrec"
+
+
+def test_run_rejects_unknown_options(monkeypatch, capsys):
+    monkeypatch.setattr("jterm.terminal.JTERM", FakeApp)
+    monkeypatch.setattr(sys, "argv", ["jterm", "run", "--compress"])
+    with pytest.raises(SystemExit):
+        cli.main()
+    assert "unrecognized arguments: --compress" in capsys.readouterr().err
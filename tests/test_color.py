@@ -0,0 +1,105 @@
+import pytest
+
+from jterm.color import Color, ColorDepth, depth_codes, sgr, to_16, to_256
+
+TRUECOLOR, EIGHT_BIT, FOUR_BIT = (
+    ColorDepth.TRUECOLOR,
+    ColorDepth.EIGHT_BIT,
+    ColorDepth.FOUR_BIT,
+)
+
+
+@pytest.mark.parametrize(
+    "rgb, index",
+    [
+        ((0, 0, 0), 16),
+        ((255, 255, 255), 231),
+        ((255, 0, 0), 196),
+        # Each channel snaps to the nearest cube level
+        ((95, 135, 175), 67),
+        ((250, 128, 10), 208),
+        # Grays closer to the ramp than to the cube's diagonal
+        ((8, 8, 8), 232),
+        ((128, 128, 128), 244),
+        ((100, 100, 100), 241),
+        ((238, 238, 238), 255),
+    ],
+)
+def test_to_256(rgb, index):
+    assert to_256(*rgb) == index
+
+
+@pytest.mark.parametrize(
+    "rgb, index",
+    [
+        ((0, 0, 0), 0),
+        ((205, 0, 0), 1),
+        ((255, 0, 0), 9),
+        ((0, 0, 230), 4),
+        ((250, 128, 10), 3),
+        ((128, 128, 128), 8),
+        ((238, 238, 238), 7),
+        ((255, 255, 255), 15),
+    ],
+)
+def test_to_16(rgb, index):
+    assert to_16(*rgb) == index
+
+
+@pytest.mark.parametrize(
+    "color, depth, background, expected",
+    [
+        # Palette colors keep their index where the depth has it
+        (Color.ansi(1), TRUECOLOR, False, "\033[31m"),
+        (Color.ansi(1), FOUR_BIT, True, "\033[41m"),
+        (Color.ansi(9), EIGHT_BIT, False, "\033[91m"),
+        (Color.ansi(9), EIGHT_BIT, True, "\033[101m"),
+        (Color.ansi(208), TRUECOLOR, False, "\033[38;5;208m"),
+        (Color.ansi(208), EIGHT_BIT, True, "\033[48;5;208m"),
+        (Color.ansi(208), FOUR_BIT, False, "\033[33m"),
+        # RGB is exact at truecolor...
+        (Color(250, 128, 10), TRUECOLOR, False, "\033[38;2;250;128;10m"),
+        (Color(250, 128, 10), TRUECOLOR, True, "\033[48;2;250;128;10m"),
+        # ...unless it is a palette entry, which has a shorter form
+        (Color(255, 135, 0), TRUECOLOR, False, "\033[38;5;208m"),
+        (Color(128, 128, 128), TRUECOLOR, True, "\033[48;5;244m"),
+        # Quantized below truecolor
+        (Color(250, 128, 10), EIGHT_BIT, False, "\033[38;5;208m"),
+        (Color(250, 128, 10), FOUR_BIT, False, "\033[33m"),
+        (Color(255, 0, 0), FOUR_BIT, True, "\033[101m"),
+    ],
+)
+def test_sgr_uses_the_shortest_form(color, depth, background, expected):
+    assert sgr(color, depth, background) == expected
+
+
+@pytest.mark.parametrize(
+    "codes, depth, expected",
+    [
+        ((38, 2, 250, 128, 10), TRUECOLOR, (38, 2, 250, 128, 10)),
+        ((38, 2, 250, 128, 10), EIGHT_BIT, (38, 5, 208)),
+        ((38, 2, 250, 128, 10), FOUR_BIT, (33,)),
+        ((48, 5, 196), FOUR_BIT, (101,)),
+        ((38, 5, 208), EIGHT_BIT, (38, 5, 208)),
+        # Out of range channels are clamped
+        ((38, 2, 300, -5, 0), EIGHT_BIT, (38, 5, 196)),
+        # Malformed sequences are left alone
+        ((38, 2, 1), EIGHT_BIT, (38, 2, 1)),
+        ((38, 5, 300), FOUR_BIT, (38, 5, 300)),
+        ((1,), FOUR_BIT, (1,)),
+    ],
+)
+def test_depth_codes(codes, depth, expected):
+    assert depth_codes(codes, depth) == expected
+
+
+def test_parse():
+    assert Color.parse("red") == Color.ansi(1)
+    assert Color.parse("Bright Blue") == Color.ansi(12)
+    assert Color.parse("grey") == Color.ansi(8)
+    assert Color.parse("208") == Color.ansi(208)
+    assert Color.parse("#f80") == Color(255, 136, 0)
+    assert Color.parse("#FF8800") == Color(255, 136, 0)
+    for spec in ("#ff88", "#gggggg", "256", "reddish"):
+        with pytest.raises(ValueError):
+            Color.parse(spec)
@@ -0,0 +1,63 @@
+from jterm import core
+from jterm.layout import Rect, Region
+from jterm.terminal import JTERM
+from jterm.widgets import Text
+
+
+def test_writes_are_masked_to_the_damaged_rects():
+    screen = core.Screen(10, 3)
+    screen.write_text(1, 0, "x" * 10)
+    screen.set_damage(Region([Rect(0, 1, 2, 1), Rect(6, 1, 2, 2)]))
+    screen.clear_rect(Rect(0, 0, 10, 3))
+    screen.write_text(1, 0, "abcdefghij")
+    screen.write_cells(2, 5, [core.Cell("y")] * 5)
+    screen.set_damage()
+    rows = ["".join(cell.char or " " for cell in row) for row in screen.buffer]
+    assert rows == [" " * 10, "abxxxxghxx", "      yy  "]
+
+
+def test_damage_is_painted_in_one_pass(monkeypatch):
+    app = JTERM(size=(40, 20))
+    app._mount_widget(app.root)
+    messages = app.query_one("#messages")
+    first = Text(id="first", content="first")
+    second = Text(id="second", content="second")
+    app.mount(messages, first)
+    app.mount(messages, Text(id="between", content="between\n" * 4))
+    app.mount(messages, second)
+    app._paint()
+
+    passes = []
+    render = app.root.render
+    monkeypatch.setattr(
+        app.root, "render", lambda screen: passes.append(render(screen))
+    )
+    first.content = "FIRST"
+    first.refresh()
+    second.content = "SECOND"
+    second.refresh()
+    assert len(app._damage.rects) == 2
+    app._paint()
+    assert len(passes) == 1
+
+    text = "\n".join("".join(cell.char for cell in row) for row in app.screen.buffer)
+    assert "FIRST" in text and "SECOND" in text and "between" in text
+
+
+def test_overlays_open_and_close_without_a_relayout(count_layouts):
+    app = JTERM(size=(40, 20))
+    app._mount_widget(app.root)
+    for i in range(30):
+        app.mount(app.query_one("#messages"), Text(id=f"msg-{i}", content=f"{i}"))
+    app._paint()
+    calls = count_layouts(app)
+
+    app.action_search()
+    bar = app.query_one("#search")
+    assert bar is not None and not app._dirty
+    app._paint()
+
+    bar.action_close()
+    assert app.query_one("#search") is None and not app._dirty
+    app._paint()
+    assert calls == []
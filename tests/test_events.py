@@ -0,0 +1,88 @@
+import asyncio
+
+from jterm.events import EventQueue, Priority
+
+
+def events(batch):
+    return [event for _, event in batch]
+
+
+def test_input_comes_before_timers_and_background_work():
+    async def run():
+        queue = EventQueue()
+        queue.put("background 1")
+        queue.put("timer 1", Priority.TIMER)
+        queue.put("key 1", Priority.INPUT)
+        queue.put("background 2", Priority.BACKGROUND)
+        queue.put("key 2", Priority.INPUT)
+        queue.put("timer 2", Priority.TIMER)
+        queue.put("key 3", Priority.INPUT)
+        return await queue.get_batch()
+
+    batch = asyncio.run(run())
+    # FIFO within each priority
+    assert events(batch) == [
+        "key 1",
+        "key 2",
+        "key 3",
+        "timer 1",
+        "timer 2",
+        "background 1",
+        "background 2",
+    ]
+    # Each event keeps the time it arrived at
+    arrived = {event: timestamp for timestamp, event in batch}
+    times = [arrived[event] for event in ("background 1", "timer 1", "key 3")]
+    assert times == sorted(times)
+
+
+def test_batches_are_limited_and_later_input_jumps_the_rest():
+    async def run():
+        queue = EventQueue()
+        for i in range(5):
+            queue.put(f"timer {i}", Priority.TIMER)
+        first = await queue.get_batch(limit=3)
+        queue.put("key", Priority.INPUT)
+        second = await queue.get_batch(limit=3)
+        return first, second, len(queue)
+
+    first, second, left = asyncio.run(run())
+    assert events(first) == ["timer 0", "timer 1", "timer 2"]
+    assert events(second) == ["key", "timer 3", "timer 4"]
+    assert left == 0
+
+
+def test_a_waiting_consumer_is_woken():
+    async def run():
+        queue = EventQueue()
+        consumer = asyncio.create_task(queue.get_batch())
+        await asyncio.sleep(0)
+        assert not consumer.done()
+        queue.put("key", Priority.INPUT)
+        return await asyncio.wait_for(consumer, 1)
+
+    assert events(asyncio.run(run())) == ["key"]
+
+
+def test_closing_drops_pending_events_and_stops_the_consumer():
+    async def run():
+        queue = EventQueue()
+        consumer = asyncio.create_task(queue.get_batch())
+        await asyncio.sleep(0)
+        queue.close()
+        stopped = await asyncio.wait_for(consumer, 1)
+
+        queue.put("late", Priority.INPUT)
+        return stopped, len(queue), await queue.get_batch(), queue.closed
+
+    assert asyncio.run(run()) == (None, 0, None, True)
+
+
+def test_pending_events_are_dropped_on_close():
+    async def run():
+        queue = EventQueue()
+        queue.put("key", Priority.INPUT)
+        queue.close()
+        return len(queue), await queue.get_batch()
+
+    assert asyncio.run(run()) == (0, None)
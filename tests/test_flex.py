@@ -0,0 +1,94 @@
+import pytest
+
+from jterm.layout import Direction, FlexItem, Rect, Sizing
+from jterm.layout.flex import solve
+from jterm.widgets import Container
+
+
+@pytest.mark.parametrize(
+    "items, available, expected",
+    [
+        # Free space goes by grow weight, leftover cells to the first items
+        ([FlexItem(grow=1), FlexItem(grow=2)], 9, [3, 6]),
+        ([FlexItem(grow=1), FlexItem(grow=1), FlexItem(grow=1)], 10, [4, 3, 3]),
+        ([FlexItem(basis=2, grow=1), FlexItem(basis=4)], 10, [6, 4]),
+        # Nothing grows: the space stays free
+        ([FlexItem(basis=3)], 10, [3]),
+        # Overflow is taken back by shrink weight times size
+        ([FlexItem(basis=10, shrink=1), FlexItem(basis=20, shrink=1)], 15, [5, 10]),
+        ([FlexItem(basis=10, shrink=2), FlexItem(basis=10, shrink=1)], 14, [6, 8]),
+        ([FlexItem(basis=10, shrink=1), FlexItem(basis=10)], 12, [2, 10]),
+        # No available size: every item keeps its clamped basis
+        (
+            [FlexItem(basis=5, max_value=3), FlexItem(basis=1, min_value=4)],
+            None,
+            [3, 4],
+        ),
+    ],
+)
+def test_grow_and_shrink_distribution(items, available, expected):
+    assert solve(items, available) == expected
+
+
+@pytest.mark.parametrize(
+    "items, available, expected",
+    [
+        # A grown item hits its max, the rest goes to the others
+        ([FlexItem(grow=1, max_value=2), FlexItem(grow=1)], 10, [2, 8]),
+        (
+            [FlexItem(grow=3, max_value=3), FlexItem(grow=1), FlexItem(grow=1)],
+            13,
+            [3, 5, 5],
+        ),
+        # Every item at its max: space is left over
+        ([FlexItem(grow=1, max_value=2), FlexItem(grow=1, max_value=3)], 10, [2, 3]),
+        # A shrunk item hits its min, the rest is taken from the others
+        (
+            [FlexItem(basis=10, shrink=1, min_value=8), FlexItem(basis=10, shrink=1)],
+            10,
+            [8, 2],
+        ),
+        # Every item at its min: the items overflow
+        (
+            [
+                FlexItem(basis=5, shrink=1, min_value=4),
+                FlexItem(basis=5, shrink=1, min_value=4),
+            ],
+            6,
+            [4, 4],
+        ),
+        # The basis itself is clamped before any distribution
+        ([FlexItem(basis=1, grow=1, min_value=5), FlexItem(grow=1)], 9, [7, 2]),
+    ],
+)
+def test_min_and_max_are_honored(items, available, expected):
+    assert solve(items, available) == expected
+
+
+def fill(grow: int) -> Sizing:
+    return Sizing.fill(grow=grow)
+
+
+def test_row_and_column_lay_out_along_their_main_axis():
+    def laid_out(direction):
+        first = Container(id="first", width=fill(1), height=fill(1))
+        second = Container(id="second", width=fill(2), height=fill(2))
+        root = Container(
+            id="root",
+            direction=direction,
+            width=Sizing.fixed(12),
+            height=Sizing.fixed(6),
+            children=[first, second],
+        )
+        root.measure(12, 6)
+        root.layout(Rect(x=0, y=0, width=12, height=6))
+        return first.rect, second.rect
+
+    assert laid_out(Direction.ROW) == (
+        Rect(x=0, y=0, width=4, height=6),
+        Rect(x=4, y=0, width=8, height=6),
+    )
+    assert laid_out(Direction.COLUMN) == (
+        Rect(x=0, y=0, width=12, height=2),
+        Rect(x=0, y=2, width=12, height=4),
+    )
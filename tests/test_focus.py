@@ -0,0 +1,97 @@
+from jterm.app import App
+from jterm.ascii import Key
+from jterm.terminal import JTERM
+from jterm.widgets import Container, Input, Text
+
+
+def ids(widgets):
+    return [widget.id for widget in widgets]
+
+
+def make_app():
+    root = Container(
+        id="root",
+        children=[
+            Input(id="first"),
+            Container(
+                id="box",
+                children=[
+                    Text(id="label", content="not focusable"),
+                    Input(id="second"),
+                ],
+            ),
+            Input(id="third"),
+        ],
+    )
+    app = App(root, size=(40, 10))
+    app._mount_widget(root)
+    return app
+
+
+def test_tab_order_skips_unfocusable_widgets():
+    app = make_app()
+    assert ids(app.focus.order) == ["first", "second", "third"]
+    assert app.focus.focused is None
+
+    visited = []
+    for _ in range(4):
+        app.dispatch_key(Key("tab", is_printable=False))
+        visited.append(app.focus.focused.id)
+    assert visited == ["first", "second", "third", "first"]
+
+    visited = []
+    for _ in range(4):
+        app.dispatch_key(Key("tab", is_printable=False, shift=True))
+        visited.append(app.focus.focused.id)
+    assert visited == ["third", "second", "first", "third"]
+
+
+def test_shift_tab_with_nothing_focused_starts_at_the_end():
+    app = make_app()
+    app.focus.focus_previous()
+    assert app.focus.focused.id == "third"
+
+
+def test_the_order_follows_mounts_and_unmounts():
+    app = make_app()
+    box = app.query_one("#box")
+    app.mount(box, Input(id="fourth"))
+    assert ids(app.focus.order) == ["first", "second", "fourth", "third"]
+
+    app.focus.focus(app.query_one("#fourth"))
+    app.unmount(box)
+    # Focus was inside the unmounted subtree
+    assert app.focus.focused is None
+    assert ids(app.focus.path) == ["root"]
+    assert ids(app.focus.order) == ["first", "third"]
+
+
+def test_focus_path():
+    app = make_app()
+    second = app.query_one("#second")
+    app.focus.focus(second)
+    assert ids(app.focus.path) == ["root", "box", "second"]
+    assert second.focused
+
+    app.focus.focus(app.query_one("#third"))
+    assert ids(app.focus.path) == ["root", "third"]
+    assert not second.focused
+
+
+def test_focus_returns_to_the_input_when_the_search_bar_closes():
+    app = JTERM(size=(40, 10))
+    app._mount_widget(app.root)
+    prompt = app.query_one("#input")
+    assert app.focus.focused is prompt
+
+    app.action_search()
+    bar = app.query_one("#search")
+    assert app.focus.focused is bar
+    assert app.focus.path[-1] is bar
+    assert bar in app.focus.order
+
+    app.dispatch_key(Key("escape", is_printable=False))
+    assert app.query_one("#search") is None
+    assert app.focus.focused is prompt
+    assert app.focus.path == [app.root, prompt]
+    assert bar not in app.focus.order
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from jterm import formatting
+
+
+def test_superseded_jobs_are_cancelled():
+    ready = []
+
+    def on_ready():
+        ready.append(True)
+
+    async def run():
+        formatter = formatting.Formatter(threshold=10)
+        executor = formatter._executor = ThreadPoolExecutor(max_workers=1)
+        # Occupy the worker so the jobs below stay queued
+        busy = asyncio.get_running_loop().run_in_executor(executor, time.sleep, 0.1)
+
+        content = "word " * 20
+        assert formatter.wrap(content, 10, on_ready) is None
+        first = formatter._futures[formatter._key(content, 10)]
+        # Asked for every frame while it runs: still one callback
+        for _ in range(3):
+            assert formatter.wrap(content, 10, on_ready) is None
+        assert formatter._pending[formatter._key(content, 10)] == [on_ready]
+
+        appended = content + "more"
+        assert formatter.wrap(appended, 10, on_ready) is None
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        assert len(formatter._futures) == 1
+
+        await busy
+        while formatter._futures:
+            await asyncio.sleep(0.01)
+        lines = formatter.wrap(appended, 10, on_ready)
+        assert lines == formatting.wrap_lines(appended, 10)
+        formatter.shutdown()
+
+    asyncio.run(run())
+    assert ready == [True]
+
+
+class BrokenPool(ThreadPoolExecutor):
+    """A pool whose worker died: every job fails, or can't be submitted once
+    the pool knows it is broken."""
+
+    def __init__(self, broken_on_submit=False):
+        super().__init__(max_workers=1)
+        self.broken_on_submit = broken_on_submit
+
+    def submit(self, fn, *args, **kwargs):
+        if self.broken_on_submit:
+            raise BrokenProcessPool("worker died")
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+def test_failed_jobs_are_formatted_inline():
+    ready = []
+    content = "word " * 20
+
+    async def run():
+        formatter = formatting.Formatter(threshold=10)
+        broken = formatter._executor = BrokenPool()
+        assert formatter.wrap(content, 10, lambda: ready.append(True)) is None
+        for _ in range(100):
+            if ready:
+                break
+            await asyncio.sleep(0.01)
+        # The broken pool is replaced when the next job comes in
+        assert ready
+        assert broken._shutdown
+        assert formatter._executor is None
+        assert formatter.wrap(content, 10) == formatting.wrap_lines(content, 10)
+
+        broken = formatter._executor = BrokenPool(broken_on_submit=True)
+        assert formatter.wrap(content, 12) == formatting.wrap_lines(content, 12)
+        assert formatter._executor is None
+
+    asyncio.run(run())
+    assert ready == [True]
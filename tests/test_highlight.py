@@ -0,0 +1,37 @@
+from jterm.color import ColorDepth
+from jterm.highlight import PYTHON, Highlighter
+
+
+def test_edits_retokenize_until_the_state_converges():
+    lines = [f"x = {i}  # comment" for i in range(1000)]
+    highlighter = Highlighter(PYTHON)
+    highlighter.update(lines)
+    highlighter.cells(999, ColorDepth.TRUECOLOR)
+    assert highlighter.tokenized == 1000
+
+    # The same list again is not compared line by line, nor copied
+    highlighter.update(lines)
+    assert highlighter._lines is lines
+
+    # An edit in the middle re-tokenizes its line, and the next one where the
+    # state is seen to converge
+    edited = list(lines)
+    edited[500] = "y = 'edited'"
+    highlighter.update(edited)
+    highlighter.cells(999, ColorDepth.TRUECOLOR)
+    assert highlighter.tokenized == 1002
+    assert highlighter.spans(500) == [(4, 12, "string")]
+
+    # Opening a string carries its state into the lines below
+    edited = list(edited)
+    edited[10] = 'doc = """'
+    highlighter.update(edited)
+    assert highlighter.spans(20) == [(0, len(edited[20]), "string")]
+    assert highlighter.tokenized == 1002 + 11
+
+
+def test_only_lines_up_to_the_viewport_are_tokenized():
+    highlighter = Highlighter(PYTHON)
+    highlighter.update([f"value_{i} = {i}" for i in range(10_000)])
+    highlighter.spans(50)
+    assert highlighter.tokenized == 51
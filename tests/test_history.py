@@ -0,0 +1,57 @@
+from jterm.history import History
+
+
+def history(tmp_path, entries):
+    path = tmp_path / "history"
+    path.write_text("".join(entry + "\n" for entry in entries))
+    return History(str(path))
+
+
+def index(history):
+    while history.index_step(limit=7):
+        pass
+    assert history.indexed
+
+
+def test_prefix_matches_rank_first_then_substrings_newest_first(tmp_path):
+    h = history(
+        tmp_path,
+        ["make test", "git status", "echo git", "git stash", "grep gitignore"],
+    )
+    index(h)
+    assert h.search("git") == ["git stash", "git status", "grep gitignore", "echo git"]
+    assert h.search("GIT ST") == ["git stash", "git status"]
+
+
+def test_repeated_entries_rank_by_their_latest_use(tmp_path):
+    h = history(tmp_path, ["ls -la", "ls /tmp", "ls -la"])
+    index(h)
+    assert h.search("ls") == ["ls -la", "ls /tmp"]
+
+
+def test_typos_find_fuzzy_matches(tmp_path):
+    h = history(tmp_path, ["git status", "cargo build"])
+    index(h)
+    assert h.search("gti status") == ["git status"]
+
+
+def test_entries_not_indexed_yet_are_scanned(tmp_path):
+    entries = [f"command {i}" for i in range(100)] + ["needle in the hay"]
+    h = history(tmp_path, ["old needle"] + entries)
+    h.index_step(limit=10)
+    assert not h.indexed
+    assert h.search("needle") == ["needle in the hay", "old needle"]
+
+
+def test_entries_are_appended_to_the_file(tmp_path):
+    path = tmp_path / "state" / "history"
+    h = History(str(path))
+    h.append("line one\nline two \\ end")
+    h.append("line one\nline two \\ end")
+    h.append("   ")
+    assert len(h) == 1
+
+    reloaded = History(str(path))
+    assert reloaded[0] == "line one\nline two \\ end"
+    assert reloaded.previous(1, "line") == 0
+    assert reloaded.next(0) is None
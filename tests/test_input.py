@@ -0,0 +1,48 @@
+from jterm.ascii import Key
+from jterm.history import History
+from jterm.widgets import Input
+
+
+def typed(widget, text):
+    for char in text:
+        widget.handle_key(Key(key=char))
+
+
+def prompt(tmp_path):
+    history = History(str(tmp_path / "history"))
+    for entry in ("git status", "make", "git stash"):
+        history.append(entry)
+    return Input(id="input", history=history)
+
+
+def test_reverse_search_steps_through_matches(tmp_path):
+    widget = prompt(tmp_path)
+    typed(widget, "draft")
+    widget.action_history_search()
+    typed(widget, "git")
+    assert widget.content == "git stash"
+    assert widget.highlight == "git"
+    widget.action_history_search()
+    assert widget.content == "git status"
+
+    widget.action_cancel_search()
+    assert widget.content == "draft"
+    assert widget.highlight == ""
+
+    widget.action_history_search()
+    typed(widget, "mak")
+    widget.action_submit()
+    assert widget.content == "make"
+    assert widget._query is None
+
+
+def test_recall_matches_what_was_typed(tmp_path):
+    widget = prompt(tmp_path)
+    typed(widget, "git")
+    widget.action_history_previous()
+    assert widget.content == "git stash"
+    widget.action_history_previous()
+    assert widget.content == "git status"
+    widget.action_history_next()
+    widget.action_history_next()
+    assert widget.content == "git"
@@ -0,0 +1,149 @@
+import pytest
+
+from jterm import ascii, keymap
+from jterm.keymap import Binding, KeyDispatcher
+
+
+def key(spec: str) -> ascii.Key:
+    name, mask = keymap.parse_stroke(spec)
+    return ascii.Key(
+        key=name,
+        is_printable=len(name) == 1 and not mask & ascii.CTRL,
+        shift=bool(mask & ascii.SHIFT),
+        alt=bool(mask & ascii.ALT),
+        ctrl=bool(mask & ascii.CTRL),
+    )
+
+
+class Layer:
+    def __init__(self):
+        self.actions = []
+
+    def __getattr__(self, name):
+        if not name.startswith("action_"):
+            raise AttributeError(name)
+        return lambda: self.actions.append(name[len("action_") :])
+
+
+class App(Layer):
+    BINDINGS = [
+        Binding("ctrl+c", "quit"),
+        Binding("ctrl+s", "save_all"),
+        Binding("ctrl+x ctrl+s", "save"),
+        Binding("ctrl+x k", "kill"),
+    ]
+
+
+class Editor(Layer):
+    BINDINGS = [Binding("ctrl+s", "save_buffer"), Binding("escape", "cancel")]
+
+
+class ReadOnlyEditor(Editor):
+    BINDINGS = [Binding("ctrl+s", "refuse")]
+
+    def action_refuse(self):
+        self.actions.append("refuse")
+        # Let the app handle it
+        return False
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(keymap.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_parse_stroke():
+    assert keymap.parse_stroke("ctrl+shift+a") == ("a", ascii.CTRL | ascii.SHIFT)
+    assert keymap.parse_stroke("space") == (" ", 0)
+    assert keymap.parse_stroke("alt+Return") == ("enter", ascii.ALT)
+    assert keymap.parse_keys("ctrl+x ctrl+s") == (("x", ascii.CTRL), ("s", ascii.CTRL))
+    with pytest.raises(ValueError, match="Unknown modifier"):
+        keymap.parse_stroke("hyper+a")
+
+
+def test_inner_layers_shadow_outer_ones():
+    dispatcher = KeyDispatcher()
+    editor, app = Editor(), App()
+    assert dispatcher.dispatch(key("ctrl+s"), [editor, app])
+    assert editor.actions == ["save_buffer"]
+    assert app.actions == []
+
+    # Bindings only apply while their widget is on the focus path
+    assert not dispatcher.dispatch(key("escape"), [app])
+    assert dispatcher.dispatch(key("ctrl+c"), [editor, app])
+    assert app.actions == ["quit"]
+    assert not dispatcher.dispatch(key("a"), [editor, app])
+
+
+def test_actions_can_fall_through_to_outer_layers():
+    dispatcher = KeyDispatcher()
+    editor, app = ReadOnlyEditor(), App()
+    assert dispatcher.dispatch(key("ctrl+s"), [editor, app])
+    assert editor.actions == ["refuse"]
+    assert app.actions == ["save_all"]
+    # Inherited bindings stay bound
+    assert dispatcher.dispatch(key("escape"), [editor, app])
+    assert editor.actions == ["refuse", "cancel"]
+
+
+def test_chords(clock):
+    dispatcher = KeyDispatcher()
+    app = App()
+    # The first key is held until the chord is complete
+    assert dispatcher.dispatch(key("ctrl+x"), [app])
+    assert app.actions == []
+    assert dispatcher.dispatch(key("ctrl+s"), [app])
+    assert app.actions == ["save"]
+
+    # The same prefix leads to other chords
+    dispatcher.dispatch(key("ctrl+x"), [app])
+    dispatcher.dispatch(key("k"), [app])
+    assert app.actions == ["save", "kill"]
+
+
+def test_a_broken_chord_handles_the_key_on_its_own(clock):
+    dispatcher = KeyDispatcher()
+    editor, app = Editor(), App()
+    dispatcher.dispatch(key("ctrl+x"), [editor, app])
+    assert dispatcher.dispatch(key("ctrl+c"), [editor, app])
+    assert app.actions == ["quit"]
+    # The chord is gone
+    assert not dispatcher.dispatch(key("k"), [editor, app])
+
+
+def test_chords_time_out(clock):
+    dispatcher = KeyDispatcher(timeout=1.0)
+    editor, app = Editor(), App()
+    dispatcher.dispatch(key("ctrl+x"), [editor, app])
+    clock[0] += 0.9
+    dispatcher.dispatch(key("ctrl+s"), [editor, app])
+    assert app.actions == ["save"]
+
+    dispatcher.dispatch(key("ctrl+x"), [editor, app])
+    clock[0] += 1.1
+    # Too late to complete the chord: ctrl+s goes through the layers again
+    dispatcher.dispatch(key("ctrl+s"), [editor, app])
+    assert app.actions == ["save"]
+    assert editor.actions == ["save_buffer"]
+
+
+def test_a_chord_completes_on_the_layer_that_started_it(clock):
+    dispatcher = KeyDispatcher()
+    editor, app = Editor(), App()
+    dispatcher.dispatch(key("ctrl+x"), [editor, app])
+    # Focus moved in between: the chord still belongs to the app
+    dispatcher.dispatch(key("k"), [editor])
+    assert app.actions == ["kill"]
+
+
+def test_later_bindings_replace_a_prefix():
+    compiled = keymap.Keymap(
+        [Binding("ctrl+x", "cut"), Binding("ctrl+x ctrl+s", "save")]
+    )
+    assert compiled.root == {("x", ascii.CTRL): {("s", ascii.CTRL): "save"}}
+    compiled.bind(Binding("ctrl+x", "cut"))
+    assert compiled.root == {("x", ascii.CTRL): "cut"}
+    with pytest.raises(ValueError, match="Empty key binding"):
+        compiled.bind(Binding("", "nothing"))
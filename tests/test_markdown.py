@@ -0,0 +1,59 @@
+import random
+
+from jterm.widgets import Markdown
+
+DOCUMENT = """# Title
+
+Some *emphasis*, **strong** text and `code` with a [link](http://x.y).
+Hello
+## not a continuation
+---
+- item one
+- item two
+  continued here
+
+> quoted
+text
+
+```python
+def f(x):
+    return x + 1
+```
+Hello
+---x
+"""
+
+
+def rows(markdown: Markdown, width: int = 40):
+    frozen, tail = markdown._rows(width)
+    return [[cell.char for cell in row] for row in frozen + tail]
+
+
+def streamed(chunks):
+    markdown = Markdown(id="md", content="")
+    for chunk in chunks:
+        markdown.append(chunk)
+        # Parse after every chunk, as a frame would
+        rows(markdown)
+    return markdown
+
+
+def test_partial_line_does_not_end_the_open_block():
+    for chunks in (["Hello\n#", "#x more"], ["Hello\n---", "x"], ["a\n-", " b"]):
+        expected = rows(Markdown(id="md", content="".join(chunks)))
+        assert rows(streamed(chunks)) == expected
+
+
+def test_streaming_matches_a_single_parse():
+    expected = rows(Markdown(id="md", content=DOCUMENT))
+    generator = random.Random(1)
+    for _ in range(20):
+        chunks, position = [], 0
+        while position < len(DOCUMENT):
+            size = generator.randint(1, 6)
+            chunks.append(DOCUMENT[position : position + size])
+            position += size
+        markdown = streamed(chunks)
+        assert rows(markdown) == expected
+        # Everything but the last block was frozen along the way
+        assert markdown._frozen
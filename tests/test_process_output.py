@@ -0,0 +1,130 @@
+import asyncio
+import signal
+import time
+
+import pytest
+
+from jterm import ascii, core
+from jterm.capabilities import Capabilities
+from jterm.color import ColorDepth
+from jterm.layout import Sizing, Spacing
+from jterm.stylesheet import ComputedStyle
+from jterm.terminal import JTERM
+from jterm.widgets import ProcessOutput
+
+
+def painted_style(app, char):
+    app._paint()
+    for row in app.screen.buffer:
+        for cell in row:
+            if cell.char == char:
+                return cell.fg
+    raise AssertionError(f"{char!r} not painted")
+
+
+def test_colors_follow_the_terminal_depth():
+    app = JTERM(size=(40, 20))
+    app.set_capabilities(Capabilities(truecolor=True))
+    app._mount_widget(app.root)
+    output = ProcessOutput(id="output")
+    app.mount(app.query_one("#messages"), output)
+    output.feed("\x1b[1;38;2;255;0;0mX\x1b[0m\n")
+    assert painted_style(app, "X") == "\x1b[1;38;2;255;0;0m"
+
+    # A client with fewer colors attaches: cells already in the buffer are
+    # shown at its depth too
+    app.set_capabilities(Capabilities(truecolor=False, ansi256=True))
+    assert painted_style(app, "X") == "\x1b[1;38;5;196m"
+    app.set_capabilities(Capabilities(truecolor=False, ansi256=False))
+    assert "38;" not in painted_style(app, "X")
+
+
+def test_cells_at_depth_keeps_plain_cells():
+    cells = [core.Cell("a", "\x1b[31m"), core.Cell("b", "", "\x1b[48;5;21m")]
+    assert core.cells_at_depth(cells, ColorDepth.TRUECOLOR) is cells
+    converted = core.cells_at_depth(cells, ColorDepth.FOUR_BIT)
+    assert converted[0] is cells[0]
+    assert "48;" not in converted[1].bg
+
+
+def test_content_rect_follows_a_new_scrollbar():
+    app = JTERM(size=(40, 20))
+    app._mount_widget(app.root)
+    output = ProcessOutput(id="output", height=Sizing.fixed(5))
+    app.mount(app.query_one("#messages"), output)
+    output.feed("one\n")
+    app._paint()
+    width = output.content_rect.width
+
+    # Grows past its height without a relayout: the scrollbar takes a column
+    output.feed("more\n" * 10)
+    assert output.needs_scrollbar
+    assert output.content_rect.width == width - 1
+
+    output.apply_style(ComputedStyle(padding=Spacing(0, 2, 0, 2)))
+    assert output.content_rect.width == width - 5
+
+
+def test_a_command_that_fails_to_start_reports_it(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise FileNotFoundError("no shell")
+
+    monkeypatch.setattr(asyncio, "create_subprocess_shell", fail)
+    output = ProcessOutput(id="output", command="anything")
+    posted = []
+    output.post_message = posted.append
+
+    asyncio.run(output._run())
+    assert "no shell" in output.text
+    assert [type(message) for message in posted] == [ProcessOutput.Finished]
+
+
+def test_stopping_kills_and_waits_for_the_process():
+    output = ProcessOutput(id="output", command="echo started; sleep 30")
+    posted = []
+    output.post_message = posted.append
+
+    async def run():
+        output.start()
+        while "started" not in output.text:
+            await asyncio.sleep(0.01)
+        output.stop()
+        with pytest.raises(asyncio.CancelledError):
+            await output._task
+
+    asyncio.run(run())
+    assert output._process.returncode == -signal.SIGKILL
+    assert posted == []
+
+
+def test_keystrokes_get_through_a_flood_of_output():
+    app = JTERM(size=(60, 20))
+    latencies = []
+
+    async def session():
+        task = asyncio.create_task(app.run_headless(lambda data: None))
+        for key in ("!", "y", "e", "s"):
+            app.post_input(ascii.Key(key))
+        app.post_input(ascii.Key("enter", is_printable=False))
+        while not (outputs := app.query_one("#messages").children[1:]):
+            await asyncio.sleep(0.01)
+        while outputs[0].line_count < 5000:
+            await asyncio.sleep(0.01)
+
+        prompt = app.query_one("#input")
+        for char in "typing":
+            start = time.monotonic()
+            app.post_input(ascii.Key(char))
+            while not prompt.content.endswith(char):
+                await asyncio.sleep(0)
+            latencies.append(time.monotonic() - start)
+
+        outputs[0].stop()
+        app.exit()
+        await task
+
+    asyncio.run(session())
+    assert app.query_one("#input").content == "typing"
+    # Output is interpreted a few KB at a time between keystrokes, not in
+    # reads of tens of KB
+    assert max(latencies) < 0.05
@@ -0,0 +1,65 @@
+import asyncio
+
+from jterm import ascii, core, recording
+from jterm.capabilities import Capabilities
+from jterm.terminal import JTERM
+
+
+def test_synchronized_output_is_not_recorded(tmp_path, monkeypatch):
+    written = []
+    monkeypatch.setattr(core, "write_stdout", written.append)
+    path = str(tmp_path / "session.jtrec")
+    app = JTERM(size=(40, 10), record=path)
+    app.set_capabilities(Capabilities(synchronized_output=True))
+    app._mount_widget(app.root)
+    app._renderer.start()
+    app._render_frame()
+    app._renderer.stop()
+    app._recorder.close()
+
+    # The terminal gets the frame wrapped, the recording gets it bare
+    assert len(written) == 1
+    assert written[0].startswith(core.SYNC_BEGIN)
+    assert written[0].endswith(core.SYNC_END)
+    _, records = recording.read_log(path)
+    bare = written[0][len(core.SYNC_BEGIN) : -len(core.SYNC_END)]
+    assert recording.frames(records) == [bare]
+
+    report = recording.replay(JTERM(size=(40, 10)), records)
+    assert not report.mismatches
+
+
+def test_replay_matches_a_live_session(tmp_path):
+    path = str(tmp_path / "session.jtrec")
+    app = JTERM(size=(40, 12), record=path)
+
+    lines = ("hello", "some more text", "and a last line")
+
+    async def session():
+        task = asyncio.create_task(app.run_headless(lambda data: None))
+        for text in lines:
+            # Typed faster than frames are painted
+            for char in text:
+                app.post_input(ascii.Key(char))
+                await asyncio.sleep(0)
+            app.post_input(ascii.Key("enter", is_printable=False))
+            await asyncio.sleep(0.15)
+        app.exit()
+        await task
+
+    asyncio.run(session())
+    _, records = recording.read_log(path)
+    keys = sum(record.kind == recording.KEY for record in records)
+    assert keys == sum(map(len, lines)) + len(lines)
+    # Records carry the time they were written at
+    times = [record.time for record in records]
+    assert times == sorted(times)
+    assert times[-1] >= 0.15 * (len(lines) - 1)
+
+    report = recording.replay(JTERM(size=(40, 12)), records)
+    assert report.baseline_frames > 1
+    assert not report.mismatches
+    assert report.recorded_times == [
+        record.time for record in records if record.kind == recording.FRAME
+    ]
+    assert "recorded over" in report.summary()
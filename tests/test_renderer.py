@@ -0,0 +1,86 @@
+import threading
+
+from jterm.core import Cell, Frame, Renderer, encode_frame
+
+RED = "\033[31m"
+BLUE_BG = "\033[44m"
+
+
+def frame(*lines: str, fg: str = "") -> Frame:
+    """A frame showing lines, spaces as blank cells."""
+    rows = tuple(
+        tuple(Cell(char, fg) if char != " " else Cell() for char in line)
+        for line in lines
+    )
+    return Frame(width=len(lines[0]), height=len(lines), rows=rows)
+
+
+def test_first_frame_is_a_full_repaint_skipping_blanks():
+    assert encode_frame(frame("ab  ", "   c")) == (
+        "\033[0m\033[2J\033[1;1Hab\033[2;4Hc"
+    )
+
+
+def test_only_changed_cells_are_written():
+    previous = frame("abcd", "efgh")
+    assert encode_frame(previous, previous) == ""
+    assert encode_frame(frame("abcd", "efgh"), previous) == ""
+    # Adjacent changes share one cursor move
+    assert encode_frame(frame("aXYd", "efgZ"), previous) == ("\033[1;2HXY\033[2;4HZ")
+    # A cleared cell is overwritten with a space
+    assert encode_frame(frame("abcd", "e gh"), previous) == "\033[2;2H "
+
+
+def test_unchanged_rows_are_skipped_by_identity():
+    previous = frame("abcd", "efgh")
+
+    class Row(tuple):
+        def __iter__(self):
+            raise AssertionError("an unchanged row was compared")
+
+    shared = Row(previous.rows[0])
+    previous = Frame(previous.width, previous.height, (shared, previous.rows[1]))
+    current = Frame(previous.width, previous.height, (shared, frame("efgX").rows[0]))
+    assert encode_frame(current, previous) == "\033[2;4HX"
+
+
+def test_styles_are_set_when_they_change_and_reset_at_the_end():
+    previous = frame("    ")
+    row = (Cell("a", RED), Cell("b", RED), Cell("c", RED, BLUE_BG), Cell("d"))
+    current = Frame(width=4, height=1, rows=(row,))
+    assert encode_frame(current, previous) == (
+        f"\033[1;1H\033[0m{RED}ab\033[0m{RED}{BLUE_BG}c\033[0md"
+    )
+    assert encode_frame(frame("ab  ", fg=RED), previous).endswith("b\033[0m")
+
+
+def test_a_resize_repaints_everything():
+    previous = frame("abcd", "efgh")
+    assert encode_frame(frame("abc", "efg"), previous) == (
+        "\033[0m\033[2J\033[1;1Habc\033[2;1Hefg"
+    )
+
+
+def test_frames_submitted_while_busy_replace_each_other():
+    writing = threading.Event()
+    release = threading.Event()
+    written = []
+
+    def write(data: bytes):
+        written.append(data.decode("utf-8"))
+        writing.set()
+        release.wait()
+
+    renderer = Renderer(write=write)
+    renderer.start()
+    first = frame("one")
+    renderer.submit(first)
+    assert writing.wait(5)
+
+    # The terminal is slow: only the newest of these is written
+    for text in ("two", "thr", "fou"):
+        renderer.submit(frame(text))
+    release.set()
+    renderer.stop()
+
+    assert written == [encode_frame(first), encode_frame(frame("fou"), first)]
@@ -0,0 +1,54 @@
+from jterm.scheduler import Scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_timers_cancelled_after_coming_due_do_not_run():
+    clock = Clock()
+    queued = []
+    scheduler = Scheduler(clock=clock, dispatch=queued.append)
+    ran = []
+    first = scheduler.set_timeout(0.05, lambda: ran.append("first"))
+    scheduler.set_timeout(0.05, lambda: ran.append("second"))
+
+    clock.now = 0.1
+    scheduler.advance()
+    assert len(queued) == 2
+    # Cancelled while its callback waits in the event queue
+    first.cancel()
+    for callback in queued:
+        callback()
+    assert ran == ["second"]
+
+
+def test_a_callback_can_cancel_a_timer_due_on_the_same_tick():
+    clock = Clock()
+    scheduler = Scheduler(clock=clock)
+    ran = []
+    timers = []
+    timers.append(scheduler.set_timeout(0.05, lambda: timers[1].cancel()))
+    timers.append(scheduler.set_timeout(0.05, lambda: ran.append("cancelled")))
+
+    clock.now = 0.1
+    scheduler.advance()
+    assert ran == []
+
+
+def test_intervals_skip_missed_beats():
+    clock = Clock()
+    scheduler = Scheduler(clock=clock)
+    ran = []
+    scheduler.set_interval(0.1, lambda: ran.append(clock.now))
+
+    clock.now = 1.05
+    scheduler.advance()
+    assert len(ran) == 1
+    clock.now = 1.2
+    scheduler.advance()
+    assert len(ran) == 2
@@ -0,0 +1,96 @@
+from jterm import core
+from jterm.terminal import JTERM
+from jterm.ascii import Key
+from jterm.widgets import Input, SearchBar
+from jterm.widgets.text import CURRENT_MATCH_STYLE, MATCH_STYLE
+
+
+def match_style(app, word):
+    """The background of the first cell of word on screen."""
+    for row in app.screen.buffer:
+        line = "".join(cell.char or " " for cell in row)
+        column = line.find(word)
+        if column != -1:
+            return row[column].bg
+    raise AssertionError(f"{word!r} not on screen")
+
+
+def match_style_of(style):
+    return core.Screen(1, 1)._sgr(style[1], True)
+
+
+def current_style():
+    return match_style_of(CURRENT_MATCH_STYLE)
+
+
+def test_matches_are_highlighted_when_drawn():
+    app = JTERM(size=(40, 20))
+    app._mount_widget(app.root)
+    prompt = app.query_one("#input")
+    for value in ("apple pie", "banana", "apple tart"):
+        app.post_message(Input.Submitted(sender=prompt, value=value))
+    app.action_search()
+    app._paint()
+
+    bar = app.query_one("#search")
+    app.post_message(SearchBar.Changed(sender=bar, value="apple"))
+    texts = [child for child in app.query_one("#messages").children[1:]]
+    # The matches themselves are left alone
+    assert all(text.highlight == "" for text in texts)
+    app._paint()
+
+    match, current = match_style_of(MATCH_STYLE), current_style()
+    assert match_style(app, "apple pie") == match
+    assert match_style(app, "apple tart") == current
+    assert match_style(app, "banana") == ""
+
+    app.post_message(SearchBar.Navigate(sender=bar, direction=-1))
+    app._paint()
+    assert match_style(app, "apple pie") == current
+    assert match_style(app, "apple tart") == match
+
+    app.post_message(SearchBar.Closed(sender=bar))
+    app._paint()
+    assert match_style(app, "apple pie") == ""
+
+
+def test_query_edits_repaint_without_a_relayout(count_layouts):
+    app = JTERM(size=(40, 20))
+    app._mount_widget(app.root)
+    prompt = app.query_one("#input")
+    for i in range(200):
+        app.post_message(Input.Submitted(sender=prompt, value=f"message {i}"))
+    app.action_search()
+    app._paint()
+
+    calls = count_layouts(app)
+    bar = app.query_one("#search")
+    for char in "message 19":
+        bar.handle_key(Key(key=char))
+        assert not app._dirty
+        app._paint()
+    assert calls == []
+    assert match_style(app, "message 199") == current_style()
+
+
+def test_scrolled_matches_are_drawn_in_a_long_transcript():
+    app = JTERM(size=(40, 20))
+    app._mount_widget(app.root)
+    prompt = app.query_one("#input")
+    for i in range(1000):
+        app.post_message(Input.Submitted(sender=prompt, value=f"message {i}"))
+    app.action_search()
+    app._paint()
+
+    bar = app.query_one("#search")
+    app.post_message(SearchBar.Changed(sender=bar, value="message 42"))
+    for _ in range(20):
+        app.post_message(SearchBar.Navigate(sender=bar, direction=-1))
+    app._paint()
+    # Only the children around the scrolled window are drawn
+    assert match_style(app, "message 42 ") == current_style()
+    assert match_style(app, "message 43") == ""
+    drawn = [
+        c for c in app.query_one("#messages").children if not c._render_region.is_empty
+    ]
+    assert len(drawn) < 20
@@ -0,0 +1,46 @@
+import asyncio
+import os
+
+import pytest
+
+from jterm import session
+from jterm.terminal import JTERM
+
+
+def test_directory_created_private(tmp_path):
+    directory = tmp_path / "jterm"
+    session.secure_directory(str(directory))
+    assert directory.stat().st_mode & 0o777 == 0o700
+
+
+@pytest.mark.parametrize("mode", [0o755, 0o770, 0o701])
+def test_shared_directory_is_refused(tmp_path, mode):
+    directory = tmp_path / "jterm"
+    directory.mkdir()
+    directory.chmod(mode)
+    with pytest.raises(PermissionError):
+        session.secure_directory(str(directory))
+
+
+def test_symlinked_directory_is_refused(tmp_path):
+    target = tmp_path / "target"
+    target.mkdir(mode=0o700)
+    (tmp_path / "jterm").symlink_to(target)
+    with pytest.raises(PermissionError):
+        session.secure_directory(str(tmp_path / "jterm"))
+
+
+def test_socket_is_private(tmp_path):
+    path = str(tmp_path / "jterm" / "session.sock")
+    app = JTERM(size=(40, 10))
+
+    async def run():
+        server = asyncio.create_task(session.serve(app, path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+        mode = os.stat(path).st_mode & 0o777
+        app.exit()
+        await server
+        return mode
+
+    assert asyncio.run(run()) == 0o600
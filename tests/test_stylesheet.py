@@ -0,0 +1,79 @@
+import pytest
+
+from jterm.color import Color
+from jterm.layout import BorderStyle, Spacing
+from jterm.stylesheet import ComputedStyle, Stylesheet
+from jterm.widgets import Container, Input, Text
+
+RED, GREEN, BLUE = (Color.parse(name) for name in ("red", "green", "blue"))
+
+
+def tree():
+    text = Text(id="title", classes={"muted"})
+    other = Text(id="other")
+    inner = Container(id="inner", classes={"panel"}, children=[text])
+    root = Container(id="root", children=[inner, other])
+    for parent in (root, inner):
+        for child in parent.children:
+            child._parent = parent
+    return root, inner, text, other
+
+
+def test_the_most_specific_rule_wins():
+    _, _, text, other = tree()
+    sheet = Stylesheet(
+        """
+        #title { color: red; }
+        Text.muted { color: green; border: rounded; }
+        Text { color: blue; padding: 1 2; }
+        """
+    )
+    style = sheet.compute(text)
+    assert style.color == RED
+    assert style.border == BorderStyle.ROUNDED
+    assert style.padding == Spacing(1, 2, 1, 2)
+    assert sheet.compute(other).color == BLUE
+
+
+def test_later_rules_win_ties():
+    _, _, text, _ = tree()
+    sheet = Stylesheet(".muted { color: red; } .muted { color: green; }")
+    assert sheet.compute(text).color == GREEN
+
+
+def test_combinators_and_subclasses():
+    root, inner, text, other = tree()
+    sheet = Stylesheet(
+        """
+        #root > Text { color: red; }
+        #root Text { border: heavy; }
+        .panel > Widget { color: green; }
+        """
+    )
+    assert sheet.compute(other).color == RED
+    assert sheet.compute(text).color == GREEN
+    assert sheet.compute(text).border == BorderStyle.HEAVY
+    # A type selector matches subclasses: Input is a Text
+    assert Stylesheet("Text { color: blue; }").compute(Input(id="i")).color == BLUE
+
+
+def test_color_is_inherited():
+    _, _, text, _ = tree()
+    parent = ComputedStyle(color=RED, border=BorderStyle.ROUNDED)
+    style = Stylesheet("").compute(text, parent)
+    assert style == ComputedStyle(color=RED)
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["Text { colour: red; }", "Text > { color: red; }", "Text { border: wavy; }"],
+)
+def test_invalid_sheets_are_rejected(source):
+    with pytest.raises(ValueError):
+        Stylesheet(source)
+
+
+def test_rules_are_found_by_any_of_their_classes():
+    text = Text(id="text", classes={"alpha", "beta"})
+    sheet = Stylesheet(".beta.alpha { color: red; } .zeta.beta { color: blue; }")
+    assert sheet.compute(text).color == RED
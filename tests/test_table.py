@@ -0,0 +1,48 @@
+import asyncio
+
+from jterm.layout import Sizing
+from jterm.terminal import JTERM
+from jterm.widgets import Table
+
+
+def mounted(table):
+    app = JTERM(size=(60, 20))
+    app._mount_widget(app.root)
+    app.mount(app.query_one("#messages"), table)
+    app._paint()
+    return app
+
+
+def test_columns_widened_while_drawn_are_laid_out_again():
+    rows = [[i, "short"] for i in range(1000)]
+    # Between two sampled rows: only seen once scrolled into view
+    rows[503][1] = "a much longer value"
+    table = Table(id="table", columns=["n", "value"], rows=rows)
+    table.height = Sizing.fixed(6)
+    app = mounted(table)
+    assert table._widths == [3, 5]
+    assert not app._dirty
+
+    table.scroll_offset = 500
+    table.refresh()
+    app._paint()
+    assert table._widths == [3, 19]
+    assert app._dirty
+    app._paint()
+    assert table._total_content_width == 3 + 2 + 19
+    assert not app._dirty
+
+
+def test_a_failing_source_still_finishes_loading():
+    def rows():
+        yield [1, "one"]
+        yield [2, "two"]
+        raise OSError("connection lost")
+
+    table = Table(id="table", columns=["n", "name"], rows=rows())
+    posted = []
+    table.post_message = posted.append
+
+    asyncio.run(table._load())
+    assert table.row_count == 2
+    assert [message.row_count for message in posted] == [2]
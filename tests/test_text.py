@@ -0,0 +1,145 @@
+import random
+import textwrap
+
+from jterm import formatting
+from jterm.layout import Overflow, Sizing
+from jterm.terminal import JTERM
+from jterm.widgets import Text
+
+WORDS = ["a", "word", "longer-word", "  ", "\t", "x" * 30, "end.", "\n"]
+
+
+def measure(text, width):
+    lines = text._lines()
+    return lines, text._split[2], text._split_rows(width)
+
+
+def test_measurements_follow_edits():
+    generator = random.Random(2)
+    text = Text(id="text", content="")
+    # Measured at these widths before the edits, updated by each one
+    for width in (7, 30):
+        text._split_rows(width)
+    for _ in range(2000):
+        edit = generator.random()
+        if edit < 0.6:
+            text.content += generator.choice(["a", "bc ", "\n", "long " * 9, "x\ny"])
+        elif edit < 0.9:
+            text.content = text.content[: -generator.randint(1, 12)]
+        else:
+            text.content = "re\nset" + text.content[3:]
+        for width in (7, 30, None):
+            expected = Text(id="fresh", content=text.content)
+            assert measure(text, width) == measure(expected, width)
+
+
+def test_auto_height_counts_wrapped_rows():
+    text = Text(id="text", content="a" * 25 + "\n\nbb")
+    size = text._calculate_dimensions(10, None)
+    assert size.height == 3 + 1 + 1
+    assert size.width == 10
+
+
+def test_wrap_line_matches_textwrap():
+    generator = random.Random(3)
+    for _ in range(500):
+        line = " ".join(generator.choices(WORDS[:-1], k=generator.randint(0, 12)))
+        for width in (5, 16, 40):
+            assert formatting.wrap_line(line, width) == (
+                textwrap.fill(line, width=width).split("\n")
+            )
+
+
+def test_edits_only_rewrap_the_changed_lines(monkeypatch):
+    generator = random.Random(4)
+    text = Text(id="text", content="")
+    calls = []
+    wrap_line = formatting.wrap_line
+
+    def counted(line, width):
+        calls.append(line)
+        return wrap_line(line, width)
+
+    monkeypatch.setattr(formatting, "wrap_line", counted)
+    for _ in range(300):
+        if generator.random() < 0.8:
+            text.content += " ".join(generator.choices(WORDS, k=3))
+        else:
+            text.content = text.content[: -generator.randint(1, 5)]
+        calls.clear()
+        wrapped = text._wrap(12)
+        # The last line kept and the new ones
+        assert len(calls) <= text.content[-40:].count("\n") + 2
+
+        expected = formatting.wrap_lines(text.content, 12)
+        assert wrapped.rows == expected
+        assert wrapped.offsets[-1] == sum(map(len, expected))
+
+
+def test_frames_do_not_rewrap(monkeypatch):
+    app = JTERM(size=(40, 10))
+    app._mount_widget(app.root)
+    content = "\n".join(f"line {i} " + "word " * 12 for i in range(2000))
+    text = Text(id="long", content=content, overflow_y=Overflow.AUTO)
+    text.height = Sizing.fixed(8)
+    app.mount(app.query_one("#messages"), text)
+    app._paint()
+
+    calls = []
+    wrap_line = formatting.wrap_line
+
+    def counted(line, width):
+        calls.append(line)
+        return wrap_line(line, width)
+
+    monkeypatch.setattr(formatting, "wrap_line", counted)
+    wrapped = text._wrap(text.content_rect.width)
+    for line in (1500, 10, 1999):
+        text.scroll_offset = wrapped.offsets[line]
+        app.mark_dirty()
+        app._paint()
+        assert f"line {line} " in screen_text(app)
+    assert calls == []
+
+    text.content += " appended"
+    text._content_changed()
+    app._paint()
+    assert len(calls) == 1
+    assert text.find_line("line 1500 ") == wrapped.offsets[1500]
+    assert text.find_line("appended") == wrapped.offsets[-1] - 1
+
+
+def screen_text(app):
+    return "\n".join(
+        "".join(cell.char or " " for cell in row) for row in app.screen.buffer
+    )
+
+
+def test_highlighted_frames_skip_the_lines_above(monkeypatch):
+    app = JTERM(size=(40, 10))
+    app._mount_widget(app.root)
+    content = "\n".join(f"x_{i} = {i}" + "  # pad" * (i % 9) for i in range(5000))
+    text = Text(id="code", content=content, language="python")
+    text.overflow_y = Overflow.AUTO
+    text.height = Sizing.fixed(8)
+    app.mount(app.query_one("#messages"), text)
+    app._paint()
+
+    width = text.content_rect.width
+    rows = [len(line) // width + 1 for line in text._lines()]
+    for line in (4000, 20, 4999):
+        text.scroll_offset = sum(rows[:line])
+        app.mark_dirty()
+        app._paint()
+        assert screen_text(app).count(f"x_{line} = {line}") == 1
+
+    # Offsets are kept across frames, and an append only drops the last one
+    offsets = text._split_offsets[width]
+    assert len(offsets) == 5001
+    text.content += "\nx_5000 = 5000"
+    text._content_changed()
+    text.scroll_offset = sum(rows[:100])
+    app.mark_dirty()
+    app._paint()
+    assert len(offsets) == 5000
+    assert screen_text(app).count("x_100 = 100") == 1
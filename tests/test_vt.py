@@ -0,0 +1,151 @@
+import pytest
+
+from jterm.core import VirtualTerminal
+
+
+def lines(vt: VirtualTerminal):
+    return ["".join(cell.char or " " for cell in row) for row in vt.rows]
+
+
+def feed(*chunks: str, **options) -> VirtualTerminal:
+    vt = VirtualTerminal(**options)
+    for chunk in chunks:
+        vt.feed(chunk)
+    return vt
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ("ab\ncd", ["ab", "cd"]),
+        # A newline also returns the carriage: pipe output has no onlcr
+        ("ab\ncd\n", ["ab", "cd", ""]),
+        # Progress bars redraw the line in place
+        ("50%\r100%", ["100%"]),
+        ("abc\bX", ["abX"]),
+        ("\b\bab", ["ab"]),
+        ("a\tb", ["a       b"]),
+        ("abcdefgh\tb", ["abcdefgh        b"]),
+    ],
+)
+def test_control_characters(data, expected):
+    assert lines(feed(data)) == expected
+
+
+def test_long_lines_wrap_at_the_column_limit():
+    vt = feed("abcdefghij\nk", columns=4)
+    assert lines(vt) == ["abcd", "efgh", "ij", "k"]
+    assert vt.width == 4
+
+
+def test_old_rows_are_dropped():
+    vt = feed("1\n2\n3\n4\n5", max_lines=3)
+    assert lines(vt) == ["3", "4", "5"]
+    assert vt.dropped == 2
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        # Relative moves
+        ("abc\x1b[2DX", ["aXc"]),
+        ("abc\x1b[DX", ["abX"]),
+        ("a\x1b[3CX", ["a   X"]),
+        ("one\ntwo\x1b[AX", ["oneX", "two"]),
+        ("one\ntwo\nsix\x1b[2FX", ["Xne", "two", "six"]),
+        ("one\ntwo\x1b[A\x1b[BX", ["one", "twoX"]),
+        # Cursor down never scrolls
+        ("one\x1b[2EX", ["Xne"]),
+        # Absolute moves
+        ("abcdef\x1b[3GX", ["abXdef"]),
+        ("one\ntwo\x1b[1;2HX", ["oXe", "two"]),
+        ("one\ntwo\x1b[HX", ["Xne", "two"]),
+        # Never before the first row or column
+        ("ab\x1b[9DX\x1b[9AY", ["XY"]),
+    ],
+)
+def test_cursor_movement(data, expected):
+    assert lines(feed(data)) == expected
+
+
+def test_absolute_rows_are_relative_to_the_screen():
+    vt = feed("a\nb\nc\x1b[1;1HX", height=2)
+    assert lines(vt) == ["a", "X", "c"]
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ("hello\x1b[3D\x1b[K", ["he"]),
+        ("hello\x1b[3D\x1b[0K", ["he"]),
+        ("hello\x1b[3D\x1b[1K", ["   lo"]),
+        ("hello\x1b[3D\x1b[2KX", ["  X"]),
+        ("one\ntwo\nsix\x1b[2;2H\x1b[J", ["one", "t", ""]),
+        ("one\ntwo\nsix\x1b[2;2H\x1b[1J", ["", "  o", "six"]),
+        ("one\ntwo\nsix\x1b[2J", ["", "", ""]),
+    ],
+)
+def test_erase(data, expected):
+    assert lines(feed(data)) == expected
+
+
+def test_sgr_colors_and_attributes():
+    vt = feed(
+        "\x1b[1;31mA\x1b[22mB\x1b[44mC\x1b[39mD\x1b[0mE"
+        "\x1b[4;1mF\x1b[24mG\x1b[m"
+        "\x1b[38;5;208mH\x1b[48;2;1;2;3mI\x1b[38:2:4:5:6mJ"
+    )
+    cells = {cell.char: (cell.fg, cell.bg) for cell in vt.rows[0]}
+    assert cells == {
+        "A": ("\x1b[1;31m", ""),
+        "B": ("\x1b[31m", ""),
+        "C": ("\x1b[31m", "\x1b[44m"),
+        "D": ("", "\x1b[44m"),
+        "E": ("", ""),
+        # Attributes are kept in a canonical order
+        "F": ("\x1b[1;4m", ""),
+        "G": ("\x1b[1m", ""),
+        "H": ("\x1b[38;5;208m", ""),
+        "I": ("\x1b[38;5;208m", "\x1b[48;2;1;2;3m"),
+        # Colon separated extended colors
+        "J": ("\x1b[38;2;4;5;6m", "\x1b[48;2;1;2;3m"),
+    }
+    # Identical styles share one string
+    b, c = vt.rows[0][1], vt.rows[0][2]
+    assert b.fg is c.fg
+
+
+def test_other_sequences_are_ignored():
+    vt = feed("\x1b[?25l\x1b]0;title\x07\x1b(B\x1b=A\x1b]8;;url\x1b\\B\x07\x1b[>1uC")
+    assert lines(vt) == ["ABC"]
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        ("a\x1b", "[31mb"),
+        ("a\x1b[", "31mb"),
+        ("a\x1b[3", "1mb"),
+        ("a\x1b[31", "mb"),
+        ("a\x1b", "[", "3", "1", "m", "b"),
+    ],
+)
+def test_sequences_split_across_feeds(chunks):
+    vt = feed(*chunks)
+    assert lines(vt) == ["ab"]
+    assert vt.rows[0][1].fg == "\x1b[31m"
+
+
+def test_titles_split_across_feeds():
+    assert lines(feed("a\x1b]0;ti", "tle\x1b", "\\b")) == ["ab"]
+
+
+def test_damage_covers_the_rows_written():
+    vt = VirtualTerminal()
+    vt.feed("one\ntwo\nsix")
+    assert vt.take_damage() == (0, 2)
+    assert vt.take_damage() is None
+    vt.feed("\x1b[2;1HX")
+    assert vt.take_damage() == (1, 1)
+    vt.feed("\x1b[2J")
+    assert vt.take_damage() == (0, 2)